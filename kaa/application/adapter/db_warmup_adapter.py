@@ -0,0 +1,28 @@
+from ..core import db_warmup
+
+_STATE_TEXT = {
+    'pending': '未载入',
+    'loading': '载入中',
+    'ready': '已载入',
+    'error': '出错',
+}
+_NAME_TEXT = {
+    'drinks': '饮品',
+    'idols': '偶像',
+}
+
+def start_warm_up() -> None:
+    db_warmup.start_warm_up()
+
+def warm_up_status_rows() -> list[list[str]]:
+    """以表格行的形式返回图像数据库的载入状态：名称、状态、载入耗时、等待耗时。"""
+    rows = []
+    for status in db_warmup.warm_up_status():
+        load_time = f'{status.load_seconds:.2f}s' if status.load_seconds is not None else '-'
+        rows.append([
+            _NAME_TEXT.get(status.name, status.name),
+            _STATE_TEXT.get(status.state, status.state),
+            load_time,
+            f'{status.wait_seconds:.2f}s',
+        ])
+    return rows
@@ -0,0 +1,20 @@
+import logging
+
+from kaa.image_db import LazyImageDatabase, LoadStatus
+
+logger = logging.getLogger(__name__)
+
+def _loaders() -> list[LazyImageDatabase]:
+    from kaa.game_ui.drinks_overview import drinks_db_loader
+    from kaa.game_ui.idols_overview import idols_db_loader
+    return [drinks_db_loader, idols_db_loader]
+
+def start_warm_up() -> None:
+    """在后台线程中预先载入所有图像数据库。"""
+    logger.info('Warming up image databases in background...')
+    for loader in _loaders():
+        loader.warm_up()
+
+def warm_up_status() -> list[LoadStatus]:
+    """获取所有图像数据库的载入状态。"""
+    return [loader.status() for loader in _loaders()]
@@ -3,6 +3,7 @@ import json
 import uuid
 import re
 import logging
+import threading
 from typing import Literal
 from pydantic import BaseModel, ConfigDict, ValidationError, field_serializer, field_validator
 
@@ -92,6 +93,96 @@ class ProduceSolution(ConfigBaseModel):
     """培育数据"""
 
 
+class ProduceSolutionCache:
+    """
+    培育方案的进程内缓存。
+
+    维护方案 ID 到文件路径的索引，以及已解析的方案对象。
+    方案目录的修改时间变化时重建索引，方案文件的修改时间或大小变化时重新解析。
+    """
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__dir: str | None = None
+        self.__dir_mtime: int | None = None
+        self.__paths: dict[str, str] = {}
+        """方案 ID -> 文件路径"""
+        self.__solutions: dict[str, tuple[int, int, ProduceSolution]] = {}
+        """文件路径 -> (修改时间, 文件大小, 方案)"""
+
+    def invalidate(self) -> None:
+        """清空缓存。"""
+        with self.__lock:
+            self.__dir = None
+            self.__dir_mtime = None
+            self.__paths.clear()
+            self.__solutions.clear()
+
+    def read(self, solutions_dir: str, id: str) -> ProduceSolution:
+        """
+        读取指定ID的培育方案。
+
+        返回的对象在缓存中共享，调用方不应修改。
+
+        :param solutions_dir: 方案目录
+        :param id: 方案ID
+        :return: 方案对象
+        :raises ProduceSolutionNotFoundError: 当方案不存在时
+        :raises ProduceSolutionInvalidError: 当方案文件格式错误时
+        """
+        with self.__lock:
+            # 第二次尝试：文件被重命名或 ID 被修改，但目录修改时间未变
+            for force_reindex in (False, True):
+                self.__update_index(solutions_dir, force_reindex)
+                file_path = self.__paths.get(id)
+                if file_path is None:
+                    continue
+                try:
+                    stat = os.stat(file_path)
+                except FileNotFoundError:
+                    continue
+                cached = self.__solutions.get(file_path)
+                if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                    return cached[2]
+                try:
+                    with open(file_path, 'r', encoding='utf-8') as f:
+                        solution = ProduceSolution.model_validate_json(f.read())
+                except ValidationError as e:
+                    raise ProduceSolutionInvalidError(id, file_path, e)
+                if solution.id != id:
+                    continue
+                self.__solutions[file_path] = (stat.st_mtime_ns, stat.st_size, solution)
+                return solution
+            raise ProduceSolutionNotFoundError(id)
+
+    def __update_index(self, solutions_dir: str, force: bool) -> None:
+        try:
+            dir_mtime = os.stat(solutions_dir).st_mtime_ns
+        except FileNotFoundError:
+            dir_mtime = None
+        if not force and solutions_dir == self.__dir and dir_mtime == self.__dir_mtime:
+            return
+        paths: dict[str, str] = {}
+        if dir_mtime is not None:
+            for filename in os.listdir(solutions_dir):
+                if not filename.endswith('.json'):
+                    continue
+                file_path = os.path.join(solutions_dir, filename)
+                try:
+                    with open(file_path, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                    paths.setdefault(data.get('id'), file_path)
+                except Exception:
+                    continue
+        self.__dir = solutions_dir
+        self.__dir_mtime = dir_mtime
+        self.__paths = paths
+        # 丢弃已不在索引中的文件
+        alive = set(paths.values())
+        self.__solutions = {p: v for p, v in self.__solutions.items() if p in alive}
+        logger.debug('Produce solution index rebuilt with %d solutions.', len(paths))
+
+_solution_cache = ProduceSolutionCache()
+
 class ProduceSolutionManager:
     """培育方案管理器"""
 
@@ -190,6 +281,7 @@ class ProduceSolutionManager:
         file_path = self._find_file_path_by_id(id)
         if file_path:
             os.remove(file_path)
+        _solution_cache.invalidate()
 
     def save(self, id: str, solution: ProduceSolution) -> None:
         """
@@ -212,6 +304,7 @@ class ProduceSolutionManager:
             # 使用 model_dump 并指定 mode='json' 来正确序列化枚举
             data = solution.model_dump(mode='json')
             json.dump(data, f, ensure_ascii=False, indent=4)
+        _solution_cache.invalidate()
 
     def read(self, id: str) -> ProduceSolution:
         """
@@ -231,6 +324,19 @@ class ProduceSolutionManager:
         except ValidationError as e:
             raise ProduceSolutionInvalidError(id, file_path, e)
 
+    def read_cached(self, id: str) -> ProduceSolution:
+        """
+        读取指定ID的培育方案，优先使用缓存。
+
+        适用于需要频繁读取方案的场景。返回的对象在缓存中共享，调用方不应修改。
+        若需要修改后保存，请使用 `read`。
+
+        :param id: 方案ID
+        :return: 方案对象
+        :raises ProduceSolutionNotFoundError: 当方案不存在时
+        """
+        return _solution_cache.read(self.SOLUTIONS_DIR, id)
+
     def duplicate(self, id: str) -> ProduceSolution:
         """
         复制指定ID的培育方案
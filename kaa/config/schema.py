@@ -112,6 +112,20 @@ class CapsuleToysConfig(ConfigBaseModel):
 class TraceConfig(ConfigBaseModel):
     recommend_card_detection: bool = False
     """跟踪推荐卡检测"""
+    queue_size: int = 32
+    """跟踪写入队列的最大长度"""
+    drop_policy: Literal['drop_oldest', 'drop_newest', 'block'] = 'drop_oldest'
+    """写入队列已满时的处理方式"""
+    image_format: Literal['png', 'png_fast', 'jpg', 'webp'] = 'png'
+    """跟踪图像的保存格式"""
+    image_quality: int = 90
+    """jpg/webp 格式的压缩质量"""
+    max_size_mb: float = 0
+    """跟踪目录中图像的总大小上限（MB），超出后删除最早的图像。默认为 0，不限制也不删除"""
+    record_session: bool = False
+    """录制截图会话（每一帧截图、点击与当前动作），保存到 ./recordings/"""
+    profile_actions: bool = False
+    """统计每个动作的耗时、截图、模板匹配与 OCR 次数，显示在「状态」页中。会替换 kotonebot 的内部函数，仅用于排查性能问题"""
 
 class StartGameConfig(ConfigBaseModel):
     enabled: bool = True
@@ -254,5 +268,4 @@ def produce_solution() -> ProduceSolution:
     id = conf().produce.selected_solution_id
     if id is None:
         raise ValueError("No produce solution selected")
-    # TODO: 这里需要缓存，不能每次都从磁盘读取
-    return ProduceSolutionManager().read(id)
+    return ProduceSolutionManager().read_cached(id)
@@ -1,2 +1,4 @@
 from .idol_card import IdolCard
-from .constants import CharacterId
\ No newline at end of file
+from .drink import Drink
+from .constants import CharacterId
+from .catalogue import Catalogue
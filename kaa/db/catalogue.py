@@ -0,0 +1,60 @@
+import threading
+from logging import getLogger
+from typing import Callable, Generic, Hashable, Iterable, TypeVar
+
+logger = getLogger(__name__)
+
+T = TypeVar('T')
+K = TypeVar('K', bound=Hashable)
+
+class Catalogue(Generic[K, T]):
+    """
+    只读数据表的内存目录。
+
+    首次访问时调用 `loader` 一次性载入全部数据，并按 `key` 建立索引，
+    之后的查询不再访问数据库。game.db 只在构建时更新，运行中不会变化。
+    """
+    def __init__(self, name: str, loader: Callable[[], Iterable[T]], key: Callable[[T], K]):
+        """
+        :param name: 目录名称，用于日志。
+        :param loader: 载入全部数据的函数。
+        :param key: 从数据中取出索引键的函数。
+        """
+        self.name = name
+        self.__loader = loader
+        self.__key = key
+        self.__lock = threading.Lock()
+        # 数据与索引放在同一个元组中整体替换，无锁读取时不会取到不配对的数据与索引
+        self.__state: tuple[tuple[T, ...], dict[K, T]] | None = None
+
+    def __ensure(self) -> tuple[tuple[T, ...], dict[K, T]]:
+        state = self.__state
+        if state is not None:
+            return state
+        with self.__lock:
+            if self.__state is None:
+                items = tuple(self.__loader())
+                index: dict[K, T] = {}
+                for item in items:
+                    # 与 SQL 查询 `LIMIT 1` 的行为一致，重复键保留第一条
+                    index.setdefault(self.__key(item), item)
+                self.__state = (items, index)
+                logger.info('Catalogue %s loaded with %d items.', self.name, len(items))
+            return self.__state
+
+    def get(self, key: K) -> T | None:
+        """根据索引键查询。不存在时返回 None。"""
+        return self.__ensure()[1].get(key)
+
+    def all(self) -> tuple[T, ...]:
+        """获取全部数据。"""
+        return self.__ensure()[0]
+
+    def keys(self) -> frozenset[K]:
+        """获取全部索引键。"""
+        return frozenset(self.__ensure()[1])
+
+    def refresh(self) -> None:
+        """丢弃已载入的数据，下次访问时重新载入。"""
+        with self.__lock:
+            self.__state = None
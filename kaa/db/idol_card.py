@@ -1,9 +1,10 @@
 from dataclasses import dataclass
 
-from .sqlite import select, select_many
+from .sqlite import select_many
+from .catalogue import Catalogue
 from .constants import CharacterId
 
-@dataclass
+@dataclass(frozen=True)
 class IdolCard:
     """偶像卡"""
     id: str
@@ -17,26 +18,15 @@ class IdolCard:
         """
         根据 skin_id 查询 IdolCard。
         """
-        row = select("""
-        SELECT
-            IC.id AS cardId,
-            ICS.id AS skinId,
-            Char.lastName || ' ' || Char.firstName || '　' || IC.name AS name,
-            NOT (IC.originalIdolCardSkinId = ICS.id) AS isAnotherVer,
-            ICS.name AS anotherVerName
-        FROM IdolCard IC
-        JOIN Character Char ON characterId = Char.id
-        JOIN IdolCardSkin ICS ON IC.id = ICS.idolCardId
-        WHERE ICS.id = ?;
-        """, sid)
-        if row is None:
-            return None
-        card_id, skin_id, name, is_another, another_name = row
-        return cls(card_id, skin_id, is_another, another_name, name)
-    
+        return _idol_cards.get(sid)
+
     @classmethod
     def all(cls) -> list['IdolCard']:
         """获取所有偶像卡"""
+        return list(_idol_cards.all())
+
+    @classmethod
+    def _query_all(cls) -> list['IdolCard']:
         rows = select_many("""
         SELECT
             IC.id AS cardId,
@@ -54,6 +44,8 @@ class IdolCard:
             results.append(cls(card_id, skin_id, is_another, another_name, name))
         return results
 
+_idol_cards = Catalogue('IdolCard', IdolCard._query_all, lambda c: c.skin_id)
+
 if __name__ == '__main__':
     from pprint import pprint as print
     print(IdolCard.from_skin_id('i_card-skin-fktn-3-006'))
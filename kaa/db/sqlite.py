@@ -1,5 +1,7 @@
+import queue
 import sqlite3
 import threading
+from pathlib import Path
 from logging import getLogger
 from typing import Any, cast, Dict, List, Optional
 
@@ -7,24 +9,63 @@ from kaa import resources as res
 
 _db_path = cast(str, res.__path__)[0] + '/game.db'
 
-_db_dict = {}
+MAX_IDLE_CONNECTIONS = 4
+"""连接池中最多保留的空闲连接数"""
+MMAP_SIZE = 64 * 1024 * 1024
+"""每个连接的内存映射大小"""
 
 logger = getLogger(__name__)
 
-def _ensure_db() -> sqlite3.Connection:
+_idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue(MAX_IDLE_CONNECTIONS)
+_local = threading.local()
+
+def _connect() -> sqlite3.Connection:
+    # game.db 是只读资源，以 immutable 方式打开可以省去文件锁与变更检测
+    uri = Path(_db_path).absolute().as_uri() + '?mode=ro&immutable=1'
+    conn = sqlite3.connect(
+        uri,
+        uri=True,
+        # 连接会在线程结束后回到连接池，被其他线程复用。
+        # 同一时刻只会有一个线程持有连接，因此关闭线程检查是安全的。
+        check_same_thread=False,
+    )
+    conn.execute(f'PRAGMA mmap_size = {MMAP_SIZE};')
+    conn.execute('PRAGMA query_only = 1;')
+    conn.row_factory = sqlite3.Row
+    return conn
+
+class _Lease:
     """
-    确保数据库连接已建立
-    培育过程是新开线程，不同线程的connection不能使用
-    # TODO 培育结束需要关闭connection
+    线程持有的连接。
+
+    保存在 `threading.local` 中，线程结束时随线程局部数据一起被回收，
+    此时把连接放回连接池；连接池已满则直接关闭。
     """
-    global _db_dict
-    thread_id = threading.current_thread().ident
-    if thread_id not in _db_dict:
-        _db_dict[thread_id] = sqlite3.connect(_db_path)
-        _db_dict[thread_id].row_factory = sqlite3.Row
-        logger.info("Database connection established for thread: %s", thread_id)
-    return _db_dict[thread_id]
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
 
+    def __del__(self):
+        try:
+            _idle.put_nowait(self.conn)
+        except queue.Full:
+            self.conn.close()
+
+def _ensure_db() -> sqlite3.Connection:
+    """
+    获取当前线程的数据库连接。
+    培育过程是新开线程，不同线程同时使用同一个 connection 并不安全，
+    因此每个线程从连接池中借出一个连接，线程结束后归还。
+    """
+    lease: _Lease | None = getattr(_local, 'lease', None)
+    if lease is None:
+        try:
+            conn = _idle.get_nowait()
+        except queue.Empty:
+            conn = _connect()
+            logger.info("Database connection established for thread: %s", threading.current_thread().name)
+        lease = _Lease(conn)
+        _local.lease = lease
+    return lease.conn
 
 def select_many(query: str, *args) -> List[Dict[str, Any]]:
     """执行查询并返回多行结果，每行为字典格式"""
@@ -39,4 +80,4 @@ def select(query: str, *args) -> Optional[Dict[str, Any]]:
     db = _ensure_db()
     c = db.cursor()
     c.execute(query, args)
-    return c.fetchone()
\ No newline at end of file
+    return c.fetchone()
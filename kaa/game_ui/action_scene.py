@@ -0,0 +1,135 @@
+"""
+培育行动场景（日程选择页面）的识别。
+
+老师头像、老师的推荐提示、三种课程按钮与 SP 图标等，
+在 `handle_recommended_action`、`Schedule` 等多处都需要识别。
+`ActionSceneDetector` 为每一帧截图只识别一次，并在画面没有变化时沿用上一帧的结果。
+"""
+import logging
+from functools import cached_property
+
+from cv2.typing import MatLike
+from kotonebot.backend.core import Image
+from kotonebot.backend.image import (
+    TemplateMatchResult,
+    find as find_template,
+    find_all as find_all_templates,
+    find_multi as find_multi_templates,
+)
+
+from kaa.tasks import R
+from kaa.config import ProduceAction
+from kaa.util.frame_diff import FrameChangeDetector
+
+logger = logging.getLogger(__name__)
+
+SENSEI_TIP_Y2 = 0.30
+"""老师的推荐提示位于画面上方 30% 内"""
+
+SENSEI_TIPS = [
+    (R.InPurodyuusu.TextSenseiTipDance, ProduceAction.DANCE),
+    (R.InPurodyuusu.TextSenseiTipVocal, ProduceAction.VOCAL),
+    (R.InPurodyuusu.TextSenseiTipVisual, ProduceAction.VISUAL),
+    (R.InPurodyuusu.TextSenseiTipRest, ProduceAction.REST),
+    (R.InPurodyuusu.TextSenseiTipConsult, ProduceAction.CONSULT),
+]
+LESSON_BUTTONS = [
+    (R.InPurodyuusu.ButtonPracticeVocal, ProduceAction.VOCAL),
+    (R.InPurodyuusu.ButtonPracticeDance, ProduceAction.DANCE),
+    (R.InPurodyuusu.ButtonPracticeVisual, ProduceAction.VISUAL),
+]
+FINAL_LESSON_BUTTONS = [
+    (R.InPurodyuusu.ButtonFinalPracticeVocal, ProduceAction.VOCAL),
+    (R.InPurodyuusu.ButtonFinalPracticeDance, ProduceAction.DANCE),
+    (R.InPurodyuusu.ButtonFinalPracticeVisual, ProduceAction.VISUAL),
+]
+
+class ActionSceneFrame:
+    """
+    一帧行动场景截图的识别结果。
+    各项在第一次访问时识别，之后直接返回。
+    """
+    def __init__(self, img: MatLike):
+        self.img = img
+
+    @cached_property
+    def sensei_avatar(self) -> bool:
+        """是否有老师头像"""
+        return find_template(self.img, R.InPurodyuusu.IconAsariSenseiAvatar) is not None
+
+    @cached_property
+    def sensei_tip(self) -> ProduceAction | None:
+        """老师推荐的行动。没有推荐提示时为 None"""
+        top = self.img[:int(self.img.shape[0] * SENSEI_TIP_Y2)]
+        result = find_multi_templates(top, [template for template, _ in SENSEI_TIPS])
+        if result is None:
+            return None
+        return SENSEI_TIPS[result.index][1]
+
+    @cached_property
+    def has_lesson(self) -> bool:
+        """是否有课程（依据课程名称文字）"""
+        return find_multi_templates(self.img, [
+            R.InPurodyuusu.TextActionVocal,
+            R.InPurodyuusu.TextActionDance,
+            R.InPurodyuusu.TextActionVisual,
+        ]) is not None
+
+    @cached_property
+    def lesson_buttons(self) -> dict[ProduceAction, TemplateMatchResult]:
+        """普通周的课程按钮"""
+        return self.__find_buttons(LESSON_BUTTONS)
+
+    @cached_property
+    def final_lesson_buttons(self) -> dict[ProduceAction, TemplateMatchResult]:
+        """考试前一周（追い込みレッスン）的课程按钮"""
+        return self.__find_buttons(FINAL_LESSON_BUTTONS)
+
+    @cached_property
+    def sp_icons(self) -> list[TemplateMatchResult]:
+        """所有 SP 图标"""
+        return find_all_templates(self.img, R.InPurodyuusu.IconSp)
+
+    def __find_buttons(self, buttons: list[tuple[Image, ProduceAction]]) -> dict[ProduceAction, TemplateMatchResult]:
+        result = {}
+        for template, action in buttons:
+            if (found := find_template(self.img, template)) is not None:
+                result[action] = found
+        return result
+
+class ActionSceneDetector:
+    """
+    行动场景识别。
+
+    同一张截图只识别一次。画面相比上一帧没有变化时，沿用上一帧的识别结果。
+    """
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.__frame: ActionSceneFrame | None = None
+        # SP 图标等元素较小，缩小倍数与阈值都比默认值更严格
+        self.__gate = FrameChangeDetector(scale=4, ratio_threshold=0.0005)
+
+    def frame(self, img: MatLike) -> ActionSceneFrame:
+        """
+        获取截图的识别结果。
+
+        :param img: 截图。
+        """
+        if self.__frame is not None and self.__frame.img is img:
+            self.hits += 1
+            return self.__frame
+        changed = self.__gate.changed(img)
+        if self.__frame is not None and not changed:
+            self.hits += 1
+            return self.__frame
+        self.misses += 1
+        self.__frame = ActionSceneFrame(img)
+        return self.__frame
+
+    def clear(self) -> None:
+        """丢弃缓存的识别结果。"""
+        self.__frame = None
+        self.__gate.reset()
+
+action_scene_detector = ActionSceneDetector()
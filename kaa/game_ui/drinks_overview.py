@@ -1,5 +1,7 @@
 import logging
-from collections import deque
+import hashlib
+import threading
+from collections import OrderedDict
 
 import cv2
 import numpy as np
@@ -10,10 +12,25 @@ from kotonebot.primitives import RectTuple
 from kaa.tasks import R
 from kaa.util import paths
 from kaa.db.drink import Drink
-from kaa.image_db import ImageDatabase, HistDescriptor, FileDataSource
+from kaa.image_db import ImageDatabase, HistDescriptor, FileDataSource, LazyImageDatabase
 
 logger = logging.getLogger(__name__)
-_db: ImageDatabase | None = None
+
+# 饮品槽图像尺寸 -> 禁止泛洪填充传播的区域掩码
+_blocked_masks: dict[tuple[int, int], np.ndarray] = {}
+
+def _blocked_mask(h: int, w: int) -> np.ndarray:
+    """
+    右上角禁止传播的区域，因为一些饮料的管子会插到圈圈外面，导致白色泄露。
+    """
+    mask = _blocked_masks.get((h, w))
+    if mask is None:
+        right_top_x = w / 2
+        right_top_y = h / 4
+        ys, xs = np.mgrid[0:h, 0:w]
+        mask = (xs > right_top_x) & (ys < right_top_y)
+        _blocked_masks[(h, w)] = mask
+    return mask
 
 def preprocess_drink_slot_img(img: MatLike) -> MatLike:
     """预处理饮品图像，使得图像识别结果更正确
@@ -28,59 +45,40 @@ def preprocess_drink_slot_img(img: MatLike) -> MatLike:
     assert img.shape[2] == 3
     h, w, _ = img.shape
 
-    # 分通道
-    b, g, r = cv2.split(img)
-
     # 把 b==255 的像素修正为纯白
-    mask = (b >= BLUE_THRESHOLD)
-    g[mask] = 255
-    b[mask] = 255
-    r[mask] = 255
-    img = cv2.merge([b, g, r])
-
-    # BFS 把边缘连通区域染成纯白
-    visited = np.zeros((h, w), dtype=bool)
-    q = deque()
-
-    # 从边缘像素开始
-    for x in range(w):
-        q.append((0, x))
-        q.append((h - 1, x))
-    for y in range(h):
-        q.append((y, 0))
-        q.append((y, w - 1))
-    
-    # 右上角禁止传播，因为一些饮料的管子会插到圈圈外面，导致白色泄露
-    right_top_x = w / 2
-    right_top_y = h / 4
-
-    while q:
-        y, x = q.popleft()
-        if not (0 <= x < w and 0 <= y < h):
-            continue
-        if visited[y, x]:
-            continue
-        visited[y, x] = True
-
-        # 设置为白色
-        img[y, x] = [255, 255, 255]
-
-        # 四邻域扩展
-        for dy, dx in [(-1,0), (1,0), (0,-1), (0,1)]:
-            ny, nx = y + dy, x + dx
-            if 0 <= nx < w and 0 <= ny < h and not (nx > right_top_x and ny < right_top_y) and not visited[ny, nx] and not np.all(img[ny, nx] >= FLOOD_COLOR_THRESHOLD) and not (img[ny, nx][0] >= FLOOD_BLUE_THRESHOLD):
-                q.append((ny, nx))
+    img = img.copy()
+    img[img[:, :, 0] >= BLUE_THRESHOLD] = 255
+
+    # 把边缘连通区域染成纯白
+    # 可以传播的像素：不在禁止区域内、不是接近白色、蓝色通道不过高
+    passable = ~(
+        _blocked_mask(h, w)
+        | np.all(img >= FLOOD_COLOR_THRESHOLD, axis=2)
+        | (img[:, :, 0] >= FLOOD_BLUE_THRESHOLD)
+    )
+    # 边缘像素无论颜色如何都会被染白，并向四邻域传播。
+    # 因此与边缘或次边缘（边缘的四邻域）相接的可传播连通区域都会被染白。
+    _, labels = cv2.connectedComponents(passable.astype(np.uint8), connectivity=4)
+    seeds = np.zeros((h, w), dtype=bool)
+    seeds[:2, :] = seeds[-2:, :] = seeds[:, :2] = seeds[:, -2:] = True
+    seed_labels = np.unique(labels[seeds & passable])
+    filled = np.isin(labels, seed_labels) & passable
+    filled[0, :] = filled[-1, :] = filled[:, 0] = filled[:, -1] = True
+    img[filled] = 255
 
     return img
 
+def _create_drinks_db() -> ImageDatabase:
+    logger.info('Loading drinks database...')
+    path = paths.resource('drinks')
+    db_path = paths.cache('drinks')
+    return ImageDatabase(FileDataSource(str(path)), db_path, HistDescriptor(8), name='drinks')
+
+drinks_db_loader = LazyImageDatabase('drinks', _create_drinks_db)
+"""饮品数据库的延迟载入器。可调用 `warm_up()` 提前在后台载入。"""
+
 def drinks_db() -> ImageDatabase:
-    global _db
-    if _db is None:
-        logger.info('Loading drinks database...')
-        path = paths.resource('drinks')
-        db_path = paths.cache('drinks.pkl')
-        _db = ImageDatabase(FileDataSource(str(path)), db_path, HistDescriptor(8), name='drinks')
-    return _db
+    return drinks_db_loader.get()
 
 def match_first_drinks(img: MatLike, delta_threshold: float = 0.7) -> Drink | None:
     """
@@ -99,7 +97,7 @@ def match_first_drinks(img: MatLike, delta_threshold: float = 0.7) -> Drink | No
     # cv2.destroyAllWindows()
     
     db = drinks_db()
-    matches = db.match_all(img, threshold=114514)
+    matches = db.match_all(img, threshold=114514, top_k=3)
     if len(matches) == 0:
         return None
 
@@ -132,6 +130,72 @@ def match_first_drinks(img: MatLike, delta_threshold: float = 0.7) -> Drink | No
     )
     return drink
 
+class DrinkSlotCache:
+    """
+    饮品槽识别结果的 LRU 缓存。
+
+    以饮品槽截图的像素哈希为键，缓存 `match_first_drinks` 的结果（包括未匹配时的 None），
+    使得未发生变化的饮品槽无需重新预处理与匹配。
+    """
+    def __init__(self, max_size: int = 32):
+        """
+        :param max_size: 最多缓存的饮品槽数量。
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.__items: OrderedDict[bytes, Drink | None] = OrderedDict()
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def key(img: MatLike) -> bytes:
+        """计算饮品槽图像的哈希。"""
+        img = np.ascontiguousarray(img)
+        h = hashlib.blake2b(digest_size=16)
+        h.update(repr(img.shape).encode())
+        h.update(img.data)
+        return h.digest()
+
+    def match(self, img: MatLike) -> Drink | None:
+        """
+        识别饮品槽中的饮品。命中缓存时直接返回缓存结果。
+
+        :param img: 饮品槽图像，格式与 `match_first_drinks` 相同。
+        """
+        key = self.key(img)
+        with self.__lock:
+            if key in self.__items:
+                self.__items.move_to_end(key)
+                self.hits += 1
+                return self.__items[key]
+            self.misses += 1
+        drink = match_first_drinks(img)
+        with self.__lock:
+            self.__items[key] = drink
+            self.__items.move_to_end(key)
+            while len(self.__items) > self.max_size:
+                self.__items.popitem(last=False)
+        return drink
+
+    @property
+    def hit_rate(self) -> float:
+        """缓存命中率。尚无查询时为 0。"""
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0
+
+    def clear(self) -> None:
+        """清空缓存与统计。"""
+        with self.__lock:
+            self.__items.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.__items)
+
+drink_slot_cache = DrinkSlotCache()
+"""饮品槽识别结果缓存。"""
+
 @action('定位考试中出现的所有饮品', screenshot_mode='manual')
 def locate_all_drinks_in_3_drink_slots(img: MatLike) -> list[tuple[Drink, RectTuple]]:
     """
@@ -153,11 +217,15 @@ def locate_all_drinks_in_3_drink_slots(img: MatLike) -> list[tuple[Drink, RectTu
         x, y, w, h = rect
         img_slot = img[y:y+h, x:x+w]
 
-        drink = match_first_drinks(img_slot)
+        drink = drink_slot_cache.match(img_slot)
 
         if drink is not None:
             results.append((drink, rect))
 
+    logger.debug(
+        'Drink slot cache: %d hits, %d misses, hit rate %.1f%%.',
+        drink_slot_cache.hits, drink_slot_cache.misses, drink_slot_cache.hit_rate * 100
+    )
     return results
 
 if __name__ == '__main__':
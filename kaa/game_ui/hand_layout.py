@@ -0,0 +1,188 @@
+"""
+培育中手牌的布局识别。
+
+每张技能卡底部中央都有一个表示卡片类型的字母（A/M/T）。
+识别出所有字母的位置，即可得到手牌数量与各张卡片的位置，
+不再依赖按手牌数量硬编码的坐标表。
+"""
+import logging
+from typing import NamedTuple
+
+import cv2
+import numpy as np
+from cv2.typing import MatLike
+from kotonebot.primitives import RectTuple
+
+from kaa.tasks import R
+from kaa.util.frame_diff import FrameChangeDetector
+
+logger = logging.getLogger(__name__)
+
+# 以下坐标均基于 720x1280
+BASE_WIDTH = 720
+CARD_SIZE = (192, 252) # 卡片大小 w, h
+CARD_Y = 883 # 卡片 Y 坐标
+CARD_LETTER_OFFSET_Y = 207 # 卡片顶部到字母中心的距离
+HAND_CENTER_X = 360 # 手牌整体的水平中心
+HAND_MAX_WIDTH = 688 # 手牌整体的最大宽度。超出时卡片会相互重叠
+CARD_GAP_X = 25 # 手牌不重叠时卡片之间的间隔
+LETTER_THRESHOLD = 0.8
+
+CARD_LETTER_TEMPLATES = [
+    R.InPurodyuusu.A,
+    R.InPurodyuusu.M,
+    R.InPurodyuusu.T,
+]
+
+class HandLayout(NamedTuple):
+    cards: tuple[RectTuple, ...]
+    """各张手牌的位置 (x, y, w, h)，从左到右排列"""
+
+    @property
+    def count(self) -> int:
+        """手牌数量"""
+        return len(self.cards)
+
+def expected_layout(card_count: int, scale: float = 1) -> HandLayout:
+    """
+    按游戏的排列规则计算手牌位置。
+    手牌居中排列，总宽度超过上限时压缩间距，使卡片相互重叠。
+
+    :param card_count: 手牌数量。
+    :param scale: 截图宽度与 720 的比值。
+    """
+    if card_count < 1:
+        raise ValueError(f'不支持 {card_count} 张手牌')
+    w, h = CARD_SIZE
+    step = float(w + CARD_GAP_X)
+    if card_count > 1:
+        step = min(step, (HAND_MAX_WIDTH - w) / (card_count - 1))
+    start = HAND_CENTER_X - (step * (card_count - 1) + w) / 2
+    return HandLayout(tuple(
+        (round((start + step * i) * scale), round(CARD_Y * scale), round(w * scale), round(h * scale))
+        for i in range(card_count)
+    ))
+
+def _letter_score_map(strip: MatLike, templates: list[MatLike]) -> np.ndarray:
+    """
+    在字母横条上匹配所有字母模板，合并为一张分数图。
+    分数图的每个像素对应以该像素为中心的匹配分数，取各模板中的最大值。
+    """
+    h, w = strip.shape[:2]
+    scores = np.full((h, w), -1, dtype=np.float32)
+    for template in templates:
+        th, tw = template.shape[:2]
+        if th > h or tw > w:
+            continue
+        result = cv2.matchTemplate(strip, template, cv2.TM_CCOEFF_NORMED)
+        view = scores[th // 2:th // 2 + result.shape[0], tw // 2:tw // 2 + result.shape[1]]
+        np.maximum(view, result, out=view)
+    return scores
+
+def find_card_letters(
+    strip: MatLike,
+    templates: list[MatLike],
+    threshold: float = LETTER_THRESHOLD,
+) -> list[tuple[int, int]]:
+    """
+    识别字母横条中所有字母的中心位置。
+
+    :param strip: 字母横条图像。
+    :param templates: 字母模板，需已缩放到与截图相同的比例。
+    :param threshold: 匹配阈值。
+    :return: 字母中心坐标 (x, y) 列表，从左到右排列。坐标相对于横条。
+    """
+    scores = _letter_score_map(strip, templates)
+    # 每一列只保留最高分，在一维上寻找局部最大值
+    profile = scores.max(axis=0)
+    rows = scores.argmax(axis=0)
+    radius = max(t.shape[1] for t in templates)
+    dilated = cv2.dilate(profile[np.newaxis], np.ones((1, radius * 2 + 1), dtype=np.uint8))[0]
+    peaks = np.flatnonzero((profile >= threshold) & (profile >= dilated))
+    result: list[tuple[int, int]] = []
+    for x in peaks:
+        # 分数相同的相邻像素只保留第一个
+        if result and x - result[-1][0] <= radius:
+            continue
+        result.append((int(x), int(rows[x])))
+    return result
+
+class HandLayoutDetector:
+    """
+    手牌布局识别。
+
+    只有字母所在横条的像素发生变化时，才会重新识别。
+    识别到的布局按手牌数量缓存，供无法从画面识别时使用。
+    """
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.__layout: HandLayout | None = None
+        self.__by_count: dict[int, HandLayout] = {}
+        self.__scale: float = 1
+        self.__templates: dict[float, list[MatLike]] = {}
+        # 字母横条很窄，不缩小
+        self.__strip_gate = FrameChangeDetector(scale=1, ratio_threshold=0.005)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0
+
+    def __scaled_templates(self, scale: float) -> list[MatLike]:
+        if scale not in self.__templates:
+            templates = [t.data for t in CARD_LETTER_TEMPLATES]
+            if scale != 1:
+                templates = [
+                    cv2.resize(t, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+                    for t in templates
+                ]
+            self.__templates[scale] = templates
+        return self.__templates[scale]
+
+    def detect(self, img: MatLike) -> HandLayout:
+        """
+        识别截图中的手牌布局。
+
+        :param img: 截图。
+        """
+        scale = img.shape[1] / BASE_WIDTH
+        x, y, w, h = (round(v * scale) for v in R.InPurodyuusu.BoxCardLetter.xywh)
+        strip = img[y:y+h, x:x+w]
+        if not self.__strip_gate.changed(strip) and self.__layout is not None:
+            self.hits += 1
+            return self.__layout
+        self.misses += 1
+        if scale != self.__scale:
+            self.__by_count.clear()
+            self.__scale = scale
+        letters = find_card_letters(strip, self.__scaled_templates(scale))
+        card_w, card_h = round(CARD_SIZE[0] * scale), round(CARD_SIZE[1] * scale)
+        offset_y = round(CARD_LETTER_OFFSET_Y * scale)
+        layout = HandLayout(tuple(
+            (x + cx - card_w // 2, y + cy - offset_y, card_w, card_h)
+            for cx, cy in letters
+        ))
+        if layout.count > 0:
+            self.__by_count[layout.count] = layout
+        self.__layout = layout
+        logger.info("Current skill card count: %d", layout.count)
+        return layout
+
+    def layout_for(self, card_count: int) -> HandLayout:
+        """
+        获取指定手牌数量的布局。
+        优先使用此前识别到的同数量布局，否则按排列规则计算。
+
+        :param card_count: 手牌数量。
+        """
+        if card_count in self.__by_count:
+            return self.__by_count[card_count]
+        return expected_layout(card_count, self.__scale)
+
+    def clear(self) -> None:
+        self.__layout = None
+        self.__by_count.clear()
+        self.__strip_gate.reset()
+
+hand_layout_detector = HandLayoutDetector()
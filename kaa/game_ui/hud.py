@@ -0,0 +1,129 @@
+"""
+培育中固定 HUD 区域的文字识别。
+
+这些文字的位置与字形都是固定的，优先使用模板匹配。
+只有模板匹配分数处于临界区间时才回退到 OCR，
+分数明显偏低（画面中没有此文字）时直接返回，不调用 OCR。
+"""
+import logging
+from dataclasses import dataclass
+
+from cv2.typing import MatLike
+from kotonebot import contains
+from kotonebot.backend.core import Image, HintBox
+from kotonebot.backend.ocr import jp
+from kotonebot.backend.image import find as find_template
+from kotonebot.backend.context import ContextStackVars
+
+from kaa.tasks import R
+from .common import WhiteFilter
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_THRESHOLD = 0.8
+"""模板匹配分数不低于此值时视为命中"""
+OCR_FALLBACK_MIN_SCORE = 0.5
+"""
+模板匹配分数不低于此值（但未命中）时回退到 OCR。
+
+在资源截图中，命中的分数不低于 0.87，不含此文字的画面不高于 0.33。
+"""
+
+@dataclass
+class HudTextStats:
+    template_hits: int = 0
+    """模板匹配命中次数"""
+    ocr_hits: int = 0
+    """模板未命中、OCR 命中的次数"""
+    ocr_misses: int = 0
+    """模板分数处于临界区间、OCR 也未命中的次数"""
+    misses: int = 0
+    """模板分数过低，不调用 OCR 直接判定为未命中的次数"""
+
+class HudText:
+    """固定位置的 HUD 文字。"""
+    def __init__(self, text: str, template: Image, rect: HintBox):
+        """
+        :param text: 文字内容，用于 OCR 回退。
+        :param template: 文字的模板图像。
+        :param rect: 文字所在区域。
+        """
+        self.text = text
+        self.template = template
+        self.rect = rect
+        self.stats = HudTextStats()
+        self.__preprocessors = [WhiteFilter()]
+
+    def score(self, img: MatLike) -> float:
+        """
+        模板匹配分数。
+
+        :return: 最高分数。低于 `OCR_FALLBACK_MIN_SCORE` 时返回 0。
+        """
+        result = find_template(
+            img,
+            self.template,
+            rect=self.rect,
+            threshold=OCR_FALLBACK_MIN_SCORE,
+            preprocessors=self.__preprocessors,
+        )
+        return result.score if result is not None else 0
+
+    def find_template(self, img: MatLike) -> bool:
+        """仅使用模板匹配识别。"""
+        return self.score(img) >= TEMPLATE_THRESHOLD
+
+    def find_ocr(self, img: MatLike) -> bool:
+        """仅使用 OCR 识别。"""
+        return jp().find(img, contains(self.text), rect=self.rect) is not None
+
+    def find(self, img: MatLike | None = None) -> bool:
+        """
+        识别图像中是否存在此文字。模板匹配分数处于临界区间时回退到 OCR。
+
+        :param img: 图像。为 None 时使用当前上下文中的截图（不会重新截图）。
+        """
+        if img is None:
+            img = ContextStackVars.ensure_current().screenshot
+        score = self.score(img)
+        if score >= TEMPLATE_THRESHOLD:
+            self.stats.template_hits += 1
+            return True
+        if score < OCR_FALLBACK_MIN_SCORE:
+            self.stats.misses += 1
+            return False
+        if self.find_ocr(img):
+            self.stats.ocr_hits += 1
+            logger.debug('HUD text "%s" found by OCR fallback. score=%.3f', self.text, score)
+            return True
+        self.stats.ocr_misses += 1
+        return False
+
+NoSkillCardText = HudText('0枚', R.InPurodyuusu.TextNoSkillCard, R.InPurodyuusu.BoxNoSkillCard)
+"""「手札のスキルカードが0枚です」中的「0枚」"""
+ExamRemainingTurnsText = HudText('残りターン', R.InPurodyuusu.TextExamRemainingTurns, R.InPurodyuusu.BoxExamTop)
+"""考试场景左上角的「残りターン」"""
+
+if __name__ == '__main__':
+    import time
+    from kotonebot.backend.core import cv2_imread
+
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s')
+    # 对比模板匹配、RapidOCR 与 find()（含 OCR 回退）的单次调用耗时
+    ROUNDS = 50
+    SCREENSHOTS = 'kotonebot-resource/sprites/jp/in_purodyuusu/'
+    cases = [
+        (NoSkillCardText, 'screenshot_lesson_no_card.png', True),
+        (NoSkillCardText, 'screenshot_5_cards.png', False),
+        (ExamRemainingTurnsText, 'produce_exam_1.png', True),
+        (ExamRemainingTurnsText, 'screenshot_5_cards.png', False),
+    ]
+    for hud, screenshot, expected in cases:
+        img = cv2_imread(SCREENSHOTS + screenshot)
+        for name, func in [('template', hud.find_template), ('ocr', hud.find_ocr), ('find', hud.find)]:
+            func(img) # 预热
+            start = time.perf_counter()
+            for _ in range(ROUNDS):
+                result = func(img)
+            cost = (time.perf_counter() - start) / ROUNDS * 1000
+            print(f'{hud.text}\t{screenshot}\t{name}\t{cost:.2f}ms\tresult={result}\texpected={expected}')
@@ -11,11 +11,10 @@ from kotonebot.primitives import RectTuple, Rect
 from kaa.game_ui import Scrollable
 from kotonebot import device, action
 from kotonebot.util import cv2_imread
-from kaa.image_db import ImageDatabase, HistDescriptor, FileDataSource, DatabaseQueryResult
+from kaa.image_db import ImageDatabase, HistDescriptor, FileDataSource, LazyImageDatabase, DatabaseQueryResult
 from kotonebot.backend.preprocessor import HsvColorsRemover
 
 logger = logging.getLogger(__name__)
-_db: ImageDatabase | None = None
 
 # OpenCV HSV 颜色范围
 RED_DOT = ((157, 205, 255), (179, 255, 255)) # 红点
@@ -98,14 +97,17 @@ def draw_idol_preview(img: MatLike, rects: list[RectTuple], db: ImageDatabase, i
                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
     return preview_img
 
+def _create_idols_db() -> ImageDatabase:
+    logger.info('Loading idols database...')
+    path = paths.resource('idol_cards')
+    db_path = paths.cache('idols')
+    return ImageDatabase(FileDataSource(str(path)), db_path, HistDescriptor(8), name='idols')
+
+idols_db_loader = LazyImageDatabase('idols', _create_idols_db)
+"""偶像数据库的延迟载入器。可调用 `warm_up()` 提前在后台载入。"""
+
 def idols_db() -> ImageDatabase:
-    global _db
-    if _db is None:
-        logger.info('Loading idols database...')
-        path = paths.resource('idol_cards')
-        db_path = paths.cache('idols.pkl')
-        _db = ImageDatabase(FileDataSource(str(path)), db_path, HistDescriptor(8), name='idols')
-    return _db
+    return idols_db_loader.get()
 
 def match_idol(skin_id: str, idol_img: MatLike) -> DatabaseQueryResult | None:
     """
@@ -4,10 +4,12 @@ from dataclasses import dataclass
 from cv2.typing import MatLike
 
 from kotonebot.primitives import Rect
-from kotonebot import ocr, device, image, action
+from kotonebot import ocr, device, action
 from kotonebot.backend.core import HintBox
+from kotonebot.backend.image import TemplateNoMatchError
 from kaa.config import ProduceAction
-from kaa.tasks import R
+from kaa.util.ocr_batch import ocr_regions
+from kaa.game_ui.action_scene import ActionSceneFrame, action_scene_detector, LESSON_BUTTONS
 
 logger = logging.getLogger(__name__)
 
@@ -49,13 +51,7 @@ class Schedule:
         判断是否有课程，依据是课程的名字的图片
         TODO: NIA 课程的名字的图片没放到这里，后续若要支持NIA需要添加对应的图片
         """
-        device.screenshot()
-        result = image.find_multi([
-            R.InPurodyuusu.TextActionVocal,
-            R.InPurodyuusu.TextActionDance,
-            R.InPurodyuusu.TextActionVisual,
-        ])
-        return result is not None
+        return action_scene_detector.frame(device.screenshot()).has_lesson
 
     @action('识别日程，课程抉择，', screenshot_mode='manual-inherit')
     def select_lesson(self) -> Lesson:
@@ -96,11 +92,20 @@ class Schedule:
         :return: 课程数据列表
         """
         img = device.screenshot()
-        sp_list = image.find_all(R.InPurodyuusu.IconSp)
+        scene = action_scene_detector.frame(img)
+        if len(scene.lesson_buttons) < 3:
+            # 缓存的结果可能来自按钮尚未完全显示的画面，在当前截图上重新识别
+            scene = ActionSceneFrame(img)
+        sp_list = scene.sp_icons
         vo_sp = da_sp = vi_sp = False
-        vo = image.expect(R.InPurodyuusu.ButtonPracticeVocal)
-        da = image.expect(R.InPurodyuusu.ButtonPracticeDance)
-        vi = image.expect(R.InPurodyuusu.ButtonPracticeVisual)
+        buttons = scene.lesson_buttons
+        for template, lesson_action in LESSON_BUTTONS:
+            # 与 image.expect 相同，找不到课程按钮时抛出异常
+            if lesson_action not in buttons:
+                raise TemplateNoMatchError(img, template)
+        vo = buttons[ProduceAction.VOCAL]
+        da = buttons[ProduceAction.DANCE]
+        vi = buttons[ProduceAction.VISUAL]
         for cur_sp in sp_list:
             if cur_sp.position[0] < vo.position[0]:
                 vo_sp = True
@@ -108,11 +113,12 @@ class Schedule:
                 da_sp = True
             elif da.position[0] < cur_sp.position[0] < vi.position[0]:
                 vi_sp = True
-        max_value = self.read_number(img, MaxDaValue)
+        # 四个数值一次识别完
+        cur_vo, cur_da, cur_vi, max_value = self.read_numbers(img, [CurVoValue, CurDaValue, CurViValue, MaxDaValue])
         lesson_data = [
-            Lesson(vo.rect, vo_sp, ProduceAction.VOCAL, self.read_number(img, CurVoValue), max_value),
-            Lesson(da.rect, da_sp, ProduceAction.DANCE, self.read_number(img, CurDaValue), max_value),
-            Lesson(vi.rect, vi_sp, ProduceAction.VISUAL, self.read_number(img, CurViValue), max_value),
+            Lesson(vo.rect, vo_sp, ProduceAction.VOCAL, cur_vo, max_value),
+            Lesson(da.rect, da_sp, ProduceAction.DANCE, cur_da, max_value),
+            Lesson(vi.rect, vi_sp, ProduceAction.VISUAL, cur_vi, max_value),
         ]
         for lesson in lesson_data:
             logger.info(f'Lesson: {lesson}')
@@ -124,28 +130,11 @@ class Schedule:
         读取老师的推荐行动
         :return: 当前推荐行动，如果没推荐行动，返回 RECOMMENDED
         """
-        device.screenshot()
-        if image.find(R.InPurodyuusu.IconAsariSenseiAvatar):
+        scene = action_scene_detector.frame(device.screenshot())
+        if scene.sensei_avatar:
             logger.debug('Retrieving recommended lesson...')
-            result = image.find_multi([
-                R.InPurodyuusu.TextSenseiTipVocal,
-                R.InPurodyuusu.TextSenseiTipDance,
-                R.InPurodyuusu.TextSenseiTipVisual,
-                R.InPurodyuusu.TextSenseiTipRest,
-                R.InPurodyuusu.TextSenseiTipConsult,
-            ])
-            if result:
-                match result.index:
-                    case 0:
-                        return ProduceAction.VOCAL
-                    case 1:
-                        return ProduceAction.DANCE
-                    case 2:
-                        return ProduceAction.VISUAL
-                    case 3:
-                        return ProduceAction.REST
-                    case 4:
-                        return ProduceAction.CONSULT
+            if (tip := scene.sensei_tip) is not None:
+                return tip
         return ProduceAction.RECOMMENDED
 
     def read_number(self, img: MatLike, box: HintBox) -> int:
@@ -160,3 +149,17 @@ class Schedule:
             return int(all_number[0])
         else:
             return 0
+
+    def read_numbers(self, img: MatLike, boxes: list[HintBox]) -> list[int]:
+        """
+        一次 OCR 读取多个范围内的数值。
+
+        :param img: MatLike 图像
+        :param boxes: HintBox 列表 需要读取数值的范围
+        :return: list[int] 与 boxes 一一对应的数值，读取失败的为0
+        """
+        values = []
+        for result in ocr_regions(ocr.raw(), img, list(boxes)):
+            all_number = result.squash().numbers()
+            values.append(int(all_number[0]) if all_number else 0)
+        return values
@@ -1,4 +1,5 @@
 from .db import ImageDatabase, Db, DatabaseQueryResult, FileDataSource, DataSource
 from .descriptors import HistDescriptor
+from .lazy import LazyImageDatabase, LoadStatus
 
-__all__ = ['ImageDatabase', 'Db', 'DatabaseQueryResult', 'HistDescriptor', 'FileDataSource', 'DataSource']
+__all__ = ['ImageDatabase', 'Db', 'DatabaseQueryResult', 'HistDescriptor', 'FileDataSource', 'DataSource', 'LazyImageDatabase', 'LoadStatus']
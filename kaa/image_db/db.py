@@ -1,8 +1,10 @@
 import os
-import pickle
+import json
+import hashlib
 import logging
-from dataclasses import dataclass
-from typing import Any, NamedTuple, Protocol, Iterator
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, NamedTuple, Protocol, Iterator
 
 import cv2
 import numpy as np
@@ -13,7 +15,31 @@ from kotonebot.backend.core import cv2_imread
 
 logger = logging.getLogger(__name__)
 
-DATABASE_INTERNAL_VERSION = 0
+DATABASE_INTERNAL_VERSION = 1
+"""
+数据库内部版本号。
+
+* 0：pickle 格式
+* 1：`.npy` 特征矩阵 + `.json` 清单
+"""
+MAX_WORKERS = 8
+"""并行计算特征时的默认最大线程数"""
+PARALLEL_THRESHOLD = 16
+"""待计算的图片数量少于此值时不使用线程池"""
+
+ProgressCallback = Callable[[int, int], None]
+"""建库进度回调。参数依次为已完成数量、总数量。"""
+
+class FileRecord(NamedTuple):
+    """数据库中一条记录对应的源文件信息"""
+    file: str
+    """文件名"""
+    size: int
+    """文件大小（字节）"""
+    mtime_ns: int
+    """修改时间（纳秒）"""
+    hash: str
+    """文件内容的 SHA-1"""
 
 @dataclass
 class Db:
@@ -24,14 +50,74 @@ class Db:
     """保留字段"""
     name: str | None
     """数据库名称"""
-    data: dict[str, Any]
-    """数据"""
+    keys: list[str] = field(default_factory=list)
+    """所有记录的 key，与 `features` 的行一一对应"""
+    features: np.ndarray = field(default_factory=lambda: np.empty((0, 0), dtype=np.float32))
+    """
+    (N, D) 的 float32 特征矩阵。
+
+    从磁盘载入时为只读的内存映射，第一次修改时才会复制到内存中。
+    """
+    files: dict[str, FileRecord] = field(default_factory=dict)
+    """key 到源文件信息的映射。只包含来自 `FileDataSource` 的记录。"""
+
+    def __post_init__(self):
+        self.__key_index = {key: i for i, key in enumerate(self.keys)}
+        self.__pending: dict[str, np.ndarray] = {}
 
     def insert(self, key: str, value: Any):
-        self.data[key] = value
+        self.__pending[key] = np.asarray(value, dtype=np.float32).ravel()
+
+    def remove(self, key: str):
+        self.__pending.pop(key, None)
+        self.files.pop(key, None)
+        if key in self.__key_index:
+            keep = np.ones(len(self.keys), dtype=bool)
+            keep[self.__key_index[key]] = False
+            self.keys = [k for k, kept in zip(self.keys, keep) if kept]
+            self.features = self.features[keep]
+            self.__key_index = {k: i for i, k in enumerate(self.keys)}
+
+    def clear(self):
+        self.keys = []
+        self.features = np.empty((0, 0), dtype=np.float32)
+        self.files.clear()
+        self.__key_index.clear()
+        self.__pending.clear()
+
+    def compact(self):
+        """将新插入的记录合并到特征矩阵中。"""
+        if not self.__pending:
+            return
+        new_keys = [key for key in self.__pending if key not in self.__key_index]
+        replaced = [key for key in self.__pending if key in self.__key_index]
+        rows = [self.__pending[key] for key in new_keys]
+        if len(self.keys) == 0:
+            features = np.stack(rows)
+        else:
+            # np.array 会把只读的内存映射复制为可写数组
+            features = np.array(self.features, dtype=np.float32)
+            for key in replaced:
+                features[self.__key_index[key]] = self.__pending[key]
+            if rows:
+                features = np.concatenate([features, np.stack(rows)])
+        for key in new_keys:
+            self.__key_index[key] = len(self.keys)
+            self.keys.append(key)
+        self.features = features
+        self.__pending.clear()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__key_index or key in self.__pending
+
+    @property
+    def data(self) -> dict[str, np.ndarray]:
+        """key 到特征向量的映射。"""
+        self.compact()
+        return dict(zip(self.keys, self.features))
 
     def count(self):
-        return len(self.data)
+        return len(self.__key_index) + len([k for k in self.__pending if k not in self.__key_index])
 
 class DataSource(Protocol):
     def __iter__(self) -> Iterator[tuple[str, Any]]:
@@ -42,11 +128,19 @@ class FileDataSource(DataSource):
         self.path = os.path.abspath(folder_path)
         self.keep_ext = keep_ext
 
-    def __iter__(self) -> Iterator[tuple[str, Any]]:
+    def files(self) -> Iterator[tuple[str, str]]:
+        """
+        列出数据源中的所有文件，但不读取图片。
+
+        :return: `(key, 文件路径)` 的迭代器。
+        """
         for file in os.listdir(self.path):
-            if not self.keep_ext:
-                file = os.path.splitext(file)[0]
-            yield file, cv2_imread(os.path.join(self.path, file))
+            key = file if self.keep_ext else os.path.splitext(file)[0]
+            yield key, os.path.join(self.path, file)
+
+    def __iter__(self) -> Iterator[tuple[str, Any]]:
+        for key, path in self.files():
+            yield key, cv2_imread(path)
 
 class DatabaseQueryResult(NamedTuple):
     key: str
@@ -57,7 +151,92 @@ class DatabaseQueryResult(NamedTuple):
         return f'DatabaseQueryResult(key={self.key}, distance={self.distance})'
 
 def chi2_distance(hist1: np.ndarray, hist2: np.ndarray, eps=1e-10):
-    return 0.5 * np.sum((hist1 - hist2) ** 2 / (hist1 + hist2 + eps))
+    """
+    计算卡方距离。
+
+    支持广播：若 `hist2` 为 (N, D) 的特征矩阵，则一次性计算
+    `hist1` 与每一行的距离，返回长度为 N 的数组。
+    """
+    return 0.5 * np.sum((hist1 - hist2) ** 2 / (hist1 + hist2 + eps), axis=-1)
+
+def _load_image(image: MatLike | str | bytes) -> MatLike:
+    """将图片路径、编码后的图片数据或 MatLike 统一为 BGR MatLike。"""
+    if isinstance(image, str):
+        return cv2_imread(image)
+    if isinstance(image, bytes):
+        return cv2.imdecode(np.frombuffer(image, dtype=np.uint8), cv2.IMREAD_COLOR)
+    return image
+
+def _manifest_path(db_path: str) -> str:
+    return db_path + '.json'
+
+def _features_path(db_path: str) -> str:
+    return db_path + '.npy'
+
+def load_db(db_path: str) -> Db | None:
+    """
+    从磁盘载入数据库。特征矩阵以只读内存映射方式打开，不会复制。
+
+    :param db_path: 数据库路径（不含扩展名）。
+    :return: 数据库。若文件不存在或已损坏，返回 None。
+    """
+    manifest_path = _manifest_path(db_path)
+    features_path = _features_path(db_path)
+    if not os.path.exists(manifest_path) or not os.path.exists(features_path):
+        return None
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    keys: list[str] = manifest['keys']
+    if len(keys) > 0:
+        features = np.load(features_path, mmap_mode='r')
+    else:
+        features = np.empty((0, 0), dtype=np.float32)
+    if features.ndim != 2 or features.shape[0] != len(keys) or features.dtype != np.float32:
+        raise ValueError(f'Feature matrix shape {features.shape} mismatches manifest ({len(keys)} keys).')
+    files = {key: FileRecord(**record) for key, record in manifest['files'].items()}
+    return Db(
+        internal_version=manifest['internal_version'],
+        version=manifest.get('version'),
+        name=manifest.get('name'),
+        keys=keys,
+        features=features,
+        files=files,
+    )
+
+def save_db(db: Db, db_path: str):
+    """
+    将数据库保存到磁盘。
+
+    :param db: 数据库。
+    :param db_path: 数据库路径（不含扩展名）。
+    """
+    db.compact()
+    manifest = {
+        'internal_version': db.internal_version,
+        'version': db.version,
+        'name': db.name,
+        'shape': list(db.features.shape),
+        'keys': db.keys,
+        'files': {key: record._asdict() for key, record in db.files.items()},
+    }
+    # 先写临时文件再替换，避免中途退出导致文件损坏。
+    # 先写特征矩阵、后写清单，两者不一致时 load_db 会拒绝载入。
+    features_path = _features_path(db_path)
+    # 特征矩阵仍是该文件的内存映射时说明没有变化，只需更新清单
+    unchanged = (
+        isinstance(db.features, np.memmap)
+        and db.features.filename is not None
+        and os.path.exists(features_path)
+        and os.path.samefile(db.features.filename, features_path)
+    )
+    if not unchanged:
+        with open(features_path + '.tmp', 'wb') as f:
+            np.save(f, np.ascontiguousarray(db.features, dtype=np.float32))
+        os.replace(features_path + '.tmp', features_path)
+    manifest_path = _manifest_path(db_path)
+    with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(manifest_path + '.tmp', manifest_path)
 
 class ImageDatabase:
     def __init__(
@@ -66,50 +245,155 @@ class ImageDatabase:
             db_path: str,
             descriptor: HistDescriptor,
             *,
-            name: str | None = None
+            name: str | None = None,
+            workers: int | None = None,
+            progress: ProgressCallback | None = None
         ):
+        """
+        :param source: 数据源。
+        :param db_path: 数据库缓存路径（不含扩展名）。
+            实际会生成 `{db_path}.npy` 与 `{db_path}.json` 两个文件。
+        :param descriptor: 特征描述器。
+        :param name: 数据库名称。
+        :param workers: 批量计算特征时使用的线程数。
+            默认为 CPU 核心数，最多 `MAX_WORKERS`。为 1 时不使用线程池。
+        :param progress: 批量计算特征时的进度回调。
+        """
         self.db_path = db_path
         self.__db: Db | None = None
+        self.__modified = False
         self.descriptor = descriptor
         self.source = source
+        self.workers = workers
+        self.progress = progress
 
         # 载入数据库
         logger.info('Loading database from %s...', db_path)
-        if os.path.exists(db_path):
-            try:
-                with open(db_path, 'rb') as f:
-                    self.__db = pickle.load(f)
+        try:
+            self.__db = load_db(db_path)
+            if self.__db is not None:
                 logger.info('Database loaded. Name=%s, version=%s, count=%d', self.db.name, self.db.version, self.db.count())
-            except Exception as e:
-                logger.warning('Failed to load database from %s: %s', db_path, e)
-                self.__db = None
+        except Exception as e:
+            logger.warning('Failed to load database from %s: %s', db_path, e)
+            self.__db = None
         if self.__db is None:
-            self.__db = Db(DATABASE_INTERNAL_VERSION, None, name, {})
-        
+            self.__db = Db(DATABASE_INTERNAL_VERSION, None, name)
+            self.__modified = True
+
         # 检查版本
         if self.db.internal_version != DATABASE_INTERNAL_VERSION:
             logger.info('Database internal version is %d, expected %d. Clearing database...', self.db.internal_version, DATABASE_INTERNAL_VERSION)
-            self.db.data.clear()
+            self.db.clear()
             self.db.internal_version = DATABASE_INTERNAL_VERSION
-        
+            self.__modified = True
+
         # 载入数据源
         logger.debug('Loading data source...')
-        for key, value in self.source:
+        if isinstance(self.source, FileDataSource):
+            self.__sync_files(self.source)
+        else:
+            self.__insert_described([
+                (key, value) for key, value in self.source if key not in self.db
+            ])
+        if self.__modified:
+            self.save()
+
+    def __describe_many(self, items: list[tuple[str, MatLike | str | bytes]]) -> list[tuple[str, np.ndarray]]:
+        """
+        批量解码图片并计算特征。
+
+        图片数量较多时在线程池中并行计算（OpenCV 与 NumPy 的运算会释放 GIL），
+        返回结果的顺序始终与 `items` 一致。
+
+        :param items: `(key, 图片)` 列表。图片可以是路径、编码后的图片数据或 MatLike。
+        :return: `(key, 特征)` 列表。
+        """
+        total = len(items)
+        if total == 0:
+            return []
+
+        def describe(item: tuple[str, MatLike | str | bytes]):
+            key, image = item
             try:
-                self.insert(key, value)
+                return key, self.descriptor(_load_image(image)), None
             except Exception as e:
-                logger.error(
-                    "\n"
-                    "Error inserting key: %s\n"
-                    "Error message: %s\n"
-                    "资源可能损坏，请检查并删除 `kaa/resources/idol_cards` 下的损坏文件，"
-                    "然后重新执行 `tools/db/extract_resources.py`",
-                    key,
-                    str(e).strip()
-                )
-                raise # 继续抛异常，让程序崩溃
-        self.save()
-        
+                return key, None, e
+
+        workers = self.workers if self.workers is not None else min(os.cpu_count() or 1, MAX_WORKERS)
+        executor = None
+        if workers > 1 and total >= PARALLEL_THRESHOLD:
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ImageDatabaseWorker')
+            iterator = executor.map(describe, items)
+        else:
+            iterator = map(describe, items)
+        logger.info('Describing %d images with %d worker(s)...', total, workers if executor else 1)
+        log_step = max(1, total // 10)
+        results = list[tuple[str, np.ndarray]]()
+        try:
+            for done, (key, feature, error) in enumerate(iterator, 1):
+                if error is not None:
+                    logger.error(
+                        "\n"
+                        "Error inserting key: %s\n"
+                        "Error message: %s\n"
+                        "资源可能损坏，请检查并删除 `kaa/resources/idol_cards` 下的损坏文件，"
+                        "然后重新执行 `tools/db/extract_resources.py`",
+                        key,
+                        str(error).strip()
+                    )
+                    raise error # 继续抛异常，让程序崩溃
+                results.append((key, feature))
+                if self.progress is not None:
+                    self.progress(done, total)
+                if done % log_step == 0 or done == total:
+                    logger.info('Describing images: %d/%d', done, total)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+        return results
+
+    def __insert_described(self, items: list[tuple[str, MatLike | str | bytes]]):
+        """批量计算特征并按顺序插入，已存在的记录会被覆盖。"""
+        for key, feature in self.__describe_many(items):
+            self.db.insert(key, feature)
+            self.__modified = True
+            logger.debug('Inserted image: %s', key)
+
+    def __sync_files(self, source: FileDataSource):
+        """
+        增量同步文件数据源。
+
+        大小与修改时间均未变化的文件直接复用已有特征；
+        否则比较内容哈希，只有新增或内容变化的文件才会重新计算特征。
+        源文件已被删除的记录会被移除。
+        """
+        seen = set[str]()
+        changed = list[tuple[str, MatLike | str | bytes]]()
+        for key, path in source.files():
+            seen.add(key)
+            stat = os.stat(path)
+            record = self.db.files.get(key)
+            if (
+                record is not None and key in self.db
+                and record.size == stat.st_size and record.mtime_ns == stat.st_mtime_ns
+            ):
+                continue
+            with open(path, 'rb') as f:
+                content = f.read()
+            digest = hashlib.sha1(content).hexdigest()
+            new_record = FileRecord(os.path.basename(path), stat.st_size, stat.st_mtime_ns, digest)
+            self.db.files[key] = new_record
+            self.__modified = True
+            if record is not None and key in self.db and record.hash == digest:
+                continue
+            changed.append((key, content))
+        self.__insert_described(changed)
+        for key in [key for key in self.db.files if key not in seen]:
+            logger.debug('Removed image: %s', key)
+            self.db.remove(key)
+            self.__modified = True
+        logger.info('Data source synced. %d described, %d total.', len(changed), self.db.count())
+
     @property
     def db(self) -> Db:
         if not self.__db:
@@ -117,8 +401,12 @@ class ImageDatabase:
         return self.__db
 
     def save(self):
-        with open(self.db_path, 'wb') as f:
-            pickle.dump(self.db, f)
+        try:
+            save_db(self.db, self.db_path)
+            self.__modified = False
+        except OSError as e:
+            # 缓存写入失败不影响使用，下次启动时会重新计算
+            logger.warning('Failed to save database to %s: %s', self.db_path, e)
 
     def insert(self, key: str, image: MatLike | str, *, overwrite: bool = False):
         """
@@ -131,36 +419,67 @@ class ImageDatabase:
         """
         if isinstance(image, str):
             image = cv2_imread(image)
-        if overwrite or key not in self.db.data:
+        if overwrite or key not in self.db:
             self.db.insert(key, self.descriptor(image))
+            self.__modified = True
             logger.debug('Inserted image: %s', key)
 
     def insert_many(self, images: dict[str, str | MatLike], *, overwrite: bool = False):
         """
         向图像数据库中插入多条新记录。
 
+        图片数量较多时会并行解码并计算特征，插入顺序与 `images` 一致。
+
         :param images: 图片。key 为图片的 ID，value 为图片的路径或 MatLike。
             若为 MatLike，必须为 BGR 格式。
         :param overwrite: 是否覆盖已存在的记录。
         """
-        for name, image in images.items():
-            self.insert(name, image, overwrite=overwrite)
+        self.__insert_described([
+            (name, image) for name, image in images.items()
+            if overwrite or name not in self.db
+        ])
 
-    def match_all(self, query: MatLike, threshold: float = 10) -> list[DatabaseQueryResult]:
+    def _index(self) -> tuple[list[str], np.ndarray]:
+        """
+        获取向量化索引。
+
+        :return: `(keys, features)`。`features` 为 (N, D) 的 float32 矩阵，
+            第 i 行对应 `keys[i]`。
+        """
+        self.db.compact()
+        return self.db.keys, self.db.features
+
+    def match_all(
+            self,
+            query: MatLike,
+            threshold: float = 10,
+            *,
+            top_k: int | None = None
+        ) -> list[DatabaseQueryResult]:
         """
         搜索图片，返回所有符合阈值要求的图片，并按相似度降序排序。
 
         :param image: 待搜索的图片。必须为 BGR 格式。
         :param threshold: 距离阈值。阈值越大，对相似度的要求越低。
+        :param top_k: 最多返回的结果数量。为 None 时返回全部结果。
         :return: 搜索结果。
         """
-        query_feature = self.descriptor(query)
-        results = list[DatabaseQueryResult]()
-        for key, feature in self.db.data.items():
-            dist = chi2_distance(query_feature, feature)
-            if dist < threshold:
-                results.append(DatabaseQueryResult(key, feature, float(dist)))
-        results.sort(key=lambda x: x.distance)
+        keys, features = self._index()
+        if len(keys) == 0:
+            return []
+        query_feature = np.asarray(self.descriptor(query), dtype=np.float32).ravel()
+        distances = chi2_distance(query_feature, features)
+        candidates = np.flatnonzero(distances < threshold)
+        if top_k is not None and top_k < len(candidates):
+            # 只对前 k 个做完整排序
+            nearest = np.argpartition(distances[candidates], top_k - 1)[:top_k]
+            candidates = np.sort(candidates[nearest])
+        # 稳定排序，距离相同时保持插入顺序
+        order = candidates[np.argsort(distances[candidates], kind='stable')]
+        results = [
+            DatabaseQueryResult(keys[i], features[i], float(distances[i]))
+            for i in order
+        ]
 
         # 可视化
         # print("MinDist = ", results[0].distance, results[1].distance, results[2].distance)
@@ -179,19 +498,19 @@ class ImageDatabase:
         :param threshold: 距离阈值。阈值越大，对相似度的要求越低。
         :return: 匹配结果。
         """
-        results = self.match_all(query, threshold)
+        results = self.match_all(query, threshold, top_k=1)
         if len(results) > 0:
             return results[0]
         else:
             return None
-    
+
 
 if __name__ == '__main__':
     from kaa.image_db.db import Db
     logging.basicConfig(level=logging.DEBUG, format='[%(asctime)s] [%(levelname)s] [%(name)s] [%(funcName)s] [%(lineno)d] %(message)s')
     imgs_path = r'E:\GithubRepos\KotonesAutoAssistant.worktrees\dev\kotonebot\tasks\resources\idol_cards'
     needle_path = r'D:\05.png'
-    db = ImageDatabase(FileDataSource(imgs_path), r'D:\idols.pkl', HistDescriptor(8), name='idols')
+    db = ImageDatabase(FileDataSource(imgs_path), r'D:\idols', HistDescriptor(8), name='idols')
     # if db.db.count() == 0:
     #     db.insert({file: os.path.join(imgs_path, file) for file in os.listdir(imgs_path)})
     needle = cv2_imread(needle_path)
@@ -2,36 +2,70 @@ import cv2
 import numpy as np
 from cv2.typing import MatLike
 
+# HSV 三个通道的取值范围，与 `cv2.calcHist` 的 ranges 参数一致
+_HSV_RANGES = ((0, 180), (0, 256), (0, 256))
+_GRID = 3
+
+def _bin_lut(bin_count: int, low: float, high: float) -> np.ndarray:
+    """
+    生成 0~255 像素值到直方图 bin 下标的查找表。
+
+    计算方式与 OpenCV `calcHist` 对 8 位图像的均匀直方图一致。
+    `cvtColor` 得到的 HSV 值总是落在 `_HSV_RANGES` 内，
+    因此超出范围的表项不会被用到，这里直接截断。
+    """
+    scale = bin_count / (high - low)
+    idx = np.floor(np.arange(256, dtype=np.float64) * scale - low * scale).astype(np.int64)
+    return np.clip(idx, 0, bin_count - 1)
+
 class HistDescriptor:
     def __init__(self, bin_count: int):
         self.bin_count = bin_count
+        b = bin_count
+        (h_low, h_high), (s_low, s_high), (v_low, v_high) = _HSV_RANGES
+        # 预先把 bin 下标乘上各自的步长，量化后相加即可得到三维直方图的扁平下标
+        self._lut_h = (_bin_lut(b, h_low, h_high) * b * b).astype(np.int32)
+        self._lut_s = (_bin_lut(b, s_low, s_high) * b).astype(np.int32)
+        self._lut_v = _bin_lut(b, v_low, v_high).astype(np.int32)
+        self._cell_size = b ** 3
+        # 按图像尺寸缓存每个像素所属的区域偏移量
+        self._cell_offsets: dict[tuple[int, int], np.ndarray] = {}
+
+    def _offsets(self, height: int, width: int) -> np.ndarray:
+        key = (height, width)
+        offsets = self._cell_offsets.get(key)
+        if offsets is None:
+            # 与九宫格划分方式一致：第 i 块为 [i * n // 3, (i + 1) * n // 3)
+            rows = _cell_indices(height)
+            cols = _cell_indices(width)
+            offsets = ((rows[:, None] * _GRID + cols[None, :]) * self._cell_size).astype(np.int32)
+            self._cell_offsets[key] = offsets
+        return offsets
 
     def __call__(self, image: MatLike):
         img = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-        # 将图像均分为九个区域
-        masks = []
         height, width = img.shape[:2]
-        for i in range(3):
-            for j in range(3):
-                start_row, start_col = i * height // 3, j * width // 3
-                end_row, end_col = (i + 1) * height // 3, (j + 1) * width // 3
-                mask = np.zeros(img.shape[:2], dtype=np.uint8)
-                mask[start_row:end_row, start_col:end_col] = 255
-                masks.append(mask)
-        # 依次计算九个区域的直方图
-        features = np.array([])
-        for mask in masks:
-            hist = cv2.calcHist(
-                [img],
-                [0, 1, 2],
-                mask,
-                [self.bin_count, self.bin_count, self.bin_count],
-                [0, 180, 0, 256, 0, 256]
-            )
-            hist = cv2.normalize(hist, hist)
-            features = np.append(features, hist.flatten())
+        cell_size = self._cell_size
+        # 一次量化整张图像，再用一次 bincount 统计九个区域的直方图
+        flat = np.take(self._lut_h, img[:, :, 0])
+        flat += np.take(self._lut_s, img[:, :, 1])
+        flat += np.take(self._lut_v, img[:, :, 2])
+        flat += self._offsets(height, width)
+        counts = np.bincount(flat.ravel(), minlength=_GRID * _GRID * cell_size)
+
+        features = np.empty(_GRID * _GRID * cell_size, dtype=np.float64)
+        hists = counts.reshape(_GRID * _GRID, cell_size).astype(np.float64)
+        # 与 cv2.normalize 默认的 L2 归一化一致（结果为 float32 精度）
+        norms = np.sqrt(np.einsum('ij,ij->i', hists, hists))
+        scales = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > np.finfo(np.float64).eps)
+        features.reshape(_GRID * _GRID, cell_size)[:] = (hists * scales[:, None]).astype(np.float32)
         return features
 
+def _cell_indices(length: int) -> np.ndarray:
+    """返回长度为 `length` 的边上每个坐标在三等分中所属的块下标。"""
+    ends = [(i + 1) * length // _GRID for i in range(_GRID)]
+    return np.searchsorted(ends, np.arange(length), side='right').astype(np.int64)
+
 if __name__ == '__main__':
     from kotonebot.backend.core import cv2_imread
     d = HistDescriptor(8)
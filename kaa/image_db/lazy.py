@@ -0,0 +1,107 @@
+import time
+import logging
+import threading
+from typing import Callable, Literal, NamedTuple
+
+from .db import ImageDatabase
+
+logger = logging.getLogger(__name__)
+
+LoadState = Literal['pending', 'loading', 'ready', 'error']
+
+class LoadStatus(NamedTuple):
+    name: str
+    """数据库名称"""
+    state: LoadState
+    """载入状态"""
+    load_seconds: float | None
+    """载入耗时。未载入完成时为 None"""
+    wait_seconds: float
+    """调用方因等待载入而阻塞的累计时间"""
+
+class LazyImageDatabase:
+    """
+    延迟载入的图像数据库。
+
+    可以通过 `warm_up()` 提前在后台线程中载入，
+    `get()` 只会在数据库尚未载入完成时阻塞。
+    """
+    def __init__(self, name: str, factory: Callable[[], ImageDatabase]):
+        """
+        :param name: 数据库名称，用于日志与状态显示。
+        :param factory: 创建数据库的函数。
+        """
+        self.name = name
+        self.__factory = factory
+        self.__lock = threading.Lock()
+        self.__ready = threading.Event()
+        self.__db: ImageDatabase | None = None
+        self.__error: Exception | None = None
+        self.__state: LoadState = 'pending'
+        self.__load_seconds: float | None = None
+        self.__wait_seconds: float = 0
+
+    def warm_up(self) -> None:
+        """在后台线程中开始载入。已经开始载入或载入完成时什么都不做。"""
+        with self.__lock:
+            if self.__state != 'pending':
+                return
+            self.__state = 'loading'
+        thread = threading.Thread(
+            target=self.__load,
+            kwargs={'propagate': False},
+            name=f'ImageDatabaseWarmUp-{self.name}',
+            daemon=True
+        )
+        thread.start()
+
+    def get(self) -> ImageDatabase:
+        """
+        获取数据库。
+
+        若尚未开始载入，则在当前线程中载入；
+        若正在后台载入，则阻塞直到载入完成。
+        """
+        if self.__db is not None:
+            return self.__db
+        with self.__lock:
+            # 后台载入失败时，在当前线程重试，让异常在调用方抛出
+            load_here = self.__state in ('pending', 'error')
+            if load_here:
+                self.__state = 'loading'
+                self.__ready.clear()
+        start_time = time.perf_counter()
+        try:
+            if load_here:
+                self.__load(propagate=True)
+            else:
+                logger.info('Waiting for %s database to be loaded...', self.name)
+                self.__ready.wait()
+                logger.info('Waited %.2fs for %s database.', time.perf_counter() - start_time, self.name)
+        finally:
+            self.__wait_seconds += time.perf_counter() - start_time
+        if self.__db is None:
+            raise RuntimeError(f'Failed to load {self.name} database.') from self.__error
+        return self.__db
+
+    def status(self) -> LoadStatus:
+        return LoadStatus(self.name, self.__state, self.__load_seconds, self.__wait_seconds)
+
+    def __load(self, propagate: bool) -> None:
+        start_time = time.perf_counter()
+        try:
+            db = self.__factory()
+        except Exception as e:
+            self.__error = e
+            self.__state = 'error'
+            self.__ready.set()
+            if propagate:
+                raise
+            logger.exception('Failed to load %s database in background.', self.name)
+            return
+        self.__load_seconds = time.perf_counter() - start_time
+        self.__db = db
+        self.__error = None
+        self.__state = 'ready'
+        self.__ready.set()
+        logger.info('%s database loaded in %.2fs.', self.name, self.__load_seconds)
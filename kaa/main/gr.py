@@ -33,7 +33,9 @@ from kaa.config import (
 )
 from kaa.config.produce import ProduceSolution, ProduceSolutionManager, ProduceData
 from kaa.application.adapter.misc_adapter import create_desktop_shortcut
+from kaa.application.adapter.db_warmup_adapter import warm_up_status_rows
 from kaa.application.core.idle_mode import IdleModeManager
+from kaa.util.profiler import action_profiler, PROFILE_ROW_HEADERS
 
 logger = logging.getLogger(__name__)
 GradioInput = gr.Textbox | gr.Number | gr.Checkbox | gr.Dropdown | gr.Radio | gr.Slider | gr.Tabs | gr.Tab
@@ -633,6 +635,26 @@ class KotoneBotUI:
                 label="任务状态"
             )
 
+            with gr.Accordion("资源载入", open=False):
+                db_status = gr.Dataframe(
+                    headers=["数据库", "状态", "载入耗时", "等待耗时"],
+                    value=warm_up_status_rows(),
+                    label="图像数据库"
+                )
+
+            with gr.Accordion("动作耗时", open=False):
+                gr.Markdown(f"需要在配置文件中开启 `trace.profile_actions`。最近 {action_profiler.window} 次调用的统计，次数与总耗时为累计值。截图、模板匹配与 OCR 次数包含子动作。")
+                profile_table = gr.Dataframe(
+                    headers=PROFILE_ROW_HEADERS,
+                    value=action_profiler.rows(),
+                    label="动作耗时"
+                )
+                with gr.Row():
+                    profile_refresh_btn = gr.Button("刷新", scale=1)
+                    profile_clear_btn = gr.Button("清空", scale=1)
+                    profile_export_btn = gr.Button("导出 JSON", scale=1)
+                profile_export_file = gr.File(label="导出文件", visible=False)
+
             # MARK: 状态 - 监听函数
 
             def on_run_click(evt: gr.EventData) -> Tuple[gr.Button, List[List[str]]]:
@@ -645,6 +667,17 @@ class KotoneBotUI:
             def on_pause_click(evt: gr.EventData) -> str:
                 return self.toggle_pause()
 
+            def on_profile_clear_click() -> List[List[Any]]:
+                action_profiler.clear()
+                return action_profiler.rows()
+
+            def on_profile_export_click() -> gr.File:
+                os.makedirs('logs', exist_ok=True)
+                path = os.path.abspath(os.path.join('logs', f'profile_{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}.json'))
+                action_profiler.export_json(path)
+                gr.Info(f"已导出至 {path}")
+                return gr.File(value=path, visible=True)
+
             # 快速设置控制的事件处理函数
             def save_quick_setting(success_msg: str, failed_msg: str):
                 """保存快速设置并立即应用"""
@@ -716,6 +749,18 @@ class KotoneBotUI:
                 fn=on_pause_click,
                 outputs=[pause_btn]
             )
+            profile_refresh_btn.click(
+                fn=action_profiler.rows,
+                outputs=[profile_table]
+            )
+            profile_clear_btn.click(
+                fn=on_profile_clear_click,
+                outputs=[profile_table]
+            )
+            profile_export_btn.click(
+                fn=on_profile_export_click,
+                outputs=[profile_export_file]
+            )
 
             select_all_btn.click(
                 fn=lambda: batch_select(True, True, f"✓ 全选成功"),
@@ -851,6 +896,10 @@ class KotoneBotUI:
                 fn=self.update_task_status,
                 outputs=[task_status]
             )
+            gr.Timer(2.0).tick(
+                fn=warm_up_status_rows,
+                outputs=[db_status]
+            )
 
     def _create_task_tab(self) -> None:
         with gr.Tab("任务"):
@@ -65,6 +65,13 @@ class Kaa(KotoneBot):
         logger.info('Python Version: %s', sys.version)
         logger.info('Python Executable: %s', sys.executable)
 
+    @override
+    def initialize(self):
+        super().initialize()
+        # 提前在后台载入图像数据库，避免首次使用时（如考试第一回合）卡顿
+        from ..application.core.db_warmup import start_warm_up
+        start_warm_up()
+
     def add_file_logger(self, log_path: str):
         log_dir = os.path.abspath(os.path.dirname(log_path))
         os.makedirs(log_dir, exist_ok=True)
@@ -151,6 +158,19 @@ class Kaa(KotoneBot):
         device.orientation = 'portrait'
         device.target_resolution = (720, 1280)
 
+        from ..config import conf
+        from ..util.recorder import session_recorder
+        if conf().trace.record_session:
+            session_recorder.start(device)
+        elif session_recorder.recording:
+            session_recorder.stop()
+
+        from ..util.profiler import action_profiler
+        if conf().trace.profile_actions:
+            action_profiler.install()
+        else:
+            action_profiler.uninstall()
+
     def __get_backend_instance(self, config: UserConfig) -> Instance:
         """
         根据配置获取或创建 Instance。
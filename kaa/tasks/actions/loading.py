@@ -3,28 +3,47 @@ from logging import getLogger
 
 import cv2
 import numpy as np
+from cv2.typing import MatLike
 
 from kotonebot import image, device, action, sleep
-from kotonebot.backend.debug import result
+from kotonebot.backend.debug import result, debug
 from kaa.tasks import R
 
 logger = getLogger(__name__)
 
+LOADING_SAMPLE_STEP = 4
+"""检测时横向与纵向的采样间隔（像素）"""
+_LOADING_BLOCK_ROWS = 32
+
+def is_loading_frame(img: MatLike, step: int = LOADING_SAMPLE_STEP) -> bool:
+    """
+    判断截图是否为场景加载页面。
+
+    加载页面上方 35% 二值化后最多只有两种颜色。
+    二值化后每个像素只有 8 种可能的颜色，按 BGR 打包为 3 bit 后统计，
+    逐块处理，出现第三种颜色时立即返回。
+
+    :param img: 截图。
+    :param step: 采样间隔。为 1 时检查所有像素。
+    """
+    top = img[:int(img.shape[0] * 0.35):step, ::step]
+    seen = np.zeros(8, dtype=bool)
+    for y in range(0, top.shape[0], _LOADING_BLOCK_ROWS):
+        block = top[y:y + _LOADING_BLOCK_ROWS] > 127
+        codes = block[..., 0] | (block[..., 1] << 1) | (block[..., 2] << 2)
+        seen |= np.bincount(codes.ravel(), minlength=8) > 0
+        if np.count_nonzero(seen) > 2:
+            return False
+    return True
+
 @action('检测加载页面', screenshot_mode='manual')
 def loading() -> bool:
     """检测是否在场景加载页面"""
     img = device.screenshot()
-    original_img = img.copy()
-    # 二值化图片
-    _, img = cv2.threshold(img, 127, 255, cv2.THRESH_BINARY)
-    # 裁剪上面 35%
-    img = img[:int(img.shape[0] * 0.35), :]
-    # 判断图片中颜色数量是否 <= 2
-    # https://stackoverflow.com/questions/56606294/count-number-of-unique-colours-in-image
-    b,g,r = cv2.split(img)
-    shiftet_im = b.astype(np.int64) + 1000 * (g.astype(np.int64) + 1) + 1000 * 1000 * (r.astype(np.int64) + 1)
-    ret = len(np.unique(shiftet_im)) <= 2
-    result('tasks.actions.loading', [img, original_img], f'result={ret}')
+    ret = is_loading_frame(img)
+    if debug.enabled:
+        _, binary = cv2.threshold(img, 127, 255, cv2.THRESH_BINARY)
+        result('tasks.actions.loading', [binary[:int(img.shape[0] * 0.35), :], img], f'result={ret}')
     return ret
 
 @action('等待加载开始')
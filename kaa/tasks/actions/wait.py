@@ -0,0 +1,84 @@
+"""
+基于画面的等待。
+
+用于替换点击后固定时长的 `sleep()`：画面满足条件（或不再变化）时立即返回，
+最多等待 `timeout` 秒。超时时的行为与原先的固定等待相同。
+"""
+import time
+from logging import getLogger
+from typing import Callable
+
+from cv2.typing import MatLike
+from kotonebot import device, action, sleep
+from kotonebot.primitives import Rect
+
+from kaa.util.frame_diff import FrameChangeDetector
+
+logger = getLogger(__name__)
+
+DEFAULT_INTERVAL = 0.1
+"""两次截图之间的间隔（秒）"""
+
+@action('等待画面满足条件')
+def wait_until(
+    predicate: Callable[[MatLike], bool],
+    *,
+    timeout: float,
+    interval: float = DEFAULT_INTERVAL,
+) -> bool:
+    """
+    不断截图，直到截图满足条件或超时。
+
+    :param predicate: 判断条件。参数为截图。
+    :param timeout: 最长等待时间（秒）。
+    :param interval: 两次截图之间的间隔（秒）。
+    :return: 是否满足条件。超时返回 False。
+    """
+    deadline = time.time() + timeout
+    while True:
+        if predicate(device.screenshot()):
+            return True
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return False
+        sleep(min(interval, remaining))
+
+@action('等待画面稳定')
+def wait_until_stable(
+    *,
+    timeout: float,
+    stable_time: float = 0.6,
+    min_wait: float = 0,
+    rect: Rect | None = None,
+    interval: float = DEFAULT_INTERVAL,
+) -> bool:
+    """
+    等待画面停止变化。画面连续 `stable_time` 秒没有变化时返回。
+
+    画面持续变化（例如循环播放的动画）时，会一直等到超时，与固定等待 `timeout` 秒相同。
+
+    :param timeout: 最长等待时间（秒），从调用时开始计算。
+    :param stable_time: 画面保持不变的时间（秒）。
+    :param min_wait: 开始检测前先等待的时间（秒）。用于跳过点击后动画开始前的静止画面。
+    :param rect: 只检测此区域。为 None 时检测整个画面。
+    :param interval: 两次截图之间的间隔（秒）。
+    :return: 画面是否已稳定。超时返回 False。
+    """
+    start_time = time.time()
+    if min_wait > 0:
+        sleep(min(min_wait, timeout))
+    detector = FrameChangeDetector()
+    last_change = time.time()
+
+    def _stable(img: MatLike) -> bool:
+        nonlocal last_change
+        if rect is not None:
+            img = img[rect.y1:rect.y2, rect.x1:rect.x2]
+        now = time.time()
+        if detector.changed(img):
+            last_change = now
+        return now - last_change >= stable_time
+
+    ret = wait_until(_stable, timeout=max(0, timeout - (time.time() - start_time)), interval=interval)
+    logger.debug('Waited %.2fs for stable frame. stable=%s', time.time() - start_time, ret)
+    return ret
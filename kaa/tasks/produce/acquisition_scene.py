@@ -0,0 +1,98 @@
+"""
+培育中各类获取事件（对话框、弹窗）的场景识别。
+
+`fast_acquisitions` 需要在同一帧上依次检查十余个模板。
+这里把所有候选模板集中在一张截图上一次性识别，
+并把每个模板限制在其已知的出现区域内，以减少模板匹配的面积。
+"""
+import logging
+from typing import Literal, NamedTuple
+
+from cv2.typing import MatLike
+from kotonebot.backend.core import Image, HintBox
+from kotonebot.backend.image import TemplateMatchResult, find as find_template
+
+from kaa.tasks import R
+
+logger = logging.getLogger(__name__)
+
+AcquisitionScene = Literal[
+    "PDrinkMax", # P饮料到达上限
+    "PDrinkMaxConfirm", # P饮料到达上限 确认提示框
+    "PSkillCardEnhanceSelect", # 技能卡自选强化
+    "PSkillCardRemoveSelect", # 技能卡自选删除
+    "NetworkError", # 网络中断弹窗
+    "PDrinkSelect", # P饮料选择
+    "PSkillCardSelect", # 技能卡选择
+    "PItemSelect", # P物品选择
+    "DateChange", # 日期变更
+]
+
+# 模板的出现区域，为截取模板时的位置上下各扩展一定范围。None 表示位置不固定，需全图匹配。
+# [kotonebot-resource/sprites/jp/in_purodyuusu/screenshot_pdrink_max_confirm.png]
+BoxPDrinkMaxConfirmTitle = HintBox(x1=0, y1=769, x2=720, y2=936, source_resolution=(720, 1280))
+# [kotonebot-resource/sprites/jp/in_purodyuusu/screenshot_remove_skill_card.png]
+BoxDialogTitleIcon = HintBox(x1=0, y1=0, x2=160, y2=140, source_resolution=(720, 1280))
+# [kotonebot-resource/sprites/jp/in_purodyuusu/screenshot_select_p_item.png]
+BoxClaimDialogTitle = HintBox(x1=0, y1=548, x2=720, y2=708, source_resolution=(720, 1280))
+# [kotonebot-resource/sprites/jp/daily/screenshot_date_change.png]
+BoxDateChangeDialog = HintBox(x1=0, y1=902, x2=720, y2=1056, source_resolution=(720, 1280))
+
+class _Candidate(NamedTuple):
+    scene: AcquisitionScene
+    templates: tuple[tuple[Image, HintBox | None], ...]
+    """需要同时出现的模板及其出现区域，按顺序检查。最后一个模板为主模板。"""
+
+# 按处理优先级排列，与原先 `fast_acquisitions` 中的检查顺序一致
+_CANDIDATES: tuple[_Candidate, ...] = (
+    _Candidate("PDrinkMax", ((R.InPurodyuusu.TextPDrinkMax, None),)),
+    _Candidate("PDrinkMaxConfirm", ((R.InPurodyuusu.TextPDrinkMaxConfirmTitle, BoxPDrinkMaxConfirmTitle),)),
+    _Candidate("PSkillCardEnhanceSelect", ((R.InPurodyuusu.IconTitleSkillCardEnhance, BoxDialogTitleIcon),)),
+    _Candidate("PSkillCardRemoveSelect", ((R.InPurodyuusu.IconTitleSkillCardRemoval, BoxDialogTitleIcon),)),
+    _Candidate("NetworkError", ((R.Common.TextNetworkError, None), (R.Common.ButtonRetry, None))),
+    _Candidate("PDrinkSelect", ((R.InPurodyuusu.TextClaim, BoxClaimDialogTitle), (R.InPurodyuusu.TextPDrink, BoxClaimDialogTitle))),
+    _Candidate("PSkillCardSelect", ((R.InPurodyuusu.TextClaim, BoxClaimDialogTitle), (R.InPurodyuusu.TextSkillCard, BoxClaimDialogTitle))),
+    _Candidate("PItemSelect", ((R.InPurodyuusu.TextClaim, BoxClaimDialogTitle), (R.InPurodyuusu.TextPItem, BoxClaimDialogTitle))),
+    _Candidate("DateChange", ((R.Daily.TextDateChangeDialog, BoxDateChangeDialog),)),
+)
+
+class AcquisitionMatch(NamedTuple):
+    scene: AcquisitionScene
+    """识别到的场景"""
+    match: TemplateMatchResult
+    """主模板（最后一个模板）的匹配结果"""
+
+def classify_acquisitions(img: MatLike, after: AcquisitionScene | None = None) -> list[AcquisitionMatch]:
+    """
+    识别截图中出现的所有获取事件。
+
+    同一个模板只会匹配一次，结果在各候选场景之间共享；
+    候选场景中某个模板未匹配时，跳过其余模板。
+
+    :param img: 截图。
+    :param after: 只识别处理优先级低于此场景的场景。为 None 时识别所有场景。
+    :return: 识别到的场景，按处理优先级排序。第一个元素为最应当处理的场景。
+    """
+    found: dict[tuple[int, int], TemplateMatchResult | None] = {}
+
+    def find(template: Image, box: HintBox | None) -> TemplateMatchResult | None:
+        key = (id(template), id(box))
+        if key not in found:
+            found[key] = find_template(img, template, rect=box)
+        return found[key]
+
+    candidates = _CANDIDATES
+    if after is not None:
+        index = next(i for i, c in enumerate(_CANDIDATES) if c.scene == after)
+        candidates = _CANDIDATES[index + 1:]
+    results: list[AcquisitionMatch] = []
+    for candidate in candidates:
+        match: TemplateMatchResult | None = None
+        for template, box in candidate.templates:
+            match = find(template, box)
+            if match is None:
+                break
+        if match is not None:
+            results.append(AcquisitionMatch(candidate.scene, match))
+    logger.debug('Acquisition scenes: %s', [r.scene for r in results])
+    return results
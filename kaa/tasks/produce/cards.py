@@ -1,6 +1,6 @@
 import logging
 from functools import partial
-from typing import Callable, NamedTuple, Literal
+from typing import Callable, NamedTuple
 
 import cv2
 import numpy as np
@@ -11,10 +11,14 @@ from kaa.game_ui.drinks_overview import locate_all_drinks_in_3_drink_slots
 from kaa.tasks import R
 from kaa.config import conf
 from kaa.game_ui import dialog
+from kaa.game_ui.hud import NoSkillCardText
+from kaa.game_ui.hand_layout import HandLayout, hand_layout_detector
 from kaa.tasks.produce.common import acquisition_date_change_dialog
 from kaa.util.trace import trace
+from kaa.util.frame_diff import FrameChangeDetector
+from kaa.tasks.actions.wait import wait_until_stable
 from kotonebot.primitives import RectTuple, Rect
-from kotonebot import action, Interval, Countdown, device, image, sleep, ocr, contains, use_screenshot, color
+from kotonebot import action, Interval, Countdown, device, image, sleep, use_screenshot, color
 from kotonebot.backend.loop import Loop
 
 class SkillCard(NamedTuple):
@@ -26,7 +30,7 @@ class CardPosInfo(NamedTuple):
     y: int
     w: int
     h: int
-    type: Literal[0, 1, 2, 3, 4, 10] # 0~4=卡片下标，10=SKIP
+    type: int # 卡片下标（从 0 开始），10=SKIP
 
 class CardDetectResult(NamedTuple):
     type: int
@@ -49,24 +53,6 @@ class CardDetectResult(NamedTuple):
 
 logger = logging.getLogger(__name__)
 
-# TODO: 硬编码。需要想办法移动到资源文件中
-CARD_SIZE = (192, 252) # 卡片大小 w, h
-CARD_Y = 883 # 卡片 Y 坐标
-# 只有一张卡的情况
-CARD_START_X_1 = 264
-CARD_DELTA_X_1 = 0
-# 两张卡的情况
-CARD_START_X_2 = 156 # 第一张卡的起始 X
-CARD_DELTA_X_2 = 24 # 间隔距离 = card_x_2 - card_x_1 - card_width
-# 三张卡的情况
-CARD_START_X_3 = 47
-CARD_DELTA_X_3 = 25
-# 四张卡的情况
-CARD_START_X_4 = 17
-CARD_DELTA_X_4 = -27
-# 五张卡的情况
-CARD_START_X_5 = 17
-CARD_DELTA_X_5 = -68
 # SKIP 按钮
 SKIP_CARD_BUTTON = CardPosInfo(621, 739, 85, 85, 10)
 
@@ -75,79 +61,59 @@ YELLOW_HSV_UPPER = np.array([32, 255, 255], dtype=np.uint8)
 MIN_HIGHLIGHT_SATURATION = 130
 MIN_HIGHLIGHT_VALUE = 140
 _MORPH_KERNEL = np.ones((3, 3), dtype=np.uint8)
+# 黄色范围与饱和度、明度下限（严格大于）合并后的下界，一次 inRange 即可得到发光像素
+_HIGHLIGHT_HSV_LOWER = np.maximum(
+    YELLOW_HSV_LOWER,
+    np.array([0, MIN_HIGHLIGHT_SATURATION + 1, MIN_HIGHLIGHT_VALUE + 1], dtype=np.uint8)
+)
 
 
-def _extract_highlight_mask(glow_area: MatLike, extension: int) -> np.ndarray:
-    """提取卡片周围发光区域的二值掩模。"""
-    area = glow_area.copy()
-    area_h, area_w = area.shape[:2]
-    if area_h == 0 or area_w == 0:
-        return np.zeros((area_h, area_w), dtype=np.uint8)
+def _extract_highlight_pixels(area: MatLike) -> np.ndarray:
+    """提取区域内黄色发光像素的二值掩模（未滤波）。"""
+    hsv = cv2.cvtColor(area, cv2.COLOR_BGR2HSV)
+    return cv2.inRange(hsv, _HIGHLIGHT_HSV_LOWER, YELLOW_HSV_UPPER)
 
-    if area_h > extension * 2 and area_w > extension * 2:
-        area[extension:area_h-extension, extension:area_w-extension] = 0
+def _extract_highlight_mask(pixels: np.ndarray, extension: int) -> np.ndarray:
+    """
+    对单张卡片发光区域的发光像素滤波，得到发光掩模。
 
-    hsv = cv2.cvtColor(area, cv2.COLOR_BGR2HSV)
-    yellow_mask = cv2.inRange(hsv, YELLOW_HSV_LOWER, YELLOW_HSV_UPPER)
-    _, saturation_mask = cv2.threshold(
-        hsv[:, :, 1], MIN_HIGHLIGHT_SATURATION, 255, cv2.THRESH_BINARY
-    )
-    _, value_mask = cv2.threshold(
-        hsv[:, :, 2], MIN_HIGHLIGHT_VALUE, 255, cv2.THRESH_BINARY
-    )
+    卡片内部（发光区域去掉外扩部分）在滤波前后都置为 0，
+    因此滤波结果只取决于卡片四周外扩的部分，不受卡片内容与相邻卡片的影响。
 
-    mask = cv2.bitwise_and(yellow_mask, saturation_mask)
-    mask = cv2.bitwise_and(mask, value_mask)
+    :param pixels: 发光区域的发光像素掩模，会被原地修改。
+    :param extension: 外扩宽度。
+    """
+    area_h, area_w = pixels.shape[:2]
+    if area_h == 0 or area_w == 0:
+        return pixels
+    has_inner = area_h > extension * 2 and area_w > extension * 2
+    if has_inner:
+        pixels[extension:area_h-extension, extension:area_w-extension] = 0
 
+    mask = pixels
     if area_h >= 3 and area_w >= 3:
         mask = cv2.medianBlur(mask, 3)
     mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, _MORPH_KERNEL, iterations=1)
     mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, _MORPH_KERNEL, iterations=1)
 
-    if area_h > extension * 2 and area_w > extension * 2:
+    if has_inner:
         mask[extension:area_h-extension, extension:area_w-extension] = 0
     return mask
 
+def calc_card_position(card_count: int, layout: HandLayout | None = None):
+    """
+    计算各张手牌的位置。
 
-def calc_card_position(card_count: int):
-    w, h = CARD_SIZE
-    if card_count == 1:
-        result = [
-            CardPosInfo(x=CARD_START_X_1, y=CARD_Y, w=w, h=h, type=0)
-        ]
-    elif card_count == 2:
-        delta = CARD_DELTA_X_2 + w
-        result = [
-            CardPosInfo(x=CARD_START_X_2, y=CARD_Y, w=w, h=h, type=0),
-            CardPosInfo(x=CARD_START_X_2 + delta, y=CARD_Y, w=w, h=h, type=1),
-        ]
-    elif card_count == 3:
-        delta = CARD_DELTA_X_3 + w
-        result = [
-            CardPosInfo(x=CARD_START_X_3, y=CARD_Y, w=w, h=h, type=0),
-            CardPosInfo(x=CARD_START_X_3 + delta, y=CARD_Y, w=w, h=h, type=1),
-            CardPosInfo(x=CARD_START_X_3 + delta * 2, y=CARD_Y, w=w, h=h, type=2),
-        ]
-    elif card_count == 4:
-        delta = CARD_DELTA_X_4 + w
-        result = [
-            CardPosInfo(x=CARD_START_X_4, y=CARD_Y, w=w, h=h, type=0),
-            CardPosInfo(x=CARD_START_X_4 + delta, y=CARD_Y, w=w, h=h, type=1),
-            CardPosInfo(x=CARD_START_X_4 + delta * 2, y=CARD_Y, w=w, h=h, type=2),
-            CardPosInfo(x=CARD_START_X_4 + delta * 3, y=CARD_Y, w=w, h=h, type=3),
-        ]
-    elif card_count == 5:
-        delta = CARD_DELTA_X_5 + w
-        result = [
-            CardPosInfo(x=CARD_START_X_5, y=CARD_Y, w=w, h=h, type=0),
-            CardPosInfo(x=CARD_START_X_5 + delta, y=CARD_Y, w=w, h=h, type=1),
-            CardPosInfo(x=CARD_START_X_5 + delta * 2, y=CARD_Y, w=w, h=h, type=2),
-            CardPosInfo(x=CARD_START_X_5 + delta * 3, y=CARD_Y, w=w, h=h, type=3),
-            CardPosInfo(x=CARD_START_X_5 + delta * 4, y=CARD_Y, w=w, h=h, type=4),
-        ]
-    else:
-        raise ValueError(f'不支持 {card_count} 张手牌')
-    return result
+    :param card_count: 手牌数量。
+    :param layout: 当前画面的手牌布局。若数量与 `card_count` 不一致，
+        则使用此前识别到的同数量布局，或按排列规则计算。
+    """
+    if layout is None or layout.count != card_count:
+        layout = hand_layout_detector.layout_for(card_count)
+    return [
+        CardPosInfo(x=x, y=y, w=w, h=h, type=i)
+        for i, (x, y, w, h) in enumerate(layout.cards)
+    ]
 
 @action('打牌', screenshot_mode='manual')
 def do_cards(
@@ -168,9 +134,9 @@ def do_cards(
     timeout_cd = Countdown(sec=conf().produce.produce_timeout_cd).start() # 推荐卡检测超时计时器
     break_cd = Countdown(sec=5) # 满足结束条件计时器
     no_card_cd = Countdown(sec=4) # 无手牌计时器
-    detect_card_count_cd = Countdown(sec=4).start() # 刷新检测手牌数量间隔
     tries = 1
     card_count = -1
+    hand_layout: HandLayout | None = None
     timeout_card_id = 1 # timeout时，选择的卡的编号
                         # 每次选择后会自增；若成功打出，则重置为1；如果全不无法选中，那么预测系统应该会选择空过本回合，不用考虑
 
@@ -180,98 +146,113 @@ def do_cards(
     drink_retries = 0
     DRINK_MAX_RETRIES = 5
 
+    # 画面静止（例如出牌动画、等待对方回合）时，跳过各种检测，沿用上一次的结果
+    frame_gate = FrameChangeDetector()
+    no_remaining_card = False
+    end_condition = False
+
     for _ in Loop(interval=1/30):
         device.click(10, 10)
         img = device.screenshot()
-
-        # 技能卡自选移动对话框
-        if image.find(R.InPurodyuusu.IconTitleSkillCardMove):
-            if handle_skill_card_move():
-                sleep(4)  # 等待卡片刷新
+        # 只有上一帧完整检测且没有执行任何操作时，才会跳过此帧。
+        # 执行了操作的分支都会 reset()，保证操作后的下一帧一定会被检测。
+        changed = frame_gate.changed(img)
+
+        if changed:
+            # 技能卡自选移动对话框
+            if image.find(R.InPurodyuusu.IconTitleSkillCardMove):
+                if handle_skill_card_move():
+                    wait_until_stable(timeout=4, min_wait=0.5)  # 等待卡片刷新
+                    frame_gate.reset()
+                    continue
+            # 饮品详细对话框（需要在 ButtonIconCheckMark 之前，因为ButtonUse也是√）
+            if image.find(R.InPurodyuusu.ButtonUse):
+                # 任何情况下都点击（避免卡死）
+                device.click()
+                if enable_drink and drinks_list is not None:
+                    if drink_selected_idx < 0 or drink_selected_idx >= len(drinks_list):
+                        logger.warning('`drink_selected_idx` dismatches, internal error!')
+                    else:
+                        drinks_list.pop(drink_selected_idx)
+                        drink_selected_idx = -1 # Reset
+                        drink_retries = 0 # 逻辑正常运作，重置drink_retries
+                        logger.info('Used selected drink.')
+                        wait_until_stable(timeout=3, min_wait=0.5) # 饮品动画
+                        img = device.screenshot()
+                        drinks_list = locate_all_drinks_in_3_drink_slots(img)
+                        logger.info("Rematched %d drinks. Detailed: %s", len(drinks_list), str(drinks_list))
+                else:
+                    logger.warning('Unexpected use drink dialog.')
+                frame_gate.reset()
+                continue
+            # 技能卡效果无法发动对话框
+            if image.find(R.Common.ButtonIconCheckMark):
+                logger.info("Confirmation dialog detected")
+                device.click()
+                wait_until_stable(timeout=4, min_wait=0.5)  # 等待卡片刷新
+                frame_gate.reset()
                 continue
-        # 饮品详细对话框（需要在 ButtonIconCheckMark 之前，因为ButtonUse也是√）
-        if image.find(R.InPurodyuusu.ButtonUse):
-            # 任何情况下都点击（避免卡死）
-            device.click()
-            if enable_drink and drinks_list is not None:
-                if drink_selected_idx < 0 or drink_selected_idx >= len(drinks_list):
-                    logger.warning('`drink_selected_idx` dismatches, internal error!')
+
+            # 匹配饮品
+            # - 顺序应该在对话框检测之后、卡片更新之前
+            # 考试时，初始化饮料
+            if enable_drink and drinks_list is None:
+                drinks_list = locate_all_drinks_in_3_drink_slots(img)
+                logger.info("Matched %d drinks. Detailed: %s", len(drinks_list), str(drinks_list))
+            # 考试时，处理具体的饮料
+            if enable_drink and drinks_list is not None and len(drinks_list) > 0:
+                if drinks_list[0][0].is_ordinary:
+                    # 可以处理第0个饮品
+                    drink_selected_idx = 0
+                    # 点击
+                    device.click(Rect(xywh=drinks_list[drink_selected_idx][1]))
+                    # Log
+                    logger.info('Click drink %s', drinks_list[0][0].name)
                 else:
-                    drinks_list.pop(drink_selected_idx)
-                    drink_selected_idx = -1 # Reset
+                    # Log
+                    logger.info('Drink %s cannot be process, skip', drinks_list[0][0].name)
+                    # 不可以处理第0个饮品
+                    drinks_list.pop(0)
                     drink_retries = 0 # 逻辑正常运作，重置drink_retries
-                    logger.info('Used selected drink.')
-                    sleep(3) # 饮品动画
-                    img = device.screenshot()
-                    drinks_list = locate_all_drinks_in_3_drink_slots(img)
-                    logger.info("Rematched %d drinks. Detailed: %s", len(drinks_list), str(drinks_list))
-            else:
-                logger.warning('Unexpected use drink dialog.')
-            continue
-        # 技能卡效果无法发动对话框
-        if image.find(R.Common.ButtonIconCheckMark):
-            logger.info("Confirmation dialog detected")
-            device.click()
-            sleep(4)  # 等待卡片刷新
-            continue
 
-        # 匹配饮品
-        # - 顺序应该在对话框检测之后、卡片更新之前
-        # 考试时，初始化饮料
-        if enable_drink and drinks_list is None:
-            drinks_list = locate_all_drinks_in_3_drink_slots(img)
-            logger.info("Matched %d drinks. Detailed: %s", len(drinks_list), str(drinks_list))
-        # 考试时，处理具体的饮料
-        if enable_drink and drinks_list is not None and len(drinks_list) > 0:
-            if drinks_list[0][0].name in Drink.ordinary_drinks_name():
-                # 可以处理第0个饮品
-                drink_selected_idx = 0
-                # 点击
-                device.click(Rect(xywh=drinks_list[drink_selected_idx][1]))
-                # Log
-                logger.info('Click drink %s', drinks_list[0][0].name)
-            else:
-                # Log
-                logger.info('Drink %s cannot be process, skip', drinks_list[0][0].name)
-                # 不可以处理第0个饮品
-                drinks_list.pop(0)
-                drink_retries = 0 # 逻辑正常运作，重置drink_retries
-
-            drink_retries += 1
-            if drink_retries > DRINK_MAX_RETRIES: # 卡死
-                drink_retries = 0
-                drinks_list.pop(drink_selected_idx)
-                logger.warning('Drink processing stuck. Force to pop drink.')
-            continue
+                drink_retries += 1
+                if drink_retries > DRINK_MAX_RETRIES: # 卡死
+                    drink_retries = 0
+                    drinks_list.pop(drink_selected_idx)
+                    logger.warning('Drink processing stuck. Force to pop drink.')
+                frame_gate.reset()
+                continue
 
-        # 更新卡片数量
-        if card_count == -1 or detect_card_count_cd.expired():
-            detect_card_count_cd.reset()
-            card_count = skill_card_count(img)
-            logger.debug("Current card count: %d", card_count)
+            # 更新卡片数量。手牌字母区域没有变化时直接沿用缓存的布局
+            hand_layout = detect_hand_layout(img)
+            card_count = hand_layout.count
         # 处理手牌
         if card_count == 0:
             # 处理本回合已无剩余手牌的情况
-            # TODO: 使用模板匹配而不是 OCR，提升速度
             no_card_cd.start()
-            no_remaining_card = ocr.find(contains("0枚"), rect=R.InPurodyuusu.BoxNoSkillCard)
+            if changed:
+                no_remaining_card = NoSkillCardText.find(img)
             if no_remaining_card and no_card_cd.expired():
                 logger.debug('No remaining card detected. Skip this turn.')
                 # TODO: HARD CODEDED
                 SKIP_POSITION = Rect(621, 739, 85, 85)
                 device.click(SKIP_POSITION)
                 no_card_cd.reset()
+                frame_gate.reset()
                 continue
-        else:
+        elif changed:
             if handle_recommended_card(
                 card_count=card_count,
                 threshold_predicate=threshold_predicate,
-                img=img
+                img=img,
+                layout=hand_layout,
             ):
                 logger.info("Handle recommended card success with %d tries", tries)
-                sleep(4.5)
+                # 出牌动画
+                wait_until_stable(timeout=4.5, min_wait=1)
                 tries = 0
                 timeout_cd.reset()
+                frame_gate.reset()
                 continue
             else:
                 tries += 1
@@ -281,7 +262,7 @@ def do_cards(
                 logger.warning("Recommend card detection timeout but no card found.")
                 timeout_cd.reset()
                 continue
-            card_rects = calc_card_position(card_count)
+            card_rects = calc_card_position(card_count, hand_layout)
             assert len(card_rects) == card_count, "len(card_rects) != card_count, internal code error!"
 
             # 让timeout_card_id自增，避免“因为第一张卡无法打出，导致卡在第一张卡上”的情况
@@ -290,12 +271,16 @@ def do_cards(
 
             card_rect = card_rects[timeout_card_id - 1]
             device.double_click(Rect(xywh=card_rect[:4]))
-            sleep(2)
+            wait_until_stable(timeout=2, min_wait=0.5)
             timeout_cd.reset()
-        # 日期变更检测
-        acquisition_date_change_dialog()
-        # 结束条件
-        if card_count == 0 and end_predicate():
+            frame_gate.reset()
+        if changed:
+            # 日期变更检测
+            if acquisition_date_change_dialog() is not None:
+                frame_gate.reset()
+            # 结束条件
+            end_condition = card_count == 0 and end_predicate()
+        if end_condition:
             if not break_cd.started:
                 logger.debug('start break_cd')
                 break_cd.reset().start()
@@ -305,6 +290,10 @@ def do_cards(
         else:
             logger.debug('reset break_cd')
             break_cd.stop()
+    logger.info(
+        "do_cards frames: %d processed, %d skipped (static).",
+        frame_gate.changed_count, frame_gate.unchanged_count
+    )
 
 @action("技能卡移动")
 def handle_skill_card_move():
@@ -367,25 +356,25 @@ def handle_recommended_card(
         threshold_predicate: Callable[[int, CardDetectResult], bool] = lambda _, __: True,
         *,
         img: MatLike | None = None,
+        layout: HandLayout | None = None,
     ):
-    result = detect_recommended_card(card_count, threshold_predicate, img=img)
+    result = detect_recommended_card(card_count, threshold_predicate, img=img, layout=layout)
     if result is not None:
         device.double_click(result)
         return result
     return None
 
 
+@action('获取当前手牌布局', screenshot_mode='manual-inherit')
+def detect_hand_layout(img: MatLike | None = None) -> HandLayout:
+    """获取当前手牌的布局"""
+    img = use_screenshot(img)
+    return hand_layout_detector.detect(img)
+
 @action('获取当前卡片数量', screenshot_mode='manual-inherit')
 def skill_card_count(img: MatLike | None = None):
     """获取当前持有的技能卡数量"""
-    img = use_screenshot(img)
-    x, y, w, h = R.InPurodyuusu.BoxCardLetter.xywh
-    img = img[y:y+h, x:x+w]
-    count = image.raw().count(img, R.InPurodyuusu.A)
-    count += image.raw().count(img, R.InPurodyuusu.M)
-    count += image.raw().count(img, R.InPurodyuusu.T)
-    logger.info("Current skill card count: %d", count)
-    return count
+    return detect_hand_layout(img).count
 
 
 def detect_recommended_card(
@@ -393,6 +382,7 @@ def detect_recommended_card(
         threshold_predicate: Callable[[int, CardDetectResult], bool],
         *,
         img: MatLike | None = None,
+        layout: HandLayout | None = None,
     ):
     """
     识别推荐卡片
@@ -402,30 +392,50 @@ def detect_recommended_card(
 
     :param card_count: 卡片数量(2-4)
     :param threshold_predicate: 阈值判断函数
+    :param layout: 手牌布局，用于计算卡片位置。
     :return: 执行结果。若返回 None，表示未识别到推荐卡片。
     """
-    cards = calc_card_position(card_count)
+    cards = calc_card_position(card_count, layout)
     cards.append(SKIP_CARD_BUTTON)
 
     img = use_screenshot(img)
     if img is None:
         logger.warning("Screenshot unavailable while detecting recommended card.")
         return None
-    original_image = img.copy()
     results: list[CardDetectResult] = []
     coverage_map: dict[CardDetectResult, float] = {}
 
     GLOW_EXTENSION = 15
 
-    for x, y, w, h, return_value in cards:
-        outer = (max(0, x - GLOW_EXTENSION), max(0, y - GLOW_EXTENSION))
-        glow_area = img[outer[1]:y + h + GLOW_EXTENSION, outer[0]:x + w + GLOW_EXTENSION].copy()
-        area_h = glow_area.shape[0]
-        area_w = glow_area.shape[1]
-        if area_h == 0 or area_w == 0:
+    # 每张卡片（及 SKIP 按钮）外扩 GLOW_EXTENSION 后的发光区域，(x1, y1, x2, y2)
+    img_h, img_w = img.shape[:2]
+    glow_areas = [
+        (
+            max(0, x - GLOW_EXTENSION),
+            max(0, y - GLOW_EXTENSION),
+            min(img_w, x + w + GLOW_EXTENSION),
+            min(img_h, y + h + GLOW_EXTENSION),
+        )
+        for x, y, w, h, _ in cards
+    ]
+    # 对所有发光区域的外接矩形只做一次 HSV 转换与颜色筛选，
+    # 滤波仍按每张卡片的发光区域分别进行，结果与逐张处理相同
+    region_x1 = min(a[0] for a in glow_areas)
+    region_y1 = min(a[1] for a in glow_areas)
+    region_x2 = max(a[2] for a in glow_areas)
+    region_y2 = max(a[3] for a in glow_areas)
+    highlight_pixels = _extract_highlight_pixels(img[region_y1:region_y2, region_x1:region_x2])
+
+    for (x, y, w, h, return_value), (ax1, ay1, ax2, ay2) in zip(cards, glow_areas):
+        area_h = ay2 - ay1
+        area_w = ax2 - ax1
+        if area_h <= 0 or area_w <= 0:
             continue
 
-        highlight_mask = _extract_highlight_mask(glow_area, GLOW_EXTENSION)
+        highlight_mask = _extract_highlight_mask(
+            highlight_pixels[ay1-region_y1:ay2-region_y1, ax1-region_x1:ax2-region_x1].copy(),
+            GLOW_EXTENSION
+        )
 
         left_border = highlight_mask[:, 0:GLOW_EXTENSION]
         right_border = highlight_mask[:, max(0, area_w - GLOW_EXTENSION):area_w]
@@ -484,6 +494,7 @@ def detect_recommended_card(
         coverage_map.get(filtered_results[0], 0.0)
     )
     if conf().trace.recommend_card_detection:
+        original_image = img.copy()
         x, y, w, h = filtered_results[0].rect.xywh
         cv2.rectangle(original_image, (x, y), (x+w, y+h), (0, 0, 255), 3)
         trace('rec-card', original_image, {
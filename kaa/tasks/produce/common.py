@@ -1,4 +1,5 @@
 from typing import Literal
+from typing_extensions import assert_never
 from logging import getLogger
 
 from kotonebot import (
@@ -15,11 +16,13 @@ from kaa.tasks.start_game import wait_for_home
 from kotonebot.primitives import Rect
 from kaa.tasks import R
 from .p_drink import acquire_p_drink
+from .acquisition_scene import classify_acquisitions
 from kotonebot.util import measure_time
 from kaa.config import conf
 from kaa.tasks.actions.loading import loading
 from kaa.game_ui import CommuEventButtonUI, dialog, badge
 from kaa.tasks.actions.commu import handle_unread_commu
+from kaa.tasks.actions.wait import wait_until_stable
 
 logger = getLogger(__name__)
 
@@ -152,7 +155,7 @@ def handle_skill_card_removal():
     logger.debug("Handle skill card removal finished.")
 
 @action('继续当前培育.进入培育', screenshot_mode='manual-inherit')
-def resume_produce_pre() -> tuple[Literal['regular', 'pro', 'master'], int]:
+def resume_produce_pre() -> tuple[Literal['regular', 'pro', 'master'], int | None]:
     """
     继续当前培育.进入培育\n
     该函数用于处理‘日期变更’等情况；单独执行此函数时，要确保代码已经处于培育状态。
@@ -196,11 +199,10 @@ def resume_produce_pre() -> tuple[Literal['regular', 'pro', 'master'], int]:
         logger.warning(f'Failed to detect weeks. week_text="{week_text}". Retrying... ({retry_count}/{max_retries})')
         sleep(0.5)
         device.screenshot()
-    
-    if retry_count >= max_retries:
-        raise ValueError('Failed to detect weeks after multiple retries.')
+
     if current_week is None:
-        raise ValueError('Failed to detect current_week.')
+        # 无法确认周数时不使用进度存档，由之后的场景识别确定周数
+        logger.warning('Failed to detect weeks after multiple retries.')
     # 点击 再開する
     # [kotonebot-resource/sprites/jp/produce/produce_resume.png]
     logger.info('Click resume button.')
@@ -269,87 +271,73 @@ def fast_acquisitions() -> AcquisitionType | None:
         return "SkipCommu"
     device.click(10, 10)
 
-    # P饮料到达上限
-    logger.debug("Check PDrink max...")
-    # TODO: 需要封装一个更好的实现方式。比如 wait_stable？
-    if image.find(R.InPurodyuusu.TextPDrinkMax):
-        logger.debug("PDrink max found")
-        device.screenshot()
-        if image.find(R.InPurodyuusu.TextPDrinkMax):
-            # 有对话框标题，但是没找到确认按钮
-            # 可能是需要勾选一个饮料
-            if not image.find(R.InPurodyuusu.ButtonLeave, colored=True):
-                logger.info("No leave button found, click checkbox")
-                device.click(image.expect(R.Common.CheckboxUnchecked, colored=True))
-                sleep(0.2)
-                device.screenshot()
-            if leave := image.find(R.InPurodyuusu.ButtonLeave, colored=True):
-                logger.info("Leave button found")
-                device.click(leave)
-                return "PDrinkMax"
-    # P饮料到达上限 确认提示框
-    # [kotonebot-resource\sprites\jp\in_purodyuusu\screenshot_pdrink_max_confirm.png]
-    if image.find(R.InPurodyuusu.TextPDrinkMaxConfirmTitle):
-        logger.debug("PDrink max confirm found")
-        device.screenshot()
-        if image.find(R.InPurodyuusu.TextPDrinkMaxConfirmTitle):
-            if confirm := image.find(R.Common.ButtonConfirm):
-                logger.info("Confirm button found")
-                device.click(confirm)
-                return "PDrinkMax"
-    device.click(10, 10)
-
-    # 技能卡自选强化
-    if image.find(R.InPurodyuusu.IconTitleSkillCardEnhance):
-        if handle_skill_card_enhance():
-            return "PSkillCardEnhanceSelect"
-    device.click(10, 10)
-
-    # 技能卡自选删除
-    if image.find(R.InPurodyuusu.IconTitleSkillCardRemoval):
-        if handle_skill_card_removal():
-            return "PSkillCardRemoveSelect"
-    device.click(10, 10)
-
-    # 网络中断弹窗
-    logger.debug("Check network error popup...")
-    if (image.find(R.Common.TextNetworkError) 
-        and (btn_retry := image.find(R.Common.ButtonRetry))
-    ):
-        logger.info("Network error popup found")
-        device.click(btn_retry)
-        return "NetworkError"
-    device.click(10, 10)
-
-    # 物品选择对话框
-    logger.debug("Check award select dialog...")
-    if image.find(R.InPurodyuusu.TextClaim):
-        logger.info("Award select dialog found.")
-
-        # P饮料选择
-        logger.debug("Check PDrink select...")
-        if image.find(R.InPurodyuusu.TextPDrink):
+    # 在同一帧上一次性识别所有事件，再按优先级依次处理
+    scenes = classify_acquisitions(img)
+    while scenes:
+        scene, match = scenes.pop(0)
+        # P饮料到达上限
+        if scene == "PDrinkMax":
+            logger.debug("PDrink max found")
+            # TODO: 需要封装一个更好的实现方式。比如 wait_stable？
+            img = device.screenshot()
+            if image.find(R.InPurodyuusu.TextPDrinkMax):
+                # 有对话框标题，但是没找到确认按钮
+                # 可能是需要勾选一个饮料
+                if not image.find(R.InPurodyuusu.ButtonLeave, colored=True):
+                    logger.info("No leave button found, click checkbox")
+                    device.click(image.expect(R.Common.CheckboxUnchecked, colored=True))
+                    sleep(0.2)
+                    img = device.screenshot()
+                if leave := image.find(R.InPurodyuusu.ButtonLeave, colored=True):
+                    logger.info("Leave button found")
+                    device.click(leave)
+                    return "PDrinkMax"
+            # 画面已更新，其余事件需要在新的截图上重新识别
+            scenes = classify_acquisitions(img, after=scene)
+        # P饮料到达上限 确认提示框
+        # [kotonebot-resource\sprites\jp\in_purodyuusu\screenshot_pdrink_max_confirm.png]
+        elif scene == "PDrinkMaxConfirm":
+            logger.debug("PDrink max confirm found")
+            img = device.screenshot()
+            if image.find(R.InPurodyuusu.TextPDrinkMaxConfirmTitle):
+                if confirm := image.find(R.Common.ButtonConfirm):
+                    logger.info("Confirm button found")
+                    device.click(confirm)
+                    return "PDrinkMax"
+            scenes = classify_acquisitions(img, after=scene)
+        # 技能卡自选强化
+        elif scene == "PSkillCardEnhanceSelect":
+            if handle_skill_card_enhance():
+                return "PSkillCardEnhanceSelect"
+        # 技能卡自选删除
+        elif scene == "PSkillCardRemoveSelect":
+            if handle_skill_card_removal():
+                return "PSkillCardRemoveSelect"
+        # 网络中断弹窗
+        elif scene == "NetworkError":
+            logger.info("Network error popup found")
+            device.click(match)
+            return "NetworkError"
+        # 物品选择对话框
+        elif scene == "PDrinkSelect":
             logger.info("PDrink select found")
             acquire_p_drink()
             return "PDrinkSelect"
-        # 技能卡选择
-        logger.debug("Check skill card select...")
-        if image.find(R.InPurodyuusu.TextSkillCard):
+        elif scene == "PSkillCardSelect":
             logger.info("Acquire skill card found")
             acquire_skill_card()
             return "PSkillCardSelect"
-        # P物品选择
-        logger.debug("Check PItem select...")
-        if image.find(R.InPurodyuusu.TextPItem):
+        elif scene == "PItemSelect":
             logger.info("Acquire PItem found")
             select_p_item()
             return "PItemSelect"
-    device.click(10, 10)
-
-    # 日期变更
-    result = acquisition_date_change_dialog()
-    if result is not None:
-        return result
+        # 日期变更
+        elif scene == "DateChange":
+            result = acquisition_date_change_dialog()
+            if result is not None:
+                return result
+        else:
+            assert_never(scene)
     device.click(10, 10)
 
     return None
@@ -381,7 +369,8 @@ def commu_event():
             device.click(buttons[0])
         else:
             device.double_click(buttons[0])
-        sleep(2.5) # HACK: 为了防止点击后按钮还没消失就进行第二次检测
+        # 防止点击后按钮还没消失就进行第二次检测
+        wait_until_stable(timeout=2.5, min_wait=0.3)
         return True
     return False
     
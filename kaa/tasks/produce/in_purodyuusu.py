@@ -7,11 +7,17 @@ from kaa.game_ui.schedule import Schedule
 from kaa.tasks import R
 from ..actions import loading
 from kaa.game_ui import WhiteFilter, dialog
+from kaa.game_ui.hud import ExamRemainingTurnsText
+from kaa.game_ui.action_scene import action_scene_detector, LESSON_BUTTONS, FINAL_LESSON_BUTTONS
 from ..actions.scenes import at_home
 from .cards import do_cards, CardDetectResult
 from ..actions.commu import handle_unread_commu
+from ..actions.wait import wait_until_stable
+from .produce_state import (
+    ProduceMode, ProducePhase, WeekType, WEEK_SCHEDULES, exam_week, produce_checkpoint
+)
 from kotonebot.errors import UnrecoverableError
-from kotonebot.util import Countdown, cropped
+from kotonebot.util import Countdown
 from kotonebot.backend.loop import Loop
 from kaa.config import ProduceAction, RecommendCardDetectionMode
 from ..produce.common import until_acquisition_clear, commu_event, fast_acquisitions
@@ -71,72 +77,56 @@ def handle_recommended_action(final_week: bool = False) -> ProduceAction | None:
     """
     # 获取课程
     logger.debug("Getting recommended lesson...")
-    device.screenshot()
-    if not image.find(R.InPurodyuusu.IconAsariSenseiAvatar):
+    scene = action_scene_detector.frame(device.screenshot())
+    if not scene.sensei_avatar:
         return None
     cd = Countdown(sec=5).start()
-    result = None
-    for _ in Loop():
+    recommended = None
+    # 画面没有变化时直接沿用上一帧的识别结果
+    for _ in Loop(auto_screenshot=False):
         if cd.expired():
             break
         logger.debug('Retrieving recommended lesson...')
-        with cropped(device, y1=0.00, y2=0.30):
-            if result := image.find_multi([
-                R.InPurodyuusu.TextSenseiTipDance,
-                R.InPurodyuusu.TextSenseiTipVocal,
-                R.InPurodyuusu.TextSenseiTipVisual,
-                R.InPurodyuusu.TextSenseiTipRest,
-                R.InPurodyuusu.TextSenseiTipConsult,
-            ]):
-                break
+        scene = action_scene_detector.frame(device.screenshot())
+        if recommended := scene.sensei_tip:
+            break
 
-    logger.debug("image.find_multi: %s", result)
-    if result is None:
+    logger.debug("Sensei tip: %s", recommended)
+    if recommended is None:
         logger.debug("No recommended lesson found")
         return None
-    recommended = None
     # 普通周
     if not final_week:
-        if result.index == 0:
-            template = R.InPurodyuusu.ButtonPracticeDance
-            recommended = ProduceAction.DANCE
-            logger.info("Recommend lesson is dance.")
-        elif result.index == 1:
-            template = R.InPurodyuusu.ButtonPracticeVocal
-            recommended = ProduceAction.VOCAL
-            logger.info("Recommend lesson is vocal.")
-        elif result.index == 2:
-            template = R.InPurodyuusu.ButtonPracticeVisual
-            recommended = ProduceAction.VISUAL
-            logger.info("Recommend lesson is visual.")
-        elif result.index == 3:
-            rest()
-            return ProduceAction.REST
-        elif result.index == 4:
-            enter_consult()
-            return ProduceAction.CONSULT
-        else:
-            return None
+        match recommended:
+            case ProduceAction.REST:
+                rest()
+                return ProduceAction.REST
+            case ProduceAction.CONSULT:
+                enter_consult()
+                return ProduceAction.CONSULT
+            case ProduceAction.DANCE | ProduceAction.VOCAL | ProduceAction.VISUAL:
+                logger.info("Recommend lesson is %s.", recommended.value)
+            case _:
+                return None
         # 点击课程
         logger.debug("Try clicking lesson...")
-        x, y = image.expect_wait(template).rect.center
+        button = scene.lesson_buttons.get(recommended)
+        if button is None:
+            template = next(t for t, a in LESSON_BUTTONS if a == recommended)
+            button = image.expect_wait(template)
+        x, y = button.rect.center
         triple_click(x, y)
         return recommended
     # 冲刺周
     else:
-        if result.index == 0:
-            template = R.InPurodyuusu.ButtonFinalPracticeDance
-            recommended = ProduceAction.DANCE
-        elif result.index == 1:
-            template = R.InPurodyuusu.ButtonFinalPracticeVocal
-            recommended = ProduceAction.VOCAL
-        elif result.index == 2:
-            template = R.InPurodyuusu.ButtonFinalPracticeVisual
-            recommended = ProduceAction.VISUAL
-        else:
+        if recommended not in (ProduceAction.DANCE, ProduceAction.VOCAL, ProduceAction.VISUAL):
             return None
         logger.debug("Try clicking lesson...")
-        x, y = image.expect(template).rect.center
+        button = scene.final_lesson_buttons.get(recommended)
+        if button is None:
+            template = next(t for t, a in FINAL_LESSON_BUTTONS if a == recommended)
+            button = image.expect(template)
+        x, y = button.rect.center
         triple_click(x, y)
         return recommended
 
@@ -185,6 +175,89 @@ def until_exam_scene():
         else:
             break
 
+def practice_card_threshold(card_count: int, result: CardDetectResult, is_strict_mode: bool) -> bool:
+    """
+    练习中推荐卡的阈值判断。
+
+    :param card_count: 手牌数量。
+    :param result: 卡片的识别结果。
+    :param is_strict_mode: 是否为严格模式。
+    """
+    border_scores = (result.left_score, result.right_score, result.top_score, result.bottom_score)
+    if is_strict_mode:
+        return (
+            result.score >= 0.043
+            and len(list(filter(lambda x: x >= 0.04, border_scores))) >= 3
+        )
+    else:
+        return result.score >= 0.03
+    # is_strict_mode 见下方 exam_card_threshold() 中解释
+    # 严格模式下区别：
+    # 提高平均阈值，且同时要求至少有 3 边达到阈值。
+
+def exam_card_threshold(
+    type: Literal['mid', 'final'],
+    card_count: int,
+    result: CardDetectResult,
+    is_strict_mode: bool
+) -> bool:
+    """
+    考试中推荐卡的阈值判断。
+
+    :param type: 考试类型。
+    :param card_count: 手牌数量。
+    :param result: 卡片的识别结果。
+    :param is_strict_mode: 是否为严格模式。
+    """
+    total = lambda t: result.score >= t
+    def borders(t):
+        # 卡片数量小于三时无遮挡，以及最后一张卡片也总是无遮挡
+        if card_count <= 3 or (result.type == card_count - 1):
+            return (
+                result.left_score >= t
+                and result.right_score >= t
+                and result.top_score >= t
+                and result.bottom_score >= t
+            )
+        # 其他情况下，卡片的右侧会被挡住，并不会发光
+        else:
+            return (
+                result.left_score >= t
+                and result.top_score >= t
+                and result.bottom_score >= t
+            )
+
+    if is_strict_mode:
+        if type == 'final':
+            return total(0.4) and borders(0.2)
+        else:
+            return total(0.10) and borders(0.01)
+    else:
+        if type == 'final':
+            if result.type == 10: # SKIP
+                return total(0.4) and borders(0.02)
+            else:
+                return total(0.15) and borders(0.02)
+        else:
+            return total(0.10) and borders(0.01)
+
+    # 关于上面阈值的解释：
+    # 所有阈值均指卡片周围的“黄色度”，
+    # score 指卡片四边的平均黄色度阈值，
+    # left_score、right_score、top_score、bottom_score 指卡片每边的黄色度阈值
+
+    # 为什么期中和期末考试阈值不一样：
+    # 期末考试的场景为黄昏，背景中含有大量黄色，
+    # 非常容易对推荐卡的检测造成干扰。
+    # 解决方法是提高平均阈值的同时，为每一边都设置阈值。
+    # 这样可以筛选出只有四边都包含黄色的发光卡片，
+    # 而由夕阳背景造成的假发光卡片通常不会四边都包含黄色。
+
+    # 为什么需要严格模式：
+    # 严格模式主要用于琴音。琴音的服饰上有大量黄色元素，
+    # 很容易干扰检测，因此需要针对琴音专门调整阈值。
+    # 主要变化是给每一边都设置了阈值。
+
 @action('执行练习', screenshot_mode='manual')
 def practice():
     """
@@ -196,18 +269,8 @@ def practice():
     logger.info("Practice started")
 
     def threshold_predicate(card_count: int, result: CardDetectResult):
-        border_scores = (result.left_score, result.right_score, result.top_score, result.bottom_score)
         is_strict_mode = produce_solution().data.recommend_card_detection_mode == RecommendCardDetectionMode.STRICT
-        if is_strict_mode:
-            return (
-                result.score >= 0.043
-                and len(list(filter(lambda x: x >= 0.04, border_scores))) >= 3
-            )
-        else:
-            return result.score >= 0.03
-        # is_strict_mode 见下方 exam() 中解释
-        # 严格模式下区别：
-        # 提高平均阈值，且同时要求至少有 3 边达到阈值。
+        return practice_card_threshold(card_count, result, is_strict_mode)
 
     def end_predicate():
         return not image.find_multi([
@@ -233,58 +296,11 @@ def exam(type: Literal['mid', 'final']) -> bool:
 
     def threshold_predicate(card_count: int, result: CardDetectResult):
         is_strict_mode = produce_solution().data.recommend_card_detection_mode == RecommendCardDetectionMode.STRICT
-        total = lambda t: result.score >= t
-        def borders(t):
-            # 卡片数量小于三时无遮挡，以及最后一张卡片也总是无遮挡
-            if card_count <= 3 or (result.type == card_count - 1):
-                return (
-                    result.left_score >= t
-                    and result.right_score >= t
-                    and result.top_score >= t
-                    and result.bottom_score >= t
-                )
-            # 其他情况下，卡片的右侧会被挡住，并不会发光
-            else:
-                return (
-                    result.left_score >= t
-                    and result.top_score >= t
-                    and result.bottom_score >= t
-                )
-
-        if is_strict_mode:
-            if type == 'final':
-                return total(0.4) and borders(0.2)
-            else:
-                return total(0.10) and borders(0.01)
-        else:
-            if type == 'final':
-                if result.type == 10: # SKIP
-                    return total(0.4) and borders(0.02)
-                else:
-                    return total(0.15) and borders(0.02)
-            else:
-                return total(0.10) and borders(0.01)
-
-        # 关于上面阈值的解释：
-        # 所有阈值均指卡片周围的“黄色度”，
-        # score 指卡片四边的平均黄色度阈值，
-        # left_score、right_score、top_score、bottom_score 指卡片每边的黄色度阈值
-
-        # 为什么期中和期末考试阈值不一样：
-        # 期末考试的场景为黄昏，背景中含有大量黄色，
-        # 非常容易对推荐卡的检测造成干扰。
-        # 解决方法是提高平均阈值的同时，为每一边都设置阈值。
-        # 这样可以筛选出只有四边都包含黄色的发光卡片，
-        # 而由夕阳背景造成的假发光卡片通常不会四边都包含黄色。
-        
-        # 为什么需要严格模式：
-        # 严格模式主要用于琴音。琴音的服饰上有大量黄色元素，
-        # 很容易干扰检测，因此需要针对琴音专门调整阈值。
-        # 主要变化是给每一边都设置了阈值。
+        return exam_card_threshold(type, card_count, result, is_strict_mode)
 
     def end_predicate():
         return bool(
-            not ocr.find(contains('残りターン'), rect=R.InPurodyuusu.BoxExamTop)
+            not ExamRemainingTurnsText.find()
             and image.find(R.Common.ButtonNext)
         )
 
@@ -347,7 +363,7 @@ def produce_end(has_live: bool = True):
                 break
         # 选择封面
         logger.info("Use default cover.")
-        sleep(3)
+        wait_until_stable(timeout=3)
         logger.debug("Click next")
         device.click(image.expect_wait(R.InPurodyuusu.ButtonNextNoIcon))
         sleep(1)
@@ -559,6 +575,7 @@ def week_normal(week_first: bool = False):
             # 什么都不需要做
             pass
         case ProduceAction.DANCE | ProduceAction.VOCAL | ProduceAction.VISUAL:
+            produce_checkpoint.update_phase('practice')
             until_practice_scene()
             practice()
         case ProduceAction.RECOMMENDED:
@@ -568,6 +585,8 @@ def week_normal(week_first: bool = False):
             raise ValueError("Action is None.")
         case _:
             assert_never(action)
+    # 本周行动已完成，之后的获得物品、剧情等对话框都属于前往下一周的过程
+    produce_checkpoint.advance()
     until_action_scene()
 
 def week_final_lesson():
@@ -588,6 +607,7 @@ def week_final_lesson():
             # 什么都不需要做
             pass
         case ProduceAction.DANCE | ProduceAction.VOCAL | ProduceAction.VISUAL:
+            produce_checkpoint.update_phase('practice')
             until_practice_scene()
             practice()
         case ProduceAction.RECOMMENDED:
@@ -597,34 +617,114 @@ def week_final_lesson():
             raise ValueError("Action is None.")
         case _:
             assert_never(action)
+    produce_checkpoint.advance()
 
 def week_mid_and_final_exam_common():
     logger.info("Wait for exam scene...")
     until_exam_scene()
     logger.info("Exam scene detected.")
-    sleep(5)
+    # 等待考试开始动画
+    wait_until_stable(timeout=5, stable_time=1, min_wait=1)
     device.click_center()
     sleep(0.5)
     loading.wait_loading_end()
+    produce_checkpoint.update_phase('exam')
+
+def week_mid_exam(phase: ProducePhase = 'action') -> bool:
+    """
+    期中考试周。
 
-def week_mid_exam():
+    :param phase: 开始的阶段。
+    :return: 考试是否合格。不合格时培育结束。
+    """
     logger.info("Week mid exam started.")
 
-    week_mid_and_final_exam_common()
-    
-    if exam('mid'):
-        until_action_scene() # 考试通过
-    else:
-        produce_end(has_live=False) # 考试不合格
+    if phase == 'action':
+        week_mid_and_final_exam_common()
+    # 期中考试只有不合格时才会进入培育结束阶段
+    if phase != 'produce-end' and exam('mid'):
+        # 考试通过
+        produce_checkpoint.advance()
+        until_action_scene()
+        return True
+    produce_checkpoint.update_phase('produce-end')
+    produce_end(has_live=False) # 考试不合格
+    return False
 
-def week_final_exam():
-    logger.info("Week final exam started.")
+def week_final_exam(phase: ProducePhase = 'action'):
+    """
+    期末考试周。
 
-    week_mid_and_final_exam_common()
+    :param phase: 开始的阶段。
+    """
+    logger.info("Week final exam started.")
 
-    exam('final')
+    if phase == 'action':
+        week_mid_and_final_exam_common()
+    if phase != 'produce-end':
+        exam('final')
+        produce_checkpoint.update_phase('produce-end')
     produce_end()
 
+def run_week(week_type: WeekType, week_first: bool = False, phase: ProducePhase = 'action') -> bool:
+    """
+    执行一周的流程。
+
+    :param week_type: 周类型。
+    :param week_first: 是否为第一周。
+    :param phase: 开始的阶段。
+    :return: 培育是否继续。
+    """
+    # 行动场景的识别结果不跨周沿用
+    action_scene_detector.clear()
+    match week_type:
+        case 'normal' | 'final-lesson':
+            if phase == 'practice':
+                # 继续未完成的练习
+                practice()
+                produce_checkpoint.advance()
+                if week_type == 'normal':
+                    until_action_scene()
+            elif week_type == 'normal':
+                week_normal(week_first)
+            else:
+                week_final_lesson()
+            return True
+        case 'mid-exam':
+            return week_mid_exam(phase)
+        case 'final-exam':
+            week_final_exam(phase)
+            return False
+        case _:
+            assert_never(week_type)
+
+def run_hajime(mode: ProduceMode, start_from: int = 1, phase: ProducePhase = 'action'):
+    """
+    从指定的周与阶段开始，执行 Hajime 培育直到结束。
+    每周开始时与进入新阶段时都会更新进度存档，培育结束后删除存档。
+
+    :param mode: 培育模式。
+    :param start_from: 从第几周开始，从1开始。
+    :param phase: 第一周从哪个阶段开始。
+    """
+    schedule = WEEK_SCHEDULES[mode]
+    for week in range(start_from, len(schedule) + 1):
+        logger.info("Week %d started. phase=%s", week, phase)
+        produce_checkpoint.save(mode, week, phase)
+        if not run_week(schedule[week - 1], week == 1, phase):
+            break
+        phase = 'action'
+    produce_checkpoint.clear()
+
+def _run_hajime_weeks(mode: ProduceMode, week: int, start_from: int):
+    if week != -1:
+        logger.info("Week %d started.", week)
+        produce_checkpoint.save(mode, week)
+        if not run_week(WEEK_SCHEDULES[mode][week - 1], week == 1):
+            produce_checkpoint.clear()
+    else:
+        run_hajime(mode, start_from)
+
 @action('执行 Regular 培育', screenshot_mode='manual-inherit')
 def hajime_regular(week: int = -1, start_from: int = 1):
     """
@@ -633,30 +733,11 @@ def hajime_regular(week: int = -1, start_from: int = 1):
     :param week: 第几周，从1开始，-1表示全部
     :param start_from: 从第几周开始，从1开始。
     """
-    weeks = [
-        lambda: week_normal(True), # 1: Vo.レッスン、Da.レッスン、Vi.レッスン
-        week_normal, # 2: 授業
-        week_normal, # 3: Vo.レッスン、Da.レッスン、Vi.レッスン、授業
-        week_normal, # 4: おでかけ、相談、活動支給
-        week_final_lesson, # 5: 追い込みレッスン
-        week_mid_exam, # 6: 中間試験
-        week_normal, # 7: おでかけ、活動支給
-        week_normal, # 8: 授業、活動支給
-        week_normal, # 9: Vo.レッスン、Da.レッスン、Vi.レッスン
-        week_normal, # 10: Vo.レッスン、Da.レッスン、Vi.レッスン、授業
-        week_normal, # 11: おでかけ、相談、活動支給
-        week_final_lesson, # 12: 追い込みレッスン
-        week_final_exam, # 13: 最終試験
-    ]
     if week == 0 or start_from == 0:
         until_action_scene(True)
-    if week != -1:
-        logger.info("Week %d started.", week)
-        weeks[week - 1]()
-    else:
-        for i, w in enumerate(weeks[start_from-1:]):
-            logger.info("Week %d started.", i + start_from)
-            w()
+        week = 1 if week == 0 else week
+        start_from = max(start_from, 1)
+    _run_hajime_weeks('regular', week, start_from)
 
 @action('执行 PRO 培育', screenshot_mode='manual-inherit')
 def hajime_pro(week: int = -1, start_from: int = 1):
@@ -666,31 +747,7 @@ def hajime_pro(week: int = -1, start_from: int = 1):
     :param week: 第几周，从1开始，-1表示全部
     :param start_from: 从第几周开始，从1开始。
     """
-    weeks = [
-        lambda: week_normal(True), # 1
-        week_normal, # 2
-        week_normal, # 3
-        week_normal, # 4
-        week_normal, # 5
-        week_final_lesson, # 6
-        week_mid_exam, # 7
-        week_normal, # 8
-        week_normal, # 9
-        week_normal, # 10
-        week_normal, # 11
-        week_normal, # 12
-        week_normal, # 13
-        week_normal, # 14
-        week_final_lesson, # 15
-        week_final_exam, # 16
-    ]
-    if week != -1:
-        logger.info("Week %d started.", week)
-        weeks[week - 1]()
-    else:
-        for i, w in enumerate(weeks[start_from-1:]):
-            logger.info("Week %d started.", i + start_from)
-            w()
+    _run_hajime_weeks('pro', week, start_from)
 
 @action("执行 MASTER 培育", screenshot_mode='manual-inherit')
 def hajime_master(week: int = -1, start_from: int = 1):
@@ -700,38 +757,12 @@ def hajime_master(week: int = -1, start_from: int = 1):
     :param week: 第几周，从1开始，-1表示全部
     :param start_from: 从第几周开始，从1开始。
     """
-    weeks = [
-        lambda: week_normal(True), # 1
-        week_normal, # 2
-        week_normal, # 3
-        week_normal, # 4
-        week_normal, # 5
-        week_normal, # 6
-        week_final_lesson, # 7
-        week_mid_exam, # 8
-        week_normal, # 9
-        week_normal, # 10
-        week_normal, # 11
-        week_normal, # 12
-        week_normal, # 13
-        week_normal, # 14
-        week_normal, # 15
-        week_normal, # 16
-        week_final_lesson, # 17
-        week_final_exam, # 18
-    ]
-    if week != -1:
-        logger.info("Week %d started.", week)
-        weeks[week - 1]()
-    else:
-        for i, w in enumerate(weeks[start_from-1:]):
-            logger.info("Week %d started.", i + start_from)
-            w()
+    _run_hajime_weeks('master', week, start_from)
 
 @action('是否在考试场景')
 def is_exam_scene():
     """是否在考试场景"""
-    return ocr.find(contains('残りターン'), rect=R.InPurodyuusu.BoxExamTop) is not None
+    return ExamRemainingTurnsText.find()
 
 ProduceStage = Literal[
     'action', # 行动场景
@@ -780,9 +811,13 @@ def detect_produce_scene() -> ProduceStage:
     return 'unknown'
 
 @action('开始 Hajime 培育')
-def hajime_from_stage(stage: ProduceStage, type: Literal['regular', 'pro', 'master'], week: int):
+def hajime_from_stage(stage: ProduceStage, type: Literal['regular', 'pro', 'master'], week: int | None):
     """
     开始 Regular 培育。
+
+    :param stage: 当前场景。
+    :param type: 培育模式。
+    :param week: 当前周数。为 None 时，只能从行动场景与练习场景继续。
     """
     if stage == 'action':
         texts = ocr.ocr(rect=R.InPurodyuusu.BoxWeeksUntilExam, lang='en')
@@ -791,46 +826,22 @@ def hajime_from_stage(stage: ProduceStage, type: Literal['regular', 'pro', 'mast
         if not remaining_week:
             raise UnrecoverableError("Failed to detect week. text=" + repr(texts.squash()))
         # 判断阶段
-        match type:
-            case 'regular':
-                MID_WEEK = 6
-                FINAL_WEEK = 13
-                function = hajime_regular
-            case 'pro':
-                MID_WEEK = 7
-                FINAL_WEEK = 16
-                function = hajime_pro
-            case 'master':
-                MID_WEEK = 8
-                FINAL_WEEK = 18
-                function = hajime_master
-            case _:
-                assert_never(type)
         if image.find(R.InPurodyuusu.TextMidExamRemaining):
-            week = MID_WEEK - remaining_week[0]
-            function(start_from=week)
+            week = exam_week(type, 'mid') - remaining_week[0]
+            run_hajime(type, start_from=max(week, 1))
         elif image.find(R.InPurodyuusu.TextFinalExamRemaining):
-            week = FINAL_WEEK - remaining_week[0]
-            function(start_from=week)
+            week = exam_week(type, 'final') - remaining_week[0]
+            run_hajime(type, start_from=max(week, 1))
         else:
             raise UnrecoverableError("Failed to detect produce stage.")
     elif stage == 'exam-ongoing':
         # TODO: 应该直接调用 week_final_exam 而不是再写一次
         logger.info("Exam ongoing. Start exam.")
         
-        mid_exam_week = 6
-        match type:
-            case 'regular':
-                mid_exam_week = 6 # 第六周为期中考试
-            case 'pro':
-                mid_exam_week = 7
-            case 'master':
-                mid_exam_week = 8
-            case _:
-                assert_never(type)
-
         # 在考试进行一半时，继续培育
-        if week > mid_exam_week: # 判断在期中考，还是期末考
+        if week is None:
+            raise UnrecoverableError("Cannot resume exam without knowing the current week.")
+        if week > exam_week(type, 'mid'): # 判断在期中考，还是期末考
             exam('final')
             return produce_end()
         else:
@@ -847,32 +858,51 @@ def hajime_from_stage(stage: ProduceStage, type: Literal['regular', 'pro', 'mast
     else:
         raise UnrecoverableError(f'Cannot resume produce from stage "{stage}".')
 
+@action('继续 Hajime 培育')
+def resume_hajime_produce(mode: ProduceMode, week: int | None):
+    """
+    继续 Hajime 培育。
+    存在与当前周数一致的进度存档时，直接从存档的周与阶段继续，
+    否则识别当前场景与周数后继续。
+
+    :param mode: 培育模式。
+    :param week: 当前周数。无法识别时为 None，此时不使用进度存档。
+    """
+    checkpoint = produce_checkpoint.load(mode)
+    if checkpoint is not None and checkpoint.week == week:
+        logger.info("Resume produce from checkpoint: week %d, phase %s.", checkpoint.week, checkpoint.phase)
+        run_hajime(mode, checkpoint.week, checkpoint.phase)
+        return
+    if checkpoint is not None:
+        logger.warning("Produce checkpoint (week %d) does not match current week %s. Ignored.", checkpoint.week, week)
+    hajime_from_stage(detect_produce_scene(), mode, week)
+
 @action('继续 Regular 培育')
-def resume_regular_produce(week: int):
+def resume_regular_produce(week: int | None):
     """
     继续 Regular 培育。
     
-    :param week: 当前周数。
+    :param week: 当前周数。无法识别时为 None。
     """
-    hajime_from_stage(detect_produce_scene(), 'regular', week)
+    resume_hajime_produce('regular', week)
 
 @action('继续 PRO 培育')
-def resume_pro_produce(week: int):
+def resume_pro_produce(week: int | None):
     """
     继续 PRO 培育。
     
-    :param week: 当前周数。
+    :param week: 当前周数。无法识别时为 None。
     """
-    hajime_from_stage(detect_produce_scene(), 'pro', week)
+    resume_hajime_produce('pro', week)
 
 @action('继续 MASTER 培育')
-def resume_master_produce(week: int):
+def resume_master_produce(week: int | None):
     """
     继续 MASTER 培育。
     
-    :param week: 当前周数。
+    :param week: 当前周数。无法识别时为 None。
     """
-    hajime_from_stage(detect_produce_scene(), 'master', week)
+    resume_hajime_produce('master', week)
 
 if __name__ == '__main__':
     from logging import getLogger
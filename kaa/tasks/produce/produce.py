@@ -123,7 +123,7 @@ def select_set(index: int):
 @action('继续当前培育.继续培育', screenshot_mode='manual-inherit')
 def resume_produce_lst(
     mode: Literal['regular', 'pro', 'master'],
-    current_week: int
+    current_week: int | None
 ):
     """
     继续当前培育.继续培育\n
@@ -133,7 +133,7 @@ def resume_produce_lst(
     结束状态：游戏首页
 
     :param mode: 培育模式
-    :param current_week: 培育的周数
+    :param current_week: 培育的周数。无法识别时为 None
     """
 
     match mode:
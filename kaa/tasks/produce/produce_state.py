@@ -0,0 +1,172 @@
+"""
+Hajime 培育的周流程与进度存档。
+
+各模式每一周要执行的流程定义在 `WEEK_SCHEDULES` 中。
+培育进行时，每进入一个新的阶段都会把当前的模式、周数与阶段写入存档文件。
+脚本崩溃或日期变更后继续培育时，直接从存档的位置继续，
+不需要再通过 OCR 识别周数与当前场景。
+"""
+import os
+import time
+import logging
+from typing import Literal
+
+from pydantic import BaseModel, ValidationError
+
+from kaa.util.paths import cache
+
+logger = logging.getLogger(__name__)
+
+ProduceMode = Literal['regular', 'pro', 'master']
+WeekType = Literal[
+    'normal', # 普通周
+    'final-lesson', # 追い込みレッスン
+    'mid-exam', # 中間試験
+    'final-exam', # 最終試験
+]
+ProducePhase = Literal[
+    'action', # 周开始，位于行动场景或即将进入行动场景
+    'practice', # 已选择课程，练习进行中
+    'exam', # 考试进行中
+    'produce-end', # 考试结束后的培育结束流程
+]
+
+WEEK_SCHEDULES: dict[ProduceMode, tuple[WeekType, ...]] = {
+    'regular': (
+        'normal', # 1: Vo.レッスン、Da.レッスン、Vi.レッスン
+        'normal', # 2: 授業
+        'normal', # 3: Vo.レッスン、Da.レッスン、Vi.レッスン、授業
+        'normal', # 4: おでかけ、相談、活動支給
+        'final-lesson', # 5: 追い込みレッスン
+        'mid-exam', # 6: 中間試験
+        'normal', # 7: おでかけ、活動支給
+        'normal', # 8: 授業、活動支給
+        'normal', # 9: Vo.レッスン、Da.レッスン、Vi.レッスン
+        'normal', # 10: Vo.レッスン、Da.レッスン、Vi.レッスン、授業
+        'normal', # 11: おでかけ、相談、活動支給
+        'final-lesson', # 12: 追い込みレッスン
+        'final-exam', # 13: 最終試験
+    ),
+    'pro': (
+        *(('normal',) * 5), # 1~5
+        'final-lesson', # 6
+        'mid-exam', # 7
+        *(('normal',) * 7), # 8~14
+        'final-lesson', # 15
+        'final-exam', # 16
+    ),
+    'master': (
+        *(('normal',) * 6), # 1~6
+        'final-lesson', # 7
+        'mid-exam', # 8
+        *(('normal',) * 8), # 9~16
+        'final-lesson', # 17
+        'final-exam', # 18
+    ),
+}
+
+def exam_week(mode: ProduceMode, type: Literal['mid', 'final']) -> int:
+    """
+    获取考试所在的周数。
+
+    :param mode: 培育模式。
+    :param type: 考试类型。
+    :return: 周数，从 1 开始。
+    """
+    return WEEK_SCHEDULES[mode].index(f'{type}-exam') + 1 # type: ignore
+
+class ProduceCheckpoint(BaseModel):
+    mode: ProduceMode
+    """培育模式"""
+    week: int
+    """当前周数，从 1 开始"""
+    phase: ProducePhase = 'action'
+    """当前周所处的阶段"""
+    updated_at: float = 0
+    """最后更新的时间戳"""
+
+class ProduceCheckpointStore:
+    """培育进度存档。"""
+    def __init__(self, path: str, max_age: float = 7 * 24 * 3600):
+        """
+        :param path: 存档文件路径。
+        :param max_age: 存档的有效期（秒）。超过有效期的存档视为不存在。
+        """
+        self.path = path
+        self.max_age = max_age
+        self.__current: ProduceCheckpoint | None = None
+
+    def load(self, mode: ProduceMode | None = None) -> ProduceCheckpoint | None:
+        """
+        读取存档。
+
+        :param mode: 培育模式。指定时，只返回该模式的存档。
+        :return: 存档。不存在、已过期、无法解析或模式不符时返回 None。
+        """
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                checkpoint = ProduceCheckpoint.model_validate_json(f.read())
+        except (OSError, ValidationError):
+            logger.warning('Failed to read produce checkpoint %s.', self.path, exc_info=True)
+            return None
+        if time.time() - checkpoint.updated_at > self.max_age:
+            logger.info('Produce checkpoint expired.')
+            return None
+        if mode is not None and checkpoint.mode != mode:
+            logger.info('Produce checkpoint is for mode "%s", not "%s".', checkpoint.mode, mode)
+            return None
+        if not 1 <= checkpoint.week <= len(WEEK_SCHEDULES[checkpoint.mode]):
+            return None
+        return checkpoint
+
+    def save(self, mode: ProduceMode, week: int, phase: ProducePhase = 'action') -> ProduceCheckpoint:
+        """
+        写入存档。
+
+        :param mode: 培育模式。
+        :param week: 当前周数。
+        :param phase: 当前阶段。
+        """
+        checkpoint = ProduceCheckpoint(mode=mode, week=week, phase=phase, updated_at=time.time())
+        # 先写入临时文件再替换，避免写入中途崩溃导致存档损坏
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(checkpoint.model_dump_json())
+        os.replace(tmp_path, self.path)
+        self.__current = checkpoint
+        logger.debug('Produce checkpoint saved: %s', checkpoint)
+        return checkpoint
+
+    def update_phase(self, phase: ProducePhase) -> None:
+        """
+        更新当前存档的阶段。没有正在进行的培育时什么都不做。
+
+        :param phase: 当前阶段。
+        """
+        if self.__current is None:
+            return
+        self.save(self.__current.mode, self.__current.week, phase)
+
+    def advance(self) -> None:
+        """
+        当前周的行动（练习、考试等）已完成，把存档更新为下一周的行动阶段。
+        没有正在进行的培育或当前为最后一周时什么都不做。
+        """
+        if self.__current is None:
+            return
+        mode, week = self.__current.mode, self.__current.week
+        if week >= len(WEEK_SCHEDULES[mode]):
+            return
+        self.save(mode, week + 1, 'action')
+
+    def clear(self) -> None:
+        """删除存档。"""
+        self.__current = None
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+produce_checkpoint = ProduceCheckpointStore(cache('produce_checkpoint.json'))
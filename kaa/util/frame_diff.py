@@ -0,0 +1,64 @@
+import cv2
+import numpy as np
+from cv2.typing import MatLike
+
+class FrameChangeDetector:
+    """
+    画面变化检测。
+
+    把每一帧缩小并转为灰度后，与上一次判定为“有变化”的帧比较，
+    变化像素的比例超过阈值时视为画面发生了变化。
+    """
+    def __init__(
+        self,
+        *,
+        scale: int = 8,
+        pixel_threshold: int = 16,
+        ratio_threshold: float = 0.001,
+    ):
+        """
+        :param scale: 缩小倍数。
+        :param pixel_threshold: 缩小后单个像素灰度差超过此值时，视为该像素发生变化。
+        :param ratio_threshold: 变化像素占比超过此值时，视为画面发生变化。
+        """
+        self.scale = scale
+        self.pixel_threshold = pixel_threshold
+        self.ratio_threshold = ratio_threshold
+        self.changed_count = 0
+        """判定为有变化的帧数"""
+        self.unchanged_count = 0
+        """判定为无变化的帧数"""
+        self.__reference: np.ndarray | None = None
+
+    def thumbnail(self, img: MatLike) -> np.ndarray:
+        """缩小并转为灰度。"""
+        h, w = img.shape[:2]
+        size = (max(1, w // self.scale), max(1, h // self.scale))
+        small = cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small
+
+    def difference(self, a: np.ndarray, b: np.ndarray) -> float:
+        """两张缩略图中变化像素的比例。"""
+        if a.shape != b.shape:
+            return 1
+        diff = cv2.absdiff(a, b)
+        return cv2.countNonZero(cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)[1]) / diff.size
+
+    def changed(self, img: MatLike) -> bool:
+        """
+        判断画面相比上一次有变化的帧是否发生了变化。
+        有变化时，以此帧作为之后比较的基准。
+        """
+        small = self.thumbnail(img)
+        if self.__reference is not None and self.difference(small, self.__reference) <= self.ratio_threshold:
+            self.unchanged_count += 1
+            return False
+        self.__reference = small
+        self.changed_count += 1
+        return True
+
+    def reset(self) -> None:
+        """清除基准帧，下一帧总是视为有变化。"""
+        self.__reference = None
@@ -0,0 +1,73 @@
+"""
+把同一张截图中的多个小区域拼接为一张图片，只调用一次 OCR。
+
+OCR 会把过小的图片填充到 631x631 后再识别，多个小区域分别识别时，
+每次都要对整张填充后的图片做一次文字检测。拼接后只需检测一次。
+"""
+import logging
+
+import numpy as np
+from cv2.typing import MatLike
+from kotonebot.primitives import Rect
+from kotonebot.backend.ocr import Ocr, OcrResult, OcrResultList
+
+logger = logging.getLogger(__name__)
+
+CANVAS_SIZE = 631
+"""拼接图片的最小尺寸，与 `Ocr.ocr` 的填充尺寸相同"""
+REGION_GAP = 20
+"""各区域之间的间隔（像素），避免相邻区域的文字被识别为同一行"""
+
+def ocr_regions(
+    engine: Ocr,
+    img: MatLike,
+    rects: list[Rect],
+    *,
+    gap: int = REGION_GAP,
+) -> list[OcrResultList]:
+    """
+    识别截图中的多个区域。
+
+    各区域纵向排列在白色画布上，一次识别后按文字中心所在的区域分配结果。
+    返回结果中的 `original_rect` 为在原截图中的位置。
+
+    :param engine: OCR 引擎。
+    :param img: 截图。
+    :param rects: 要识别的区域列表。
+    :param gap: 各区域之间的间隔（像素）。
+    :return: 与 `rects` 一一对应的识别结果。
+    """
+    if not rects:
+        return []
+    crops = [img[r.y1:r.y2, r.x1:r.x2] for r in rects]
+    content_h = sum(c.shape[0] for c in crops) + gap * (len(crops) - 1)
+    content_w = max(c.shape[1] for c in crops)
+    canvas_h = max(CANVAS_SIZE, content_h)
+    canvas_w = max(CANVAS_SIZE, content_w)
+    canvas = np.full((canvas_h, canvas_w, 3), 255, dtype=np.uint8)
+    # 各区域在画布中的左上角坐标
+    offsets: list[tuple[int, int]] = []
+    y = (canvas_h - content_h) // 2
+    for crop in crops:
+        h, w = crop.shape[:2]
+        x = (canvas_w - w) // 2
+        canvas[y:y+h, x:x+w] = crop
+        offsets.append((x, y))
+        y += h + gap
+
+    results: list[list[OcrResult]] = [[] for _ in rects]
+    for r in engine.ocr(canvas, pad=False):
+        center_y = r.rect.y1 + r.rect.h / 2
+        for i, ((x, y), crop) in enumerate(zip(offsets, crops)):
+            if y <= center_y < y + crop.shape[0]:
+                rect = rects[i]
+                results[i].append(OcrResult(
+                    text=r.text,
+                    rect=r.rect,
+                    original_rect=Rect(r.rect.x1 - x + rect.x1, r.rect.y1 - y + rect.y1, r.rect.w, r.rect.h),
+                    confidence=r.confidence,
+                ))
+                break
+        else:
+            logger.debug('OCR result "%s" is outside of all regions. Ignored.', r.text)
+    return [OcrResultList(items) for items in results]
@@ -0,0 +1,254 @@
+"""
+`@action` 耗时统计。
+
+记录每次执行 `@action`（以及 `@task`）的耗时、截图次数、模板匹配次数与 OCR 次数，
+并按动作名称汇总最近若干次的分布，供 UI 展示或导出为 JSON。
+
+kotonebot 的 `@action` 装饰器没有提供回调，因此通过替换以下函数实现：
+* `ContextStackVars.push/pop`：每个动作开始/结束时各调用一次
+* `Device.screenshot`：截图
+* `kotonebot.backend.image.template_match`：`find`、`find_all`、`count` 等模板匹配
+* `Ocr.ocr`：`ocr`、`find`、`find_all` 等 OCR
+
+统计的数值均包含内部调用的子动作。
+"""
+import json
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, NamedTuple
+
+import numpy as np
+
+from kotonebot.client import Device
+from kotonebot.backend import image as kb_image
+from kotonebot.backend.ocr import Ocr
+from kotonebot.backend.context import ContextStackVars, current_callstack
+
+logger = logging.getLogger(__name__)
+
+HISTOGRAM_BUCKETS_MS = (10, 50, 100, 500, 1000, 5000, 10000, 60000)
+"""耗时直方图各区间的上界（毫秒）。最后一个区间为 60 秒以上"""
+
+class ActionSample(NamedTuple):
+    duration: float
+    """耗时（秒）"""
+    screenshots: int
+    template_matches: int
+    ocrs: int
+
+class _Entry:
+    __slots__ = ('name', 'callstack_depth', 'start', 'screenshots', 'template_matches', 'ocrs')
+
+    def __init__(self, name: str | None, callstack_depth: int):
+        self.name = name
+        """动作名称。为 None 表示不是由动作产生的上下文（如 `manual_context()`）"""
+        self.callstack_depth = callstack_depth
+        self.start = time.perf_counter()
+        self.screenshots = 0
+        self.template_matches = 0
+        self.ocrs = 0
+
+class ActionProfiler:
+    """`@action` 耗时统计。"""
+    def __init__(self, window: int = 200):
+        """
+        :param window: 每个动作保留的最近样本数。
+        """
+        self.window = window
+        self.__lock = threading.Lock()
+        self.__samples: dict[str, deque[ActionSample]] = {}
+        self.__totals: dict[str, list[float]] = {}
+        """动作名称 -> [总次数, 总耗时]"""
+        self.__stack: list[_Entry] = []
+        self.__originals: dict[str, Any] | None = None
+
+    @property
+    def installed(self) -> bool:
+        return self.__originals is not None
+
+    def install(self) -> None:
+        """开始统计。"""
+        if self.installed:
+            return
+        self.__originals = {
+            'push': ContextStackVars.__dict__['push'],
+            'pop': ContextStackVars.__dict__['pop'],
+            'screenshot': Device.screenshot,
+            'template_match': kb_image.template_match,
+            'ocr': Ocr.ocr,
+        }
+        push: Callable = ContextStackVars.push
+        pop: Callable = ContextStackVars.pop
+        screenshot = Device.screenshot
+        template_match = kb_image.template_match
+        ocr = Ocr.ocr
+
+        def _push(*args, **kwargs):
+            vars = push(*args, **kwargs)
+            self.__on_push()
+            return vars
+
+        def _pop():
+            last = pop()
+            self.__on_pop()
+            return last
+
+        def _screenshot(device, *args, **kwargs):
+            self.__count('screenshots')
+            return screenshot(device, *args, **kwargs)
+
+        def _template_match(*args, **kwargs):
+            self.__count('template_matches')
+            return template_match(*args, **kwargs)
+
+        def _ocr(engine, *args, **kwargs):
+            self.__count('ocrs')
+            return ocr(engine, *args, **kwargs)
+
+        ContextStackVars.push = staticmethod(_push) # type: ignore
+        ContextStackVars.pop = staticmethod(_pop) # type: ignore
+        Device.screenshot = _screenshot # type: ignore
+        kb_image.template_match = _template_match # type: ignore
+        Ocr.ocr = _ocr # type: ignore
+        logger.info('Action profiler installed.')
+
+    def uninstall(self) -> None:
+        """停止统计。已有的统计数据会保留。"""
+        originals = self.__originals
+        if originals is None:
+            return
+        ContextStackVars.push = originals['push'] # type: ignore
+        ContextStackVars.pop = originals['pop'] # type: ignore
+        Device.screenshot = originals['screenshot'] # type: ignore
+        kb_image.template_match = originals['template_match'] # type: ignore
+        Ocr.ocr = originals['ocr'] # type: ignore
+        self.__originals = None
+        self.__stack.clear()
+        logger.info('Action profiler uninstalled.')
+
+    def __on_push(self) -> None:
+        # 动作内抛出异常时，kotonebot 不会 pop，
+        # 因此以 ContextStackVars.stack 为准，丢弃多余的记录
+        depth = len(ContextStackVars.stack)
+        del self.__stack[depth - 1:]
+        callstack_depth = len(current_callstack)
+        name = current_callstack[-1].name if current_callstack else None
+        # manual_context() 等不会改变调用栈，此时不是动作
+        if self.__stack and self.__stack[-1].callstack_depth == callstack_depth:
+            name = None
+        self.__stack.append(_Entry(name, callstack_depth))
+
+    def __on_pop(self) -> None:
+        if len(self.__stack) <= len(ContextStackVars.stack):
+            return
+        entry = self.__stack.pop()
+        del self.__stack[len(ContextStackVars.stack):]
+        # 子动作的计数累加到父级
+        if self.__stack:
+            parent = self.__stack[-1]
+            parent.screenshots += entry.screenshots
+            parent.template_matches += entry.template_matches
+            parent.ocrs += entry.ocrs
+        if entry.name is None:
+            return
+        self.add(entry.name, ActionSample(
+            time.perf_counter() - entry.start,
+            entry.screenshots,
+            entry.template_matches,
+            entry.ocrs,
+        ))
+
+    def __count(self, field: str) -> None:
+        if self.__stack:
+            entry = self.__stack[-1]
+            setattr(entry, field, getattr(entry, field) + 1)
+
+    def add(self, name: str, sample: ActionSample) -> None:
+        """
+        添加一条样本。
+
+        :param name: 动作名称。
+        :param sample: 样本。
+        """
+        with self.__lock:
+            samples = self.__samples.get(name)
+            if samples is None:
+                samples = self.__samples[name] = deque(maxlen=self.window)
+                self.__totals[name] = [0, 0.0]
+            samples.append(sample)
+            totals = self.__totals[name]
+            totals[0] += 1
+            totals[1] += sample.duration
+
+    def clear(self) -> None:
+        """清空统计数据。"""
+        with self.__lock:
+            self.__samples.clear()
+            self.__totals.clear()
+
+    def summary(self) -> dict[str, dict[str, Any]]:
+        """
+        各动作的统计结果，按总耗时从高到低排列。
+
+        `count` 与 `total_s` 为全部调用的累计值，其余为最近 `window` 次调用的统计。
+        耗时单位为毫秒，`histogram` 为各区间（见 `HISTOGRAM_BUCKETS_MS`）内的调用次数。
+        """
+        with self.__lock:
+            items = [(name, list(samples), tuple(self.__totals[name])) for name, samples in self.__samples.items()]
+        result: dict[str, dict[str, Any]] = {}
+        for name, samples, (count, total) in sorted(items, key=lambda item: -item[2][1]):
+            data = np.array(samples, dtype=np.float64)
+            ms = data[:, 0] * 1000
+            histogram = np.bincount(
+                np.searchsorted(HISTOGRAM_BUCKETS_MS, ms, side='left'),
+                minlength=len(HISTOGRAM_BUCKETS_MS) + 1
+            )
+            result[name] = {
+                'count': int(count),
+                'total_s': float(total),
+                'mean_ms': float(ms.mean()),
+                'p50_ms': float(np.percentile(ms, 50)),
+                'p90_ms': float(np.percentile(ms, 90)),
+                'max_ms': float(ms.max()),
+                'screenshots': float(data[:, 1].mean()),
+                'template_matches': float(data[:, 2].mean()),
+                'ocrs': float(data[:, 3].mean()),
+                'histogram': [int(v) for v in histogram],
+            }
+        return result
+
+    def rows(self) -> list[list[Any]]:
+        """供 UI 表格显示的统计结果。"""
+        return [
+            [
+                name, s['count'], round(s['total_s'], 1), round(s['mean_ms'], 1), round(s['p50_ms'], 1),
+                round(s['p90_ms'], 1), round(s['max_ms'], 1),
+                round(s['screenshots'], 1), round(s['template_matches'], 1), round(s['ocrs'], 1),
+            ]
+            for name, s in self.summary().items()
+        ]
+
+    def export_json(self, path: str) -> None:
+        """
+        把统计结果导出为 JSON 文件。
+
+        :param path: 文件路径。
+        """
+        data = {
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'window': self.window,
+            'histogram_buckets_ms': list(HISTOGRAM_BUCKETS_MS),
+            'actions': self.summary(),
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+PROFILE_ROW_HEADERS = [
+    "动作", "次数", "总耗时(s)", "平均(ms)", "P50(ms)", "P90(ms)", "最大(ms)",
+    "截图/次", "模板匹配/次", "OCR/次",
+]
+"""`ActionProfiler.rows()` 各列的标题"""
+
+action_profiler = ActionProfiler()
@@ -0,0 +1,248 @@
+"""
+截图会话录制。
+
+录制每一次 `device.screenshot()` 的画面、每一次点击，以及当时正在执行的 `@action`，
+用于之后离线回放（见 `tools/replay_benchmark.py`）与调试识别逻辑。
+
+录制目录的结构：
+* `chunk_0000.mkv`, `chunk_0001.mkv`, ...：画面。每个文件最多 `chunk_frames` 帧，
+  默认使用 libx264rgb 无损编码，相邻帧之间只保存差异。
+* `events.jsonl`：每行一个事件。
+  * 帧：`{"type": "frame", "index": 帧序号, "chunk": 文件序号, "t": 毫秒, "action": 动作名称}`
+  * 点击：`{"type": "click", "x": x, "y": y, "t": 毫秒, "action": 动作名称}`
+
+编码与写入都在后台线程中进行。
+"""
+import os
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from fractions import Fraction
+from datetime import datetime
+from typing import Any, Iterator, NamedTuple
+
+import av
+from cv2.typing import MatLike
+
+from kotonebot.client import Device
+from kotonebot.backend.context import current_callstack
+
+logger = logging.getLogger(__name__)
+
+RECORD_DIR = './recordings/'
+EVENTS_FILE = 'events.jsonl'
+_TIME_BASE = Fraction(1, 1000)
+
+class _Frame(NamedTuple):
+    image: MatLike
+    t: int
+    action: str | None
+
+class _Click(NamedTuple):
+    x: int
+    y: int
+    t: int
+    action: str | None
+
+def _current_action() -> str | None:
+    return current_callstack[-1].name if current_callstack else None
+
+class SessionRecorder:
+    """截图会话录制器。"""
+    def __init__(
+        self,
+        *,
+        chunk_frames: int = 600,
+        queue_size: int = 64,
+        codec: str = 'libx264rgb',
+        codec_options: dict[str, str] | None = None,
+    ):
+        """
+        :param chunk_frames: 单个视频文件的最大帧数。
+        :param queue_size: 写入队列的最大长度。队列已满时丢弃最早的帧。
+        :param codec: 视频编码器。
+        :param codec_options: 编码器选项。默认为无损、最快的 x264 设置。
+        """
+        self.chunk_frames = chunk_frames
+        self.codec = codec
+        self.codec_options = codec_options or {'crf': '0', 'preset': 'ultrafast'}
+        self.frames = 0
+        """已写入的帧数"""
+        self.dropped = 0
+        """因队列已满而丢弃的帧数"""
+        self.path: str | None = None
+        """当前录制目录"""
+        self.__queue: queue.Queue[_Frame | _Click | None] = queue.Queue(maxsize=queue_size)
+        self.__thread: threading.Thread | None = None
+        self.__device: Device | None = None
+        self.__previous_hook = None
+        self.__start_time = 0.0
+        # 以下仅在后台线程中使用
+        self.__container: Any = None
+        self.__stream: Any = None
+        self.__chunk = -1
+        self.__chunk_size = 0
+        self.__shape: tuple[int, ...] | None = None
+        self.__last_pts = -1
+
+    @property
+    def recording(self) -> bool:
+        return self.__thread is not None
+
+    def start(self, device: Device, path: str | None = None) -> str:
+        """
+        开始录制。正在录制时，会先停止之前的录制。
+
+        :param device: 要录制的设备。
+        :param path: 录制目录。默认为 `./recordings/{YYYY-MM-DD HH-MM-SS}/`。
+        :return: 录制目录。
+        """
+        if self.recording:
+            self.stop()
+        if path is None:
+            path = os.path.join(RECORD_DIR, datetime.now().strftime('%Y-%m-%d %H-%M-%S'))
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.frames = 0
+        self.dropped = 0
+        self.__chunk = -1
+        self.__shape = None
+        self.__start_time = time.perf_counter()
+        self.__thread = threading.Thread(target=self.__run, args=(path,), name='SessionRecorder', daemon=True)
+        self.__thread.start()
+
+        self.__device = device
+        self.__previous_hook = device.screenshot_hook_after
+        device.screenshot_hook_after = self.__on_screenshot
+        device.click_hooks_before.append(self.__on_click)
+        logger.info('Session recording started: %s', path)
+        return path
+
+    def stop(self) -> None:
+        """停止录制，并等待已录制的帧全部写入。"""
+        thread = self.__thread
+        if thread is None:
+            return
+        device = self.__device
+        if device is not None:
+            device.screenshot_hook_after = self.__previous_hook
+            if self.__on_click in device.click_hooks_before:
+                device.click_hooks_before.remove(self.__on_click)
+        self.__device = None
+        self.__previous_hook = None
+        self.__queue.put(None)
+        thread.join()
+        self.__thread = None
+        logger.info('Session recording stopped: %d frames written, %d dropped.', self.frames, self.dropped)
+
+    def __now(self) -> int:
+        return int((time.perf_counter() - self.__start_time) * 1000)
+
+    def __put(self, item: _Frame | _Click) -> None:
+        while True:
+            try:
+                self.__queue.put_nowait(item)
+                return
+            except queue.Full:
+                pass
+            try:
+                self.__queue.get_nowait()
+                self.dropped += 1
+            except queue.Empty:
+                pass
+
+    def __on_screenshot(self, img: MatLike) -> MatLike:
+        if self.__previous_hook is not None:
+            img = self.__previous_hook(img)
+        # 点击时会在截图上绘制调试标记，需要复制一份
+        self.__put(_Frame(img.copy(), self.__now(), _current_action()))
+        return img
+
+    def __on_click(self, x: int, y: int) -> tuple[int, int]:
+        self.__put(_Click(x, y, self.__now(), _current_action()))
+        return x, y
+
+    def __run(self, path: str) -> None:
+        with open(os.path.join(path, EVENTS_FILE), 'a', encoding='utf-8') as events:
+            while True:
+                item = self.__queue.get()
+                if item is None:
+                    break
+                try:
+                    if isinstance(item, _Frame):
+                        event = self.__write_frame(path, item)
+                    else:
+                        event = {'type': 'click', 'x': item.x, 'y': item.y, 't': item.t, 'action': item.action}
+                    events.write(json.dumps(event, ensure_ascii=False) + '\n')
+                except Exception:
+                    logger.exception('Failed to record frame.')
+                if self.__queue.empty():
+                    events.flush()
+        self.__close_chunk()
+
+    def __write_frame(self, path: str, frame: _Frame) -> dict[str, Any]:
+        if (
+            self.__container is None
+            or self.__chunk_size >= self.chunk_frames
+            or frame.image.shape != self.__shape
+        ):
+            self.__open_chunk(path, frame.image)
+        video_frame = av.VideoFrame.from_ndarray(frame.image, format='bgr24')
+        # 同一毫秒内的多帧，时间戳依次后延，保证单调递增
+        self.__last_pts = max(frame.t, self.__last_pts + 1)
+        video_frame.pts = self.__last_pts
+        video_frame.time_base = _TIME_BASE
+        for packet in self.__stream.encode(video_frame):
+            self.__container.mux(packet)
+        event = {'type': 'frame', 'index': self.frames, 'chunk': self.__chunk, 't': frame.t, 'action': frame.action}
+        self.__chunk_size += 1
+        self.frames += 1
+        return event
+
+    def __open_chunk(self, path: str, image: MatLike) -> None:
+        self.__close_chunk()
+        self.__chunk += 1
+        self.__chunk_size = 0
+        self.__last_pts = -1
+        self.__shape = image.shape
+        h, w = image.shape[:2]
+        self.__container = av.open(os.path.join(path, f'chunk_{self.__chunk:04d}.mkv'), 'w')
+        stream = self.__container.add_stream(self.codec)
+        stream.width = w
+        stream.height = h
+        stream.pix_fmt = 'bgr24' if self.codec == 'libx264rgb' else 'yuv420p'
+        stream.time_base = _TIME_BASE
+        stream.options = self.codec_options
+        self.__stream = stream
+
+    def __close_chunk(self) -> None:
+        if self.__container is None:
+            return
+        for packet in self.__stream.encode():
+            self.__container.mux(packet)
+        self.__container.close()
+        self.__container = None
+        self.__stream = None
+
+def is_session(path: str) -> bool:
+    """判断目录是否为录制目录。"""
+    return os.path.isfile(os.path.join(path, EVENTS_FILE))
+
+def read_events(path: str) -> list[dict[str, Any]]:
+    """读取录制目录中的所有事件。"""
+    with open(os.path.join(path, EVENTS_FILE), 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def read_frames(path: str) -> Iterator[MatLike]:
+    """按顺序读取录制目录中的所有帧。"""
+    chunks = sorted(name for name in os.listdir(path) if name.startswith('chunk_') and name.endswith('.mkv'))
+    for name in chunks:
+        with av.open(os.path.join(path, name)) as container:
+            for frame in container.decode(video=0):
+                yield frame.to_ndarray(format='bgr24')
+
+session_recorder = SessionRecorder()
+atexit.register(session_recorder.stop)
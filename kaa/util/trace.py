@@ -1,35 +1,281 @@
 import os
 import json
 import uuid
-from typing import Any, Literal, TextIO
+import queue
+import atexit
+import logging
+import threading
+from collections import deque
+from typing import Any, Literal, NamedTuple, TextIO
 
 import cv2
 from cv2.typing import MatLike
 
-from kotonebot.util import cv2_imwrite
+from kaa.config import conf
+
+logger = logging.getLogger(__name__)
 
 TraceId = Literal['rec-card']
+TraceDropPolicy = Literal['drop_oldest', 'drop_newest', 'block']
+"""
+队列已满时的处理方式。
+
+* `drop_oldest`: 丢弃队列中最早的一条
+* `drop_newest`: 丢弃新提交的一条
+* `block`: 等待队列空出
+"""
+TraceImageFormat = Literal['png', 'png_fast', 'jpg', 'webp']
+"""
+图像保存格式。
+
+* `png`: 默认压缩等级的 PNG
+* `png_fast`: 只做霍夫曼编码的 PNG，仍然无损，编码更快但文件稍大
+* `jpg`/`webp`: 有损压缩，质量由 `image_quality` 指定
+"""
 TRACE_DIR = './traces/'
-_trace_files: dict[TraceId, TextIO] = {}
+LOG_MAX_BYTES = 4 * 1024 * 1024
+"""单个日志文件的大小上限，超出后重命名为 `.log.1`"""
 
-if not os.path.exists(TRACE_DIR):
-    os.makedirs(TRACE_DIR)
+_IMAGE_EXTENSIONS = ('.png', '.jpg', '.webp')
 
-def trace(id: TraceId, image: MatLike, message: str | dict[str, Any]):
-    file = None
-    dir = os.path.join(TRACE_DIR, id)
-    if id not in _trace_files:
-        if not os.path.exists(dir):
-            os.makedirs(dir)
+class _TraceItem(NamedTuple):
+    id: TraceId
+    image: MatLike
+    message: str
+
+class TraceWriter:
+    """
+    后台写入跟踪记录。
+
+    图像的编码与写入都在后台线程中进行，`submit` 只把记录放入有界队列。
+    跟踪目录中的图像总大小超过上限时，从最早的图像开始删除。
+    """
+    def __init__(
+        self,
+        trace_dir: str = TRACE_DIR,
+        *,
+        queue_size: int = 32,
+        drop_policy: TraceDropPolicy = 'drop_oldest',
+        image_format: TraceImageFormat = 'png',
+        image_quality: int = 90,
+        max_size_mb: float = 0,
+    ):
+        """
+        :param trace_dir: 跟踪目录。
+        :param queue_size: 队列的最大长度。
+        :param drop_policy: 队列已满时的处理方式。
+        :param image_format: 图像保存格式。
+        :param image_quality: jpg/webp 的压缩质量，1~100。
+        :param max_size_mb: 跟踪目录中图像的总大小上限（MB）。为 0 时不限制。
+        """
+        self.trace_dir = trace_dir
+        self.drop_policy: TraceDropPolicy = drop_policy
+        self.image_format: TraceImageFormat = image_format
+        self.image_quality = image_quality
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.written = 0
+        """已写入的记录数"""
+        self.dropped = 0
+        """因队列已满而丢弃的记录数"""
+        self.__queue: queue.Queue[_TraceItem | None] = queue.Queue(maxsize=queue_size)
+        self.__lock = threading.Lock()
+        self.__thread: threading.Thread | None = None
+        self.__files: dict[TraceId, TextIO] = {}
+        self.__images: deque[tuple[str, int]] = deque()
+        self.__images_size = 0
+
+    def submit(self, id: TraceId, image: MatLike, message: str | dict[str, Any]) -> bool:
+        """
+        提交一条跟踪记录。
+
+        图像会在后台线程中写入，提交后不应再修改。
+
+        :param id: 跟踪 ID。
+        :param image: 图像。
+        :param message: 附加信息。dict 会被序列化为 JSON。
+        :return: 是否已放入队列。`drop_newest` 策略下队列已满时返回 False。
+        """
+        if isinstance(message, dict):
+            message = json.dumps(message)
+        self.__ensure_started()
+        item = _TraceItem(id, image, message)
+        if self.drop_policy == 'block':
+            self.__queue.put(item)
+            return True
+        while True:
+            try:
+                self.__queue.put_nowait(item)
+                return True
+            except queue.Full:
+                pass
+            if self.drop_policy == 'drop_newest':
+                self.__drop()
+                return False
+            try:
+                self.__queue.get_nowait()
+            except queue.Empty:
+                continue
+            self.__queue.task_done()
+            self.__drop()
+
+    def flush(self) -> None:
+        """等待队列中的记录全部写入。"""
+        if self.__thread is not None:
+            self.__queue.join()
+
+    def close(self) -> None:
+        """写入队列中剩余的记录，然后停止后台线程。"""
+        with self.__lock:
+            thread, self.__thread = self.__thread, None
+        if thread is None:
+            return
+        self.__queue.put(None)
+        thread.join()
+
+    def __drop(self) -> None:
+        self.dropped += 1
+        if self.dropped == 1 or self.dropped % 100 == 0:
+            logger.warning('Trace queue full. %d trace(s) dropped so far.', self.dropped)
+
+    def __ensure_started(self) -> None:
+        if self.__thread is not None:
+            return
+        with self.__lock:
+            if self.__thread is not None:
+                return
+            self.__thread = threading.Thread(target=self.__run, name='TraceWriter', daemon=True)
+            self.__thread.start()
+
+    def __run(self) -> None:
+        # 不限制大小时不会删除图像，也不需要统计已有的图像
+        if self.max_size > 0:
+            self.__scan_images()
+        while True:
+            item = self.__queue.get()
+            try:
+                if item is None:
+                    break
+                self.__write(item)
+            except Exception:
+                logger.exception('Failed to write trace.')
+            finally:
+                self.__queue.task_done()
+            # 队列暂时为空时再把日志刷到磁盘，避免每条记录都 flush
+            if self.__queue.empty():
+                for file in self.__files.values():
+                    file.flush()
+        for file in self.__files.values():
+            file.close()
+        self.__files.clear()
+
+    def __encode(self, image: MatLike) -> tuple[str, bytes]:
+        if self.image_format == 'png':
+            ext, params = '.png', []
+        elif self.image_format == 'png_fast':
+            ext, params = '.png', [
+                cv2.IMWRITE_PNG_COMPRESSION, 1,
+                cv2.IMWRITE_PNG_STRATEGY, cv2.IMWRITE_PNG_STRATEGY_HUFFMAN_ONLY,
+            ]
+        elif self.image_format == 'jpg':
+            ext, params = '.jpg', [cv2.IMWRITE_JPEG_QUALITY, self.image_quality]
+        elif self.image_format == 'webp':
+            ext, params = '.webp', [cv2.IMWRITE_WEBP_QUALITY, self.image_quality]
+        else:
+            raise ValueError(f'Unknown trace image format: {self.image_format}')
+        ok, buffer = cv2.imencode(ext, image, params)
+        if not ok:
+            raise ValueError('Failed to encode trace image.')
+        return ext, buffer.tobytes()
+
+    def __write(self, item: _TraceItem) -> None:
+        dir = os.path.join(self.trace_dir, item.id)
+        file = self.__log_file(item.id, dir)
+        ext, data = self.__encode(item.image)
+        image_name = uuid.uuid4().hex + ext
+        image_path = os.path.join(dir, image_name)
+        with open(image_path, 'wb') as f:
+            f.write(data)
+        self.__add_image(image_path, len(data))
+        file.write(f'{image_name}\n{item.message}\n')
+        self.written += 1
+
+    def __log_file(self, id: TraceId, dir: str) -> TextIO:
+        file = self.__files.get(id)
+        if file is not None and file.tell() < LOG_MAX_BYTES:
+            return file
+        if file is not None:
+            file.close()
+            path = os.path.join(dir, id + '.log')
+            os.replace(path, path + '.1')
+        os.makedirs(dir, exist_ok=True)
         file = open(os.path.join(dir, id + '.log'), 'a+', encoding='utf-8')
-        _trace_files[id] = file
-    else:
-        file = _trace_files[id]
-
-    image_name = uuid.uuid4().hex
-    cv2_imwrite(os.path.join(dir, image_name + '.png'), image)
-    if isinstance(message, dict):
-        message = json.dumps(message)
-    message = f'{image_name}.png\n{message}\n'
-    file.write(message)
-    file.flush()
+        self.__files[id] = file
+        return file
+
+    def __scan_images(self) -> None:
+        """统计跟踪目录中已有的图像，按修改时间从早到晚排列。"""
+        images: list[tuple[float, str, int]] = []
+        for root, _, files in os.walk(self.trace_dir):
+            for name in files:
+                if not name.endswith(_IMAGE_EXTENSIONS):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                images.append((stat.st_mtime, path, stat.st_size))
+        images.sort()
+        self.__images = deque((path, size) for _, path, size in images)
+        self.__images_size = sum(size for _, _, size in images)
+        self.__rotate()
+
+    def __add_image(self, path: str, size: int) -> None:
+        if self.max_size <= 0:
+            return
+        self.__images.append((path, size))
+        self.__images_size += size
+        self.__rotate()
+
+    def __rotate(self) -> None:
+        if self.max_size <= 0:
+            return
+        removed = 0
+        # 至少保留最新的一张
+        while self.__images_size > self.max_size and len(self.__images) > 1:
+            path, size = self.__images.popleft()
+            self.__images_size -= size
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        if removed:
+            logger.debug('Removed %d old trace image(s).', removed)
+
+_writer: TraceWriter | None = None
+_writer_lock = threading.Lock()
+
+def _default_writer() -> TraceWriter:
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                options = conf().trace
+                _writer = TraceWriter(
+                    queue_size=options.queue_size,
+                    drop_policy=options.drop_policy,
+                    image_format=options.image_format,
+                    image_quality=options.image_quality,
+                    max_size_mb=options.max_size_mb,
+                )
+                atexit.register(_writer.close)
+    return _writer
+
+def trace(id: TraceId, image: MatLike, message: str | dict[str, Any]):
+    """
+    记录一条跟踪。图像在后台线程中写入，提交后不应再修改。
+
+    写入选项在第一次调用时从配置中读取。
+    """
+    _default_writer().submit(id, image, message)
@@ -0,0 +1,40 @@
+from unittest import TestCase
+
+from kotonebot.backend.core import cv2_imread
+
+from kaa.tasks.produce.acquisition_scene import classify_acquisitions
+
+SCREENSHOTS = 'kotonebot-resource/sprites/jp/'
+
+
+class TestAcquisitionScene(TestCase):
+    def classify(self, screenshot: str, after=None) -> list[str]:
+        img = cv2_imread(SCREENSHOTS + screenshot)
+        return [m.scene for m in classify_acquisitions(img, after)]
+
+    def test_classify(self):
+        """测试各类获取事件的识别"""
+        cases = [
+            ('in_purodyuusu/screenshot_pdrink_max_confirm.png', ['PDrinkMaxConfirm']),
+            ('in_purodyuusu/screenshot_skill_card_enhance_dialog.png', ['PSkillCardEnhanceSelect']),
+            ('in_purodyuusu/screenshot_skill_card_enhance_dialog_selected.png', ['PSkillCardEnhanceSelect']),
+            ('in_purodyuusu/screenshot_remove_skill_card.png', ['PSkillCardRemoveSelect']),
+            ('in_purodyuusu/screenshot_select_p_drink.png', ['PDrinkSelect']),
+            ('in_purodyuusu/screenshot_select_p_drink_full.png', ['PDrinkSelect']),
+            ('in_purodyuusu/screenshot_select_skill_card.png', ['PSkillCardSelect']),
+            ('in_purodyuusu/screenshot_select_skill_card_2.png', ['PSkillCardSelect']),
+            ('in_purodyuusu/screenshot_select_p_item.png', ['PItemSelect']),
+            ('daily/screenshot_date_change.png', ['DateChange']),
+            ('in_purodyuusu/screenshot_action_1.png', []),
+            ('in_purodyuusu/produce_exam_1.png', []),
+            ('in_purodyuusu/screenshot_skill_card_acquired.png', []),
+        ]
+        for screenshot, expected in cases:
+            with self.subTest(screenshot=screenshot):
+                self.assertEqual(self.classify(screenshot), expected)
+
+    def test_after(self):
+        """测试只识别优先级较低的场景"""
+        self.assertEqual(self.classify('in_purodyuusu/screenshot_pdrink_max_confirm.png', 'PDrinkMaxConfirm'), [])
+        self.assertEqual(self.classify('in_purodyuusu/screenshot_select_p_item.png', 'PDrinkMax'), ['PItemSelect'])
+        self.assertEqual(self.classify('in_purodyuusu/screenshot_select_p_item.png', 'PItemSelect'), [])
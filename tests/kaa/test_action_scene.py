@@ -0,0 +1,41 @@
+from unittest import TestCase
+
+from kotonebot.backend.core import cv2_imread
+
+from kaa.config import ProduceAction
+from kaa.game_ui.action_scene import ActionSceneDetector
+
+SCREENSHOTS = 'kotonebot-resource/sprites/jp/in_purodyuusu/'
+LESSONS = {ProduceAction.VOCAL, ProduceAction.DANCE, ProduceAction.VISUAL}
+
+
+class TestActionScene(TestCase):
+    def test_detect(self):
+        """测试老师推荐、课程按钮与 SP 图标的识别"""
+        cases = [
+            ('screenshot_action_1.png', ProduceAction.VOCAL, LESSONS, 0),
+            ('screenshot_sp.png', ProduceAction.VISUAL, LESSONS, 1),
+            ('screenshot_sensei_tip_consult.png', ProduceAction.CONSULT, set(), 0),
+        ]
+        for name, tip, buttons, sp_count in cases:
+            with self.subTest(name=name):
+                frame = ActionSceneDetector().frame(cv2_imread(SCREENSHOTS + name))
+                self.assertTrue(frame.sensei_avatar)
+                self.assertEqual(frame.sensei_tip, tip)
+                self.assertEqual(set(frame.lesson_buttons), buttons)
+                self.assertEqual(len(frame.sp_icons), sp_count)
+
+    def test_memoize(self):
+        """测试同一帧与无变化的帧沿用识别结果，画面变化后重新识别"""
+        detector = ActionSceneDetector()
+        img = cv2_imread(SCREENSHOTS + 'screenshot_sp.png')
+        frame = detector.frame(img)
+        self.assertIs(detector.frame(img), frame)
+        self.assertIs(detector.frame(img.copy()), frame)
+        other = detector.frame(cv2_imread(SCREENSHOTS + 'screenshot_action_1.png'))
+        self.assertIsNot(other, frame)
+        self.assertEqual((detector.hits, detector.misses), (2, 2))
+        # 清空后不再沿用之前的结果
+        detector.clear()
+        self.assertIsNot(detector.frame(img), frame)
+        self.assertEqual(detector.misses, 3)
@@ -0,0 +1,85 @@
+from types import SimpleNamespace
+from unittest import TestCase
+from unittest.mock import patch
+
+from kotonebot.backend.core import cv2_imread
+from kotonebot.backend.context.context import ManualContextManager
+from kaa.game_ui.hand_layout import hand_layout_detector
+from kaa.tasks.produce.cards import calc_card_position, detect_hand_layout, detect_recommended_card, skill_card_count
+from kaa.tasks.produce.in_purodyuusu import practice_card_threshold, exam_card_threshold
+
+SCREENSHOTS = 'kotonebot-resource/sprites/jp/in_purodyuusu/'
+FIXTURES = 'tests/images/produce/'
+
+
+# 原先硬编码的手牌位置：手牌数量 -> (第一张卡片的 x, 卡片间距)，卡片宽度为 192
+CARD_START_X_DELTA_X = {1: (264, 0), 2: (156, 24), 3: (47, 25), 4: (17, -27), 5: (17, -68)}
+
+
+class TestHandCards(TestCase):
+    def setUp(self):
+        hand_layout_detector.clear()
+        self.addCleanup(hand_layout_detector.clear)
+
+    def test_count(self):
+        """测试手牌数量识别，以及根据识别到的布局计算的卡片位置与原先硬编码的位置基本一致"""
+        cases = [
+            ('screenshot_1_cards.png', 1),
+            ('screenshot_drink_test.png', 2),
+            ('produce_exam_1.png', 3),
+            ('screenshot_4_cards.png', 4),
+            ('screenshot_5_cards.png', 5),
+        ]
+        for screenshot, count in cases:
+            with self.subTest(screenshot=screenshot):
+                img = cv2_imread(SCREENSHOTS + screenshot)
+                self.assertEqual(skill_card_count(img), count)
+                start, delta = CARD_START_X_DELTA_X[count]
+                positions = calc_card_position(count, detect_hand_layout(img))
+                self.assertEqual(len(positions), count)
+                for i, actual in enumerate(positions):
+                    self.assertLessEqual(abs(actual.x - (start + (192 + delta) * i)), 3)
+
+
+class TestRecommendedCard(TestCase):
+    PREDICATES = {
+        'practice': lambda n, r: practice_card_threshold(n, r, False),
+        'practice_strict': lambda n, r: practice_card_threshold(n, r, True),
+        'mid': lambda n, r: exam_card_threshold('mid', n, r, False),
+        'final': lambda n, r: exam_card_threshold('final', n, r, False),
+        'final_strict': lambda n, r: exam_card_threshold('final', n, r, True),
+    }
+
+    def setUp(self):
+        hand_layout_detector.clear()
+        self.addCleanup(hand_layout_detector.clear)
+        conf = SimpleNamespace(trace=SimpleNamespace(recommend_card_detection=False))
+        patcher = patch('kaa.tasks.produce.cards.conf', new=lambda: conf)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_thresholds(self):
+        """测试各阈值下识别到的推荐卡，与逐张卡片计算分数时的结果一致"""
+        # 截图, 手牌数量, 各阈值下的推荐卡（None 表示未识别到）
+        cases = [
+            (SCREENSHOTS + 'produce_exam_1.png', 3, (0, 0, 0, 0, None)),
+            (SCREENSHOTS + 'screenshot_4_cards.png', 4, (3, 3, 3, 3, None)),
+            (SCREENSHOTS + 'screenshot_5_cards.png', 5, (0, 0, 0, 0, None)),
+            (SCREENSHOTS + 'screenshot_lesson_5_cards.png', 5, (None,) * 5),
+            (FIXTURES + 'in_produce_cards_2.png', 2, (0, None, None, None, None)),
+            (FIXTURES + 'in_produce_cards_3.png', 3, (1, None, None, None, None)),
+            (FIXTURES + 'in_produce_cards_4.png', 4, (2, None, None, None, None)),
+            # 最高分为 0.0293，略低于练习的阈值 0.03
+            (FIXTURES + 'in_produce_cards_4_1.png', 4, (None,) * 5),
+            (FIXTURES + 'recommended_card_4_3_0.png', 4, (None,) * 5),
+            (FIXTURES + 'recommended_card_3_-1_0.png', 3, (None,) * 5),
+        ]
+        for path, count, expected in cases:
+            img = cv2_imread(path)
+            layout = detect_hand_layout(img)
+            self.assertEqual(layout.count, count, path)
+            for (name, predicate), expected_type in zip(self.PREDICATES.items(), expected):
+                with self.subTest(screenshot=path, threshold=name):
+                    with ManualContextManager():
+                        result = detect_recommended_card(count, predicate, img=img, layout=layout)
+                    self.assertEqual(result.type if result is not None else None, expected_type)
@@ -0,0 +1,35 @@
+from unittest import TestCase
+
+from kaa.db.catalogue import Catalogue
+
+
+class TestCatalogue(TestCase):
+    def setUp(self):
+        self.calls = 0
+        self.rows = [('a', 1), ('b', 2), ('a', 3)]
+        def loader():
+            self.calls += 1
+            return list(self.rows)
+        self.catalogue = Catalogue('test', loader, lambda row: row[0])
+
+    def test_lazy_load_once(self):
+        """测试首次访问时才载入，且之后的查询不再载入"""
+        self.assertEqual(self.calls, 0)
+        self.assertEqual(self.catalogue.get('b'), ('b', 2))
+        self.assertIsNone(self.catalogue.get('c'))
+        self.assertEqual(len(self.catalogue.all()), 3)
+        self.assertEqual(self.catalogue.keys(), frozenset({'a', 'b'}))
+        self.assertEqual(self.calls, 1)
+
+    def test_duplicate_key_keeps_first(self):
+        """测试重复键保留第一条数据"""
+        self.assertEqual(self.catalogue.get('a'), ('a', 1))
+
+    def test_refresh(self):
+        """测试刷新后重新载入数据"""
+        self.catalogue.get('a')
+        self.rows.append(('c', 4))
+        self.assertIsNone(self.catalogue.get('c'))
+        self.catalogue.refresh()
+        self.assertEqual(self.catalogue.get('c'), ('c', 4))
+        self.assertEqual(self.calls, 2)
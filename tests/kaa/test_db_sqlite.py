@@ -0,0 +1,54 @@
+import os
+import sqlite3
+import tempfile
+import threading
+from unittest import TestCase
+from unittest.mock import patch
+
+from kaa.db import sqlite as db_sqlite
+
+
+def reset_pool():
+    """丢弃当前线程的连接，并关闭连接池中的空闲连接。"""
+    if hasattr(db_sqlite._local, 'lease'):
+        del db_sqlite._local.lease
+    while not db_sqlite._idle.empty():
+        db_sqlite._idle.get_nowait().close()
+
+
+class TestConnectionPool(TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        conn = sqlite3.connect(self.path)
+        conn.execute('CREATE TABLE T (id TEXT, name TEXT);')
+        conn.execute("INSERT INTO T VALUES ('1', 'a');")
+        conn.commit()
+        conn.close()
+        self.patcher = patch.object(db_sqlite, '_db_path', self.path)
+        self.patcher.start()
+        reset_pool()
+
+    def tearDown(self):
+        reset_pool()
+        self.patcher.stop()
+        os.remove(self.path)
+
+    def test_thread_connection_returned_to_pool(self):
+        """测试线程结束后连接回到连接池，并被下一个线程复用"""
+        connections = []
+        def worker():
+            connections.append(db_sqlite._ensure_db())
+            self.assertEqual(db_sqlite.select('SELECT name FROM T WHERE id = ?;', '1')[0], 'a')
+        for _ in range(3):
+            t = threading.Thread(target=worker)
+            t.start()
+            t.join()
+        self.assertEqual(len(connections), 3)
+        self.assertTrue(all(c is connections[0] for c in connections))
+        self.assertEqual(db_sqlite._idle.qsize(), 1)
+
+    def test_read_only(self):
+        """测试连接为只读"""
+        with self.assertRaises(sqlite3.OperationalError):
+            db_sqlite._ensure_db().execute("INSERT INTO T VALUES ('2', 'b');")
@@ -0,0 +1,126 @@
+from collections import deque
+from unittest import TestCase
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+
+from kaa.tasks import R
+from kaa.game_ui.drinks_overview import preprocess_drink_slot_img, DrinkSlotCache
+
+
+def _reference_preprocess(img: np.ndarray) -> np.ndarray:
+    """逐像素 BFS 的原始实现，用于对照。"""
+    BLUE_THRESHOLD = 255
+    FLOOD_BLUE_THRESHOLD = 240
+    FLOOD_COLOR_THRESHOLD = 230
+
+    h, w, _ = img.shape
+    b, g, r = cv2.split(img)
+    mask = (b >= BLUE_THRESHOLD)
+    g[mask] = 255
+    b[mask] = 255
+    r[mask] = 255
+    img = cv2.merge([b, g, r])
+
+    visited = np.zeros((h, w), dtype=bool)
+    q = deque()
+    for x in range(w):
+        q.append((0, x))
+        q.append((h - 1, x))
+    for y in range(h):
+        q.append((y, 0))
+        q.append((y, w - 1))
+    right_top_x = w / 2
+    right_top_y = h / 4
+
+    while q:
+        y, x = q.popleft()
+        if not (0 <= x < w and 0 <= y < h):
+            continue
+        if visited[y, x]:
+            continue
+        visited[y, x] = True
+        img[y, x] = [255, 255, 255]
+        for dy, dx in [(-1,0), (1,0), (0,-1), (0,1)]:
+            ny, nx = y + dy, x + dx
+            if 0 <= nx < w and 0 <= ny < h and not (nx > right_top_x and ny < right_top_y) and not visited[ny, nx] and not np.all(img[ny, nx] >= FLOOD_COLOR_THRESHOLD) and not (img[ny, nx][0] >= FLOOD_BLUE_THRESHOLD):
+                q.append((ny, nx))
+    return img
+
+
+class TestPreprocessDrinkSlot(TestCase):
+    def assertSameAsReference(self, img: np.ndarray):
+        original = img.copy()
+        expected = _reference_preprocess(img.copy())
+        actual = preprocess_drink_slot_img(img)
+        np.testing.assert_array_equal(actual, expected)
+        # 不应修改输入图像
+        np.testing.assert_array_equal(img, original)
+
+    def test_screenshots(self):
+        """测试饮品测试截图中三个饮品槽的处理结果与原始实现逐像素一致"""
+        screenshots = [
+            R.InPurodyuusu.ScreenshotDrinkTest,
+            R.InPurodyuusu.ScreenshotDrinkTest3,
+            R.InPurodyuusu.Screenshot1Cards,
+            R.InPurodyuusu.Screenshot4Cards,
+            R.InPurodyuusu.Screenshot5Cards,
+            R.InPurodyuusu.ScreenshotSenseiTipConsult,
+        ]
+        boxes = [
+            R.InPurodyuusu.BoxDrink1,
+            R.InPurodyuusu.BoxDrink2,
+            R.InPurodyuusu.BoxDrink3,
+        ]
+        for screenshot in screenshots:
+            img = screenshot.data
+            for box in boxes:
+                with self.subTest(screenshot=screenshot.name, box=box.name):
+                    x, y, w, h = box.rect
+                    self.assertSameAsReference(img[y:y+h, x:x+w])
+
+    def test_synthetic(self):
+        """测试包含白色圆圈、右上角泄露与蓝色像素的合成图像"""
+        rng = np.random.default_rng(0)
+        for _ in range(20):
+            img = rng.integers(0, 200, (68, 68, 3), dtype=np.uint8)
+            # 白色圆圈把内部与边缘隔开，右上角留一个缺口
+            cv2.circle(img, (34, 34), 26, (255, 255, 255), 2)
+            cv2.line(img, (40, 0), (50, 30), (int(rng.integers(0, 200)),) * 3, 3)
+            # 随机的接近白色与高蓝色像素
+            noise = rng.random((68, 68))
+            img[noise < 0.05] = (235, 235, 235)
+            img[(noise >= 0.05) & (noise < 0.08), 0] = 245
+            img[(noise >= 0.08) & (noise < 0.1), 0] = 255
+            self.assertSameAsReference(img)
+
+
+class TestDrinkSlotCache(TestCase):
+    def test_cache_hit(self):
+        """测试相同的饮品槽图像只会匹配一次，且命中率统计正确"""
+        cache = DrinkSlotCache(max_size=2)
+        calls = []
+        def fake_match(img):
+            calls.append(img)
+            return None
+        with patch('kaa.game_ui.drinks_overview.match_first_drinks', fake_match):
+            a = np.zeros((68, 68, 3), dtype=np.uint8)
+            b = np.full((68, 68, 3), 10, dtype=np.uint8)
+            c = np.full((68, 68, 3), 20, dtype=np.uint8)
+            cache.match(a)
+            cache.match(a.copy())
+            self.assertEqual(len(calls), 1)
+            self.assertEqual(cache.hits, 1)
+            self.assertEqual(cache.misses, 1)
+            self.assertAlmostEqual(cache.hit_rate, 0.5)
+
+            # 超出容量时淘汰最久未使用的项
+            cache.match(b)
+            cache.match(a)
+            cache.match(c)
+            self.assertEqual(len(cache), 2)
+            cache.match(b)
+            self.assertEqual(len(calls), 4)
+            cache.match(a)
+            self.assertEqual(len(calls), 5)
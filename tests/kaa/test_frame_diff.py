@@ -0,0 +1,33 @@
+from unittest import TestCase
+
+import cv2
+import numpy as np
+
+from kaa.util.frame_diff import FrameChangeDetector
+
+
+class TestFrameChangeDetector(TestCase):
+    def test_changed(self):
+        """测试静止画面被跳过，局部变化与累积变化能被检测到"""
+        detector = FrameChangeDetector()
+        img = np.full((1280, 720, 3), 80, dtype=np.uint8)
+        self.assertTrue(detector.changed(img))
+        # 轻微噪声视为无变化
+        noisy = img.copy()
+        noisy[::7, ::5] = 90
+        self.assertFalse(detector.changed(noisy))
+        # 卡片边缘出现发光
+        glow = img.copy()
+        cv2.rectangle(glow, (264, 883), (456, 1135), (0, 220, 255), 10)
+        self.assertTrue(detector.changed(glow))
+        self.assertFalse(detector.changed(glow))
+        self.assertEqual(detector.changed_count, 2)
+        self.assertEqual(detector.unchanged_count, 2)
+
+    def test_reset(self):
+        """测试重置后下一帧总是视为有变化"""
+        detector = FrameChangeDetector()
+        img = np.zeros((1280, 720, 3), dtype=np.uint8)
+        detector.changed(img)
+        detector.reset()
+        self.assertTrue(detector.changed(img))
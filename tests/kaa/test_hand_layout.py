@@ -0,0 +1,58 @@
+from unittest import TestCase
+
+import cv2
+
+from kotonebot.backend.core import cv2_imread
+from kaa.game_ui.hand_layout import HandLayoutDetector, expected_layout
+
+SCREENSHOTS = 'kotonebot-resource/sprites/jp/in_purodyuusu/'
+CASES = [
+    ('screenshot_1_cards.png', 1),
+    ('screenshot_drink_test.png', 2),
+    ('produce_exam_1.png', 3),
+    ('screenshot_4_cards.png', 4),
+    ('screenshot_5_cards.png', 5),
+]
+
+
+class TestHandLayout(TestCase):
+    def assertLayoutClose(self, actual, expected, delta: int = 3):
+        self.assertEqual(actual.count, expected.count)
+        for a, e in zip(actual.cards, expected.cards):
+            for va, ve in zip(a, e):
+                self.assertLessEqual(abs(va - ve), delta)
+
+    def test_expected_layout(self):
+        """测试按排列规则计算的位置与原先硬编码的坐标基本一致"""
+        table = {1: (264, 0), 2: (156, 24), 3: (47, 25), 4: (17, -27), 5: (17, -68)}
+        for count, (start, delta) in table.items():
+            xs = [start + (delta + 192) * i for i in range(count)]
+            for (x, _, _, _), expected in zip(expected_layout(count).cards, xs):
+                self.assertLessEqual(abs(x - expected), 1, count)
+        self.assertEqual(expected_layout(7).count, 7)
+
+    def test_detect(self):
+        """测试从截图识别手牌布局，包括非 720x1280 的截图"""
+        detector = HandLayoutDetector()
+        for screenshot, count in CASES:
+            with self.subTest(screenshot=screenshot):
+                img = cv2_imread(SCREENSHOTS + screenshot)
+                self.assertLayoutClose(detector.detect(img), expected_layout(count))
+                big = cv2.resize(img, (1080, 1920))
+                self.assertLayoutClose(detector.detect(big), expected_layout(count, 1.5), delta=4)
+        # 识别到的布局按数量缓存
+        self.assertEqual(detector.layout_for(5), detector.detect(big))
+
+    def test_cache(self):
+        """测试字母区域不变时直接使用缓存"""
+        detector = HandLayoutDetector()
+        img = cv2_imread(SCREENSHOTS + 'screenshot_4_cards.png')
+        layout = detector.detect(img)
+        # 修改字母区域以外的像素
+        other = img.copy()
+        other[:800] = 0
+        self.assertIs(detector.detect(other), layout)
+        self.assertEqual((detector.hits, detector.misses), (1, 1))
+        detector.clear()
+        detector.detect(img)
+        self.assertEqual(detector.misses, 2)
@@ -0,0 +1,41 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from kotonebot.backend.core import cv2_imread
+from kaa.game_ui.hud import HudText, NoSkillCardText, ExamRemainingTurnsText
+
+SCREENSHOTS = 'kotonebot-resource/sprites/jp/in_purodyuusu/'
+
+
+class TestHudText(TestCase):
+    def assertTemplate(self, hud, screenshot: str, expected: bool):
+        with self.subTest(text=hud.text, screenshot=screenshot):
+            self.assertEqual(hud.find_template(cv2_imread(SCREENSHOTS + screenshot)), expected)
+
+    def test_no_skill_card(self):
+        """测试「0枚」的模板识别"""
+        self.assertTemplate(NoSkillCardText, 'screenshot_lesson_no_card.png', True)
+        self.assertTemplate(NoSkillCardText, 'screenshot_5_cards.png', False)
+        self.assertTemplate(NoSkillCardText, 'screenshot_1_cards.png', False)
+
+    def test_exam_remaining_turns(self):
+        """测试考试场景「残りターン」的模板识别，练习场景的「残りターン数」不应识别"""
+        self.assertTemplate(ExamRemainingTurnsText, 'produce_exam_1.png', True)
+        self.assertTemplate(ExamRemainingTurnsText, 'screenshot_1_cards.png', True)
+        self.assertTemplate(ExamRemainingTurnsText, 'screenshot_drink_test.png', True)
+        self.assertTemplate(ExamRemainingTurnsText, 'screenshot_5_cards.png', False)
+        self.assertTemplate(ExamRemainingTurnsText, 'screenshot_lesson_5_cards.png', False)
+        self.assertTemplate(ExamRemainingTurnsText, 'screenshot_action_1.png', False)
+
+    def test_negative_without_ocr(self):
+        """测试不含文字的画面直接判定为未命中，不调用 OCR"""
+        for hud, screenshot in [
+            (NoSkillCardText, 'screenshot_5_cards.png'),
+            (ExamRemainingTurnsText, 'screenshot_lesson_5_cards.png'),
+            (ExamRemainingTurnsText, 'screenshot_action_1.png'),
+        ]:
+            with self.subTest(text=hud.text, screenshot=screenshot):
+                hud = HudText(hud.text, hud.template, hud.rect)
+                with patch.object(hud, 'find_ocr', side_effect=AssertionError('OCR should not be called')):
+                    self.assertFalse(hud.find(cv2_imread(SCREENSHOTS + screenshot)))
+                self.assertEqual(hud.stats.misses, 1)
@@ -0,0 +1,342 @@
+import os
+import tempfile
+from typing import Any, Iterator
+from unittest import TestCase
+
+import numpy as np
+
+from kaa.image_db import ImageDatabase, HistDescriptor, FileDataSource, LazyImageDatabase
+from kaa.image_db.db import chi2_distance
+from kotonebot.util import cv2_imwrite
+
+
+def _solid(b: int, g: int, r: int, size: int = 24) -> np.ndarray:
+    img = np.zeros((size, size, 3), dtype=np.uint8)
+    img[:, :] = (b, g, r)
+    return img
+
+
+class ListDataSource:
+    def __init__(self, items: list[tuple[str, Any]]):
+        self.items = items
+
+    def __iter__(self) -> Iterator[tuple[str, Any]]:
+        return iter(self.items)
+
+
+class TestImageDatabase(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.images = {
+            'red.png': _solid(0, 0, 255),
+            'green.png': _solid(0, 255, 0),
+            'blue.png': _solid(255, 0, 0),
+            'dark_red.png': _solid(0, 0, 120),
+            'white.png': _solid(255, 255, 255),
+        }
+        self.db = ImageDatabase(
+            ListDataSource(list(self.images.items())),
+            os.path.join(self.tmp_dir, 'test'),
+            HistDescriptor(8),
+            name='test'
+        )
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _brute_force(self, query: np.ndarray, threshold: float) -> list[tuple[str, float]]:
+        query_feature = self.db.descriptor(query)
+        results = []
+        for key, feature in self.db.db.data.items():
+            dist = float(chi2_distance(query_feature, feature))
+            if dist < threshold:
+                results.append((key, dist))
+        results.sort(key=lambda x: x[1])
+        return results
+
+    def test_chi2_distance_broadcast(self):
+        """测试卡方距离对特征矩阵的广播计算"""
+        rng = np.random.default_rng(0)
+        query = rng.random(16)
+        matrix = rng.random((5, 16))
+        expected = [chi2_distance(query, row) for row in matrix]
+        np.testing.assert_allclose(chi2_distance(query, matrix), expected)
+
+    def test_match_all_same_as_brute_force(self):
+        """测试向量化查询结果与逐条计算一致"""
+        query = _solid(0, 0, 250)
+        expected = self._brute_force(query, 114514)
+        results = self.db.match_all(query, 114514)
+        self.assertEqual([r.key for r in results], [k for k, _ in expected])
+        np.testing.assert_allclose(
+            [r.distance for r in results],
+            [d for _, d in expected],
+            rtol=1e-4
+        )
+
+    def test_match_all_threshold(self):
+        """测试距离阈值过滤"""
+        query = self.images['green.png']
+        results = self.db.match_all(query, threshold=1)
+        self.assertEqual([r.key for r in results], ['green.png'])
+
+    def test_match_all_top_k(self):
+        """测试 top_k 只返回最近的前 k 个结果"""
+        query = _solid(0, 0, 250)
+        full = self.db.match_all(query, 114514)
+        for k in range(1, len(full) + 2):
+            top = self.db.match_all(query, 114514, top_k=k)
+            self.assertEqual([r.key for r in top], [r.key for r in full[:k]])
+
+    def test_match(self):
+        """测试最佳匹配"""
+        result = self.db.match(self.images['blue.png'])
+        assert result is not None
+        self.assertEqual(result.key, 'blue.png')
+        self.assertAlmostEqual(result.distance, 0, places=4)
+
+    def test_insert_updates_index(self):
+        """测试插入新记录后索引会被更新"""
+        self.db.match(self.images['red.png'])
+        self.db.insert('yellow.png', _solid(0, 255, 255))
+        result = self.db.match(_solid(0, 255, 255))
+        assert result is not None
+        self.assertEqual(result.key, 'yellow.png')
+
+
+class TestImageDatabaseBulkInsert(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        rng = np.random.default_rng(0)
+        self.images = {
+            f'{i:03d}.png': rng.integers(0, 256, (40, 30, 3), dtype=np.uint8)
+            for i in range(40)
+        }
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _open(self, name: str, workers: int) -> tuple[ImageDatabase, list[tuple[int, int]]]:
+        progress: list[tuple[int, int]] = []
+        db = ImageDatabase(
+            ListDataSource([]),
+            os.path.join(self.tmp_dir, name),
+            HistDescriptor(8),
+            workers=workers,
+            progress=lambda done, total: progress.append((done, total))
+        )
+        return db, progress
+
+    def test_parallel_same_as_sequential(self):
+        """测试并行建库结果与顺序建库一致，且顺序确定"""
+        sequential, _ = self._open('sequential', 1)
+        sequential.insert_many(self.images)
+        parallel, progress = self._open('parallel', 4)
+        parallel.insert_many(self.images)
+
+        self.assertEqual(parallel.db.data.keys(), sequential.db.data.keys())
+        self.assertEqual(list(parallel.db.data.keys()), list(self.images.keys()))
+        np.testing.assert_array_equal(parallel.db.features, sequential.db.features)
+        self.assertEqual(progress, [(i, 40) for i in range(1, 41)])
+
+    def test_skip_existing(self):
+        """测试不覆盖时跳过已存在的记录"""
+        db, progress = self._open('skip', 4)
+        db.insert('000.png', self.images['001.png'])
+        db.insert_many(self.images)
+        self.assertEqual(len(progress), 39)
+        np.testing.assert_array_equal(db.db.data['000.png'], db.descriptor(self.images['001.png']).astype(np.float32))
+
+    def test_error(self):
+        """测试损坏的图片会抛出异常"""
+        db, _ = self._open('error', 4)
+        images: dict[str, Any] = dict(self.images)
+        images['broken.png'] = 'not_exists.png'
+        with self.assertRaises(Exception):
+            db.insert_many(images)
+
+
+class TestLazyImageDatabase(TestCase):
+    def test_get_without_warm_up(self):
+        """测试未预载入时在调用方线程载入"""
+        created: list[object] = []
+        def factory():
+            obj = object()
+            created.append(obj)
+            return obj
+        lazy = LazyImageDatabase('test', factory) # type: ignore[arg-type]
+        self.assertEqual(lazy.status().state, 'pending')
+        self.assertIs(lazy.get(), created[0])
+        self.assertIs(lazy.get(), created[0])
+        self.assertEqual(len(created), 1)
+        self.assertEqual(lazy.status().state, 'ready')
+
+    def test_get_waits_for_warm_up(self):
+        """测试预载入未完成时 get() 阻塞等待，且只载入一次"""
+        import threading
+        release = threading.Event()
+        calls: list[int] = []
+        def factory():
+            calls.append(1)
+            release.wait(5)
+            return 'db'
+        lazy = LazyImageDatabase('test', factory) # type: ignore[arg-type]
+        lazy.warm_up()
+        lazy.warm_up()
+        self.assertEqual(lazy.status().state, 'loading')
+        threading.Timer(0.2, release.set).start()
+        self.assertEqual(lazy.get(), 'db')
+        self.assertEqual(len(calls), 1)
+        status = lazy.status()
+        self.assertEqual(status.state, 'ready')
+        self.assertIsNotNone(status.load_seconds)
+        self.assertGreater(status.wait_seconds, 0)
+
+    def test_warm_up_error_retried(self):
+        """测试后台载入失败后，get() 会在调用方线程重试"""
+        import time
+        calls: list[int] = []
+        def factory():
+            calls.append(1)
+            if len(calls) == 1:
+                raise ValueError('broken')
+            return 'db'
+        lazy = LazyImageDatabase('test', factory) # type: ignore[arg-type]
+        lazy.warm_up()
+        deadline = time.time() + 5
+        while lazy.status().state != 'error' and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(lazy.status().state, 'error')
+        self.assertEqual(lazy.get(), 'db')
+        self.assertEqual(len(calls), 2)
+
+
+class CountingDescriptor(HistDescriptor):
+    def __init__(self, bin_count: int):
+        super().__init__(bin_count)
+        self.calls = 0
+
+    def __call__(self, image):
+        self.calls += 1
+        return super().__call__(image)
+
+
+class TestImageDatabasePersistence(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.img_dir = os.path.join(self.tmp_dir, 'images')
+        os.makedirs(self.img_dir)
+        self.db_path = os.path.join(self.tmp_dir, 'cache', 'test')
+        os.makedirs(os.path.dirname(self.db_path))
+        cv2_imwrite(os.path.join(self.img_dir, 'red.png'), _solid(0, 0, 255))
+        cv2_imwrite(os.path.join(self.img_dir, 'green.png'), _solid(0, 255, 0))
+        cv2_imwrite(os.path.join(self.img_dir, 'blue.png'), _solid(255, 0, 0))
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _open(self) -> tuple[ImageDatabase, CountingDescriptor]:
+        descriptor = CountingDescriptor(8)
+        db = ImageDatabase(FileDataSource(self.img_dir), self.db_path, descriptor, name='test')
+        return db, descriptor
+
+    def test_build_and_reload(self):
+        """测试首次建库后再次载入时不会重新计算特征"""
+        db, descriptor = self._open()
+        self.assertEqual(descriptor.calls, 3)
+        self.assertTrue(os.path.exists(self.db_path + '.npy'))
+        self.assertTrue(os.path.exists(self.db_path + '.json'))
+        expected = db.match_all(_solid(0, 0, 250), 114514)
+
+        db2, descriptor2 = self._open()
+        self.assertEqual(descriptor2.calls, 0)
+        self.assertEqual(db2.db.count(), 3)
+        self.assertIsInstance(db2.db.features, np.memmap)
+        # 查询本身会调用一次描述器
+        actual = db2.match_all(_solid(0, 0, 250), 114514)
+        self.assertEqual([r.key for r in actual], [r.key for r in expected])
+        np.testing.assert_allclose([r.distance for r in actual], [r.distance for r in expected])
+
+    def test_incremental_update(self):
+        """测试只重新计算新增与修改过的文件，并移除已删除的文件"""
+        self._open()
+        # 修改、新增、删除
+        cv2_imwrite(os.path.join(self.img_dir, 'red.png'), _solid(0, 255, 255))
+        cv2_imwrite(os.path.join(self.img_dir, 'white.png'), _solid(255, 255, 255))
+        os.remove(os.path.join(self.img_dir, 'blue.png'))
+
+        db, descriptor = self._open()
+        self.assertEqual(descriptor.calls, 2)
+        self.assertEqual(sorted(db.db.keys), ['green.png', 'red.png', 'white.png'])
+        result = db.match(_solid(0, 255, 255))
+        assert result is not None
+        self.assertEqual(result.key, 'red.png')
+
+        db, descriptor = self._open()
+        self.assertEqual(descriptor.calls, 0)
+        self.assertEqual(sorted(db.db.keys), ['green.png', 'red.png', 'white.png'])
+
+    def test_touched_file_not_redescribed(self):
+        """测试内容未变、仅修改时间变化的文件不会重新计算特征"""
+        self._open()
+        path = os.path.join(self.img_dir, 'green.png')
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        db, descriptor = self._open()
+        self.assertEqual(descriptor.calls, 0)
+        self.assertEqual(db.db.files['green.png'].mtime_ns, stat.st_mtime_ns + 10**9)
+
+    def test_corrupted_cache(self):
+        """测试缓存损坏时重新建库"""
+        self._open()
+        with open(self.db_path + '.json', 'w', encoding='utf-8') as f:
+            f.write('{')
+        db, descriptor = self._open()
+        self.assertEqual(descriptor.calls, 3)
+        self.assertEqual(db.db.count(), 3)
+
+
+def _reference_hist(image: np.ndarray, bin_count: int) -> np.ndarray:
+    """逐区域调用 `cv2.calcHist` 的原始实现，用于对照。"""
+    import cv2
+    img = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    height, width = img.shape[:2]
+    features = np.array([])
+    for i in range(3):
+        for j in range(3):
+            mask = np.zeros(img.shape[:2], dtype=np.uint8)
+            mask[i * height // 3:(i + 1) * height // 3, j * width // 3:(j + 1) * width // 3] = 255
+            hist = cv2.calcHist(
+                [img], [0, 1, 2], mask,
+                [bin_count, bin_count, bin_count],
+                [0, 180, 0, 256, 0, 256]
+            )
+            hist = cv2.normalize(hist, hist)
+            features = np.append(features, hist.flatten())
+    return features
+
+
+class TestHistDescriptor(TestCase):
+    def test_same_as_calc_hist(self):
+        """测试与逐区域 calcHist 的结果一致"""
+        import cv2
+        rng = np.random.default_rng(0)
+        images = [
+            rng.integers(0, 256, (68, 68, 3), dtype=np.uint8),
+            rng.integers(0, 256, (190, 140, 3), dtype=np.uint8),
+            rng.integers(0, 256, (7, 11, 3), dtype=np.uint8),
+            rng.integers(0, 256, (2, 2, 3), dtype=np.uint8),
+            _solid(0, 0, 255),
+            cv2.imread('tests/images/acquire_pdorinku.png'),
+        ]
+        for bin_count in (4, 8):
+            descriptor = HistDescriptor(bin_count)
+            for img in images:
+                with self.subTest(bin_count=bin_count, shape=img.shape):
+                    expected = _reference_hist(img, bin_count)
+                    actual = descriptor(img)
+                    self.assertEqual(actual.shape, expected.shape)
+                    np.testing.assert_allclose(actual, expected, rtol=1e-6, atol=1e-7)
@@ -0,0 +1,20 @@
+import os
+from unittest import TestCase
+
+from kotonebot.backend.core import cv2_imread
+from kaa.tasks.actions.loading import is_loading_frame
+
+IMAGES = 'tests/images/ui/'
+
+
+class TestLoading(TestCase):
+    def test_is_loading_frame(self):
+        """测试加载页面检测，逐像素检查与默认采样间隔结果一致"""
+        names = sorted(name for name in os.listdir(IMAGES) if 'loading_' in name)
+        self.assertTrue(names)
+        for name in names:
+            img = cv2_imread(os.path.join(IMAGES, name))
+            expected = name.startswith('loading_')
+            for step in (1, 2, 4, 8):
+                with self.subTest(name=name, step=step):
+                    self.assertEqual(is_loading_frame(img, step), expected)
@@ -0,0 +1,36 @@
+from unittest import TestCase
+
+from kotonebot.backend.ocr import jp
+from kotonebot.backend.core import cv2_imread
+
+from kaa.util.ocr_batch import ocr_regions
+from kaa.game_ui.schedule import CurVoValue, CurDaValue, CurViValue, MaxDaValue
+
+SCREENSHOTS = 'kotonebot-resource/sprites/jp/in_purodyuusu/'
+BOXES = [CurVoValue, CurDaValue, CurViValue, MaxDaValue]
+
+
+class TestOcrBatch(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = jp()
+
+    def test_schedule_values(self):
+        """测试拼接识别与逐个识别的结果一致"""
+        for name in ('screenshot_action_1.png', 'screenshot_sp.png'):
+            with self.subTest(name=name):
+                img = cv2_imread(SCREENSHOTS + name)
+                batched = ocr_regions(self.engine, img, BOXES)
+                self.assertEqual(len(batched), len(BOXES))
+                for box, result in zip(BOXES, batched):
+                    expected = self.engine.ocr(img, rect=box).squash().text
+                    self.assertEqual(result.squash().text, expected)
+                    # 坐标换算回原截图
+                    for r in result:
+                        self.assertTrue(box.x1 <= r.original_rect.x1 + r.original_rect.w / 2 <= box.x2)
+                        self.assertTrue(box.y1 <= r.original_rect.y1 + r.original_rect.h / 2 <= box.y2)
+
+    def test_empty(self):
+        """测试没有区域时不调用 OCR"""
+        img = cv2_imread(SCREENSHOTS + 'screenshot_sp.png')
+        self.assertEqual(ocr_regions(self.engine, img, []), [])
@@ -366,6 +366,36 @@ class TestProduceSolutionManager(TestCase):
 
         self.assertIn("Solution with id 'nonexistent_id' not found", str(context.exception))
 
+    def test_read_cached_solution(self):
+        """测试缓存读取方案，以及文件变化后缓存失效"""
+        solution = ProduceSolution(
+            id='cached_test_id',
+            name='缓存测试方案',
+            data=ProduceData(mode='regular')
+        )
+        self.manager.save(solution.id, solution)
+
+        # 重复读取返回同一对象
+        first = self.manager.read_cached(solution.id)
+        self.assertIs(self.manager.read_cached(solution.id), first)
+        self.assertEqual(first.data.mode, 'regular')
+
+        # 外部修改文件内容后重新读取
+        file_path = self.manager._get_file_path(solution.name)
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        data['data']['mode'] = 'master'
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        stat = os.stat(file_path)
+        os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        self.assertEqual(self.manager.read_cached(solution.id).data.mode, 'master')
+
+        # 删除后抛出异常
+        self.manager.delete(solution.id)
+        with self.assertRaises(ProduceSolutionNotFoundError):
+            self.manager.read_cached(solution.id)
+
     def test_delete_solution(self):
         """测试删除方案"""
         # 创建并保存方案
@@ -0,0 +1,66 @@
+import os
+import time
+import tempfile
+from unittest import TestCase
+
+from kaa.tasks.produce.produce_state import WEEK_SCHEDULES, ProduceCheckpointStore, exam_week
+
+
+class TestProduceState(TestCase):
+    def test_schedules(self):
+        """测试各模式的周数与考试周"""
+        expected = {'regular': (13, 6, 5), 'pro': (16, 7, 6), 'master': (18, 8, 7)}
+        for mode, (weeks, mid, final_lesson) in expected.items():
+            with self.subTest(mode=mode):
+                schedule = WEEK_SCHEDULES[mode]
+                self.assertEqual(len(schedule), weeks)
+                self.assertEqual(exam_week(mode, 'mid'), mid)
+                self.assertEqual(exam_week(mode, 'final'), weeks)
+                self.assertEqual(schedule[final_lesson - 1], 'final-lesson')
+                self.assertEqual(schedule[weeks - 2], 'final-lesson')
+
+    def test_checkpoint(self):
+        """测试存档的写入、读取、阶段更新与删除"""
+        path = os.path.join(tempfile.mkdtemp(), 'checkpoint.json')
+        store = ProduceCheckpointStore(path)
+        self.assertIsNone(store.load())
+        # 没有正在进行的培育时不写入
+        store.update_phase('exam')
+        self.assertFalse(os.path.exists(path))
+
+        store.save('pro', 7)
+        store.update_phase('exam')
+        checkpoint = ProduceCheckpointStore(path).load('pro')
+        assert checkpoint is not None
+        self.assertEqual((checkpoint.mode, checkpoint.week, checkpoint.phase), ('pro', 7, 'exam'))
+        self.assertIsNone(store.load('regular'))
+
+        # 本周行动完成后进入下一周的行动阶段，最后一周不再前进
+        store.advance()
+        checkpoint = store.load('pro')
+        assert checkpoint is not None
+        self.assertEqual((checkpoint.week, checkpoint.phase), (8, 'action'))
+        store.save('pro', 16, 'exam')
+        store.advance()
+        checkpoint = store.load('pro')
+        assert checkpoint is not None
+        self.assertEqual((checkpoint.week, checkpoint.phase), (16, 'exam'))
+
+        store.clear()
+        self.assertIsNone(store.load())
+
+    def test_invalid_checkpoint(self):
+        """测试过期、损坏与周数越界的存档被忽略"""
+        path = os.path.join(tempfile.mkdtemp(), 'checkpoint.json')
+        store = ProduceCheckpointStore(path, max_age=60)
+        store.save('regular', 3)
+        self.assertIsNotNone(store.load())
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f'{{"mode": "regular", "week": 3, "phase": "action", "updated_at": {time.time() - 120}}}')
+        self.assertIsNone(store.load())
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{"mode": "regular", "week": 14, "updated_at": %f}' % time.time())
+        self.assertIsNone(store.load())
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{')
+        self.assertIsNone(store.load())
@@ -0,0 +1,80 @@
+import os
+import json
+import tempfile
+from unittest import TestCase
+
+from kotonebot.backend.context import action, ContextStackVars, current_callstack
+from kotonebot.backend.context.context import ManualContextManager
+
+from kaa.util.profiler import ActionProfiler, ActionSample
+
+
+class TestActionProfiler(TestCase):
+    def setUp(self):
+        self.profiler = ActionProfiler()
+        self.profiler.install()
+        self.addCleanup(self.profiler.uninstall)
+
+    def test_nested_actions(self):
+        """测试嵌套动作分别计时，子动作的计数累加到父动作"""
+        counter = self.profiler._ActionProfiler__count # type: ignore
+
+        @action('profiler_test_inner')
+        def inner():
+            counter('screenshots')
+            counter('template_matches')
+
+        @action('profiler_test_outer')
+        def outer():
+            counter('ocrs')
+            with ManualContextManager():
+                inner()
+            inner()
+
+        outer()
+        summary = self.profiler.summary()
+        self.assertEqual(summary['profiler_test_inner']['count'], 2)
+        self.assertEqual(summary['profiler_test_inner']['screenshots'], 1)
+        self.assertEqual(summary['profiler_test_inner']['ocrs'], 0)
+        self.assertEqual(summary['profiler_test_outer']['count'], 1)
+        self.assertEqual(summary['profiler_test_outer']['screenshots'], 2)
+        self.assertEqual(summary['profiler_test_outer']['template_matches'], 2)
+        self.assertEqual(summary['profiler_test_outer']['ocrs'], 1)
+        self.assertEqual(len(summary), 2)
+
+    def test_exception(self):
+        """测试动作抛出异常（不会 pop）后，之后的动作仍能正确统计"""
+        @action('profiler_test_raise')
+        def raise_error():
+            raise ValueError()
+
+        @action('profiler_test_ok')
+        def ok():
+            pass
+
+        depth = len(ContextStackVars.stack)
+        callstack_depth = len(current_callstack)
+        with self.assertRaises(ValueError):
+            raise_error()
+        # 模拟外层恢复
+        del ContextStackVars.stack[depth:]
+        del current_callstack[callstack_depth:]
+        ok()
+        summary = self.profiler.summary()
+        self.assertNotIn('profiler_test_raise', summary)
+        self.assertEqual(summary['profiler_test_ok']['count'], 1)
+
+    def test_export_json(self):
+        """测试直方图与 JSON 导出"""
+        profiler = ActionProfiler(window=3)
+        for ms in (5, 20, 20, 2000):
+            profiler.add('a', ActionSample(ms / 1000, 1, 0, 0))
+        summary = profiler.summary()['a']
+        self.assertEqual(summary['count'], 4)
+        self.assertAlmostEqual(summary['total_s'], 2.045)
+        self.assertEqual(summary['histogram'], [0, 2, 0, 0, 0, 1, 0, 0, 0])
+        path = os.path.join(tempfile.mkdtemp(), 'profile.json')
+        profiler.export_json(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.assertEqual(data['actions']['a']['count'], 4)
@@ -0,0 +1,51 @@
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from kotonebot.client import Device
+from kaa.util.recorder import SessionRecorder, read_events, read_frames
+
+
+class _Screenshot:
+    def __init__(self, frames):
+        self.frames = iter(frames)
+
+    def screenshot(self):
+        return next(self.frames)
+
+class _Touch:
+    def click(self, x, y):
+        pass
+
+class _FakeDevice(Device):
+    def __init__(self, frames):
+        super().__init__()
+        self._screenshot = _Screenshot(frames) # type: ignore
+        self._touch = _Touch() # type: ignore
+
+
+class TestSessionRecorder(TestCase):
+    def test_record(self):
+        """测试录制的帧无损、按块分割，点击与帧的顺序正确"""
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 256, (128, 72, 3), dtype=np.uint8) for _ in range(5)]
+        device = _FakeDevice(frames)
+        recorder = SessionRecorder(chunk_frames=2)
+        with tempfile.TemporaryDirectory() as path:
+            recorder.start(device, path)
+            for _ in frames:
+                device.screenshot()
+                device.click(1, 2)
+            recorder.stop()
+            # 停止后不再录制
+            self.assertIsNone(device.screenshot_hook_after)
+            self.assertEqual(device.click_hooks_before, [])
+
+            replayed = list(read_frames(path))
+            self.assertEqual(len(replayed), len(frames))
+            for a, b in zip(replayed, frames):
+                np.testing.assert_array_equal(a, b)
+            events = read_events(path)
+            self.assertEqual([e['type'] for e in events], ['frame', 'click'] * 5)
+            self.assertEqual([e['chunk'] for e in events if e['type'] == 'frame'], [0, 0, 1, 1, 2])
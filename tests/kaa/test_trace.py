@@ -0,0 +1,56 @@
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from kaa.util.trace import TraceWriter
+
+
+class TestTraceWriter(TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def images(self) -> list[str]:
+        return [name for name in os.listdir(os.path.join(self.dir.name, 'rec-card')) if not name.endswith('.log')]
+
+    def test_write(self):
+        """测试后台写入图像与日志"""
+        writer = TraceWriter(self.dir.name, image_format='jpg')
+        img = np.zeros((64, 64, 3), dtype=np.uint8)
+        for i in range(3):
+            writer.submit('rec-card', img, {'index': i})
+        writer.close()
+        images = self.images()
+        self.assertEqual(len(images), 3)
+        self.assertTrue(all(name.endswith('.jpg') for name in images))
+        with open(os.path.join(self.dir.name, 'rec-card', 'rec-card.log'), encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[1::2], ['{"index": 0}', '{"index": 1}', '{"index": 2}'])
+        self.assertTrue(set(lines[0::2]) <= set(images))
+
+    def test_rotate(self):
+        """测试图像总大小超过上限时删除最早的图像"""
+        rng = np.random.default_rng(0)
+        # 随机噪声几乎无法压缩，每张约 48KB
+        writer = TraceWriter(self.dir.name, queue_size=100, max_size_mb=0.2)
+        for i in range(10):
+            writer.submit('rec-card', rng.integers(0, 256, (128, 128, 3), dtype=np.uint8), str(i))
+        writer.close()
+        self.assertEqual(writer.written, 10)
+        self.assertEqual(len(self.images()), 4)
+        # 默认不限制大小，不删除已有的图像
+        writer = TraceWriter(self.dir.name)
+        writer.submit('rec-card', rng.integers(0, 256, (128, 128, 3), dtype=np.uint8), '10')
+        writer.close()
+        self.assertEqual(len(self.images()), 5)
+
+    def test_drop_newest(self):
+        """测试队列已满时丢弃新提交的记录"""
+        writer = TraceWriter(self.dir.name, queue_size=1, drop_policy='drop_newest')
+        img = np.zeros((1280, 720, 3), dtype=np.uint8)
+        results = [writer.submit('rec-card', img, str(i)) for i in range(50)]
+        writer.close()
+        self.assertEqual(writer.dropped, results.count(False))
+        self.assertEqual(writer.written + writer.dropped, 50)
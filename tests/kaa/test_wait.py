@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+from unittest import TestCase
+from unittest.mock import patch
+
+import numpy as np
+
+from kaa.tasks.actions import wait
+
+
+class FakeClock:
+    def __init__(self, frames: list[np.ndarray]):
+        self.now = 0.0
+        self.frames = frames
+        self.screenshots = 0
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+    def screenshot(self) -> np.ndarray:
+        frame = self.frames[min(self.screenshots, len(self.frames) - 1)]
+        self.screenshots += 1
+        return frame
+
+
+class TestWait(TestCase):
+    def run_with(self, clock: FakeClock, func, **kwargs):
+        with (
+            patch.object(wait.time, 'time', clock.time),
+            patch.object(wait, 'sleep', clock.sleep),
+            patch.object(wait, 'device', SimpleNamespace(screenshot=clock.screenshot)),
+        ):
+            return func(**kwargs)
+
+    def test_wait_until_stable(self):
+        """测试画面停止变化后立即返回，持续变化时等到超时"""
+        frames = [np.full((128, 72, 3), v, dtype=np.uint8) for v in (0, 100, 200)]
+        clock = FakeClock(frames)
+        self.assertTrue(self.run_with(clock, wait.wait_until_stable, timeout=5, stable_time=0.5, interval=0.1))
+        self.assertTrue(0.7 <= clock.now <= 0.8 + 1e-6)
+
+        changing = [np.full((128, 72, 3), (i * 40) % 256, dtype=np.uint8) for i in range(100)]
+        clock = FakeClock(changing)
+        self.assertFalse(self.run_with(clock, wait.wait_until_stable, timeout=2, interval=0.1))
+        self.assertAlmostEqual(clock.now, 2)
+
+    def test_wait_until(self):
+        """测试条件满足时返回 True，超时返回 False"""
+        frames = [np.full((8, 8, 3), v, dtype=np.uint8) for v in (0, 0, 255)]
+        clock = FakeClock(frames)
+        self.assertTrue(self.run_with(clock, wait.wait_until, predicate=lambda img: img[0, 0, 0] == 255, timeout=1))
+        self.assertEqual(clock.screenshots, 3)
+        clock = FakeClock(frames[:1])
+        self.assertFalse(self.run_with(clock, wait.wait_until, predicate=lambda img: False, timeout=1))
+        self.assertAlmostEqual(clock.now, 1)
@@ -0,0 +1,50 @@
+"""
+加载页面检测的微基准测试。
+
+对比 `kaa.tasks.actions.loading.is_loading_frame` 与原先基于 `np.unique` 的实现，
+检查两者在测试图片上的结果是否一致，并统计单帧耗时。
+
+用法（在仓库根目录下执行）：
+    python -m tools.loading_benchmark [图片文件夹] [--number N]
+"""
+import os
+import argparse
+import timeit
+
+import cv2
+import numpy as np
+from cv2.typing import MatLike
+
+from kotonebot.backend.core import cv2_imread
+
+def loading_reference(img: MatLike) -> bool:
+    """原先的实现：完整二值化后用 `np.unique` 统计颜色数量。"""
+    _, img = cv2.threshold(img, 127, 255, cv2.THRESH_BINARY)
+    img = img[:int(img.shape[0] * 0.35), :]
+    b, g, r = cv2.split(img)
+    shifted = b.astype(np.int64) + 1000 * (g.astype(np.int64) + 1) + 1000 * 1000 * (r.astype(np.int64) + 1)
+    return len(np.unique(shifted)) <= 2
+
+def main():
+    parser = argparse.ArgumentParser(description='加载页面检测的微基准测试')
+    parser.add_argument('folder', nargs='?', default='tests/images/ui/', help='图片文件夹，使用其中文件名含 loading_ 的图片')
+    parser.add_argument('--number', type=int, default=200, help='每张图片的重复次数')
+    args = parser.parse_args()
+
+    from kaa.tasks.actions.loading import is_loading_frame, LOADING_SAMPLE_STEP
+    names = sorted(name for name in os.listdir(args.folder) if 'loading_' in name)
+    print(f'{"image":<24}{"result":>8}{"reference(ms)":>16}{"step=1(ms)":>14}{f"step={LOADING_SAMPLE_STEP}(ms)":>14}')
+    mismatches = 0
+    for name in names:
+        img = cv2_imread(os.path.join(args.folder, name))
+        expected = loading_reference(img)
+        if is_loading_frame(img, 1) != expected or is_loading_frame(img) != expected:
+            mismatches += 1
+        ref = timeit.timeit(lambda: loading_reference(img), number=args.number) / args.number * 1000
+        full = timeit.timeit(lambda: is_loading_frame(img, 1), number=args.number) / args.number * 1000
+        fast = timeit.timeit(lambda: is_loading_frame(img), number=args.number) / args.number * 1000
+        print(f'{name:<24}{str(expected):>8}{ref:>16.3f}{full:>14.3f}{fast:>14.3f}')
+    print(f'{mismatches} mismatch(es).')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,258 @@
+"""
+离线回放基准测试。
+
+把录制好的截图文件夹当作设备画面，以最快速度依次回放，
+统计培育打牌相关各检测阶段的耗时分位数与整体帧率。
+不需要模拟器、GPU 或网络，可以在 CI 中对比 CV 相关改动前后的性能。
+
+分为两部分：
+1. 逐帧阶段测试：对每一帧单独调用各检测函数。
+2. `do_cards` 回放：用回放设备驱动完整的 `do_cards` 循环，所有等待都被跳过。
+
+用法（在仓库根目录下执行）：
+    python -m tools.replay_benchmark <截图文件夹> [--exam] [--repeat N] [--json result.json]
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+from contextlib import ExitStack
+from typing import Any, Callable, Literal
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+from cv2.typing import MatLike
+
+from kotonebot.util import Interval
+from kotonebot.client import Device
+from kotonebot.backend.flow_controller import FlowController
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp')
+
+class ReplayFinished(Exception):
+    """回放的截图已全部用完。"""
+
+class ReplayScreenshot:
+    def __init__(self, frames: list[MatLike]):
+        self.frames = frames
+        self.index = 0
+
+    @property
+    def screen_size(self) -> tuple[int, int]:
+        h, w = self.frames[0].shape[:2]
+        return w, h
+
+    def detect_orientation(self) -> Literal['portrait', 'landscape'] | None:
+        w, h = self.screen_size
+        return 'portrait' if h >= w else 'landscape'
+
+    def screenshot(self) -> MatLike:
+        if self.index >= len(self.frames):
+            raise ReplayFinished()
+        frame = self.frames[self.index]
+        self.index += 1
+        # 点击时会在截图上绘制调试标记，不能返回原图
+        return frame.copy()
+
+class ReplayTouch:
+    def __init__(self):
+        self.clicks: list[tuple[int, int]] = []
+
+    def click(self, x: int, y: int) -> None:
+        self.clicks.append((x, y))
+
+    def swipe(self, x1: int, y1: int, x2: int, y2: int, duration: float | None = None) -> None:
+        pass
+
+class ReplayDevice(Device):
+    """
+    回放设备。
+
+    与 `tests/util.py` 中的 `MockDevice` 类似，但截图来自一组预先载入内存的帧，
+    每次截图返回下一帧，全部用完后抛出 `ReplayFinished`。点击只做记录。
+    """
+    def __init__(self, frames: list[MatLike]):
+        super().__init__('replay')
+        self.replay = ReplayScreenshot(frames)
+        self.touch = ReplayTouch()
+        self._screenshot = self.replay
+        self._touch = self.touch
+
+    @property
+    def screen_size(self) -> tuple[int, int]:
+        return self.replay.screen_size
+
+def load_frames(folder: str) -> list[MatLike]:
+    """
+    载入文件夹中的所有截图。
+
+    若文件夹为 `kaa.util.recorder` 的录制目录，则按录制顺序载入，
+    否则按文件名顺序载入其中的图像文件。
+    """
+    from kaa.util.recorder import is_session, read_frames
+    if is_session(folder):
+        return list(read_frames(folder))
+    names = sorted(name for name in os.listdir(folder) if name.lower().endswith(IMAGE_EXTENSIONS))
+    frames = []
+    for name in names:
+        img = cv2.imdecode(np.fromfile(os.path.join(folder, name), dtype=np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            logger.warning('Failed to read %s. Skipped.', name)
+            continue
+        frames.append(img)
+    return frames
+
+class StageTimer:
+    """按阶段记录耗时。"""
+    def __init__(self):
+        self.samples: dict[str, list[float]] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.samples.setdefault(stage, []).append(seconds)
+
+    def measure(self, stage: str, func: Callable, *args, **kwargs) -> Any:
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def wrap(self, stage: str, func: Callable) -> Callable:
+        def wrapper(*args, **kwargs):
+            return self.measure(stage, func, *args, **kwargs)
+        return wrapper
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """各阶段的调用次数与耗时统计（毫秒）。"""
+        result = {}
+        for stage, samples in self.samples.items():
+            ms = np.array(samples) * 1000
+            result[stage] = {
+                'count': len(ms),
+                'mean': float(ms.mean()),
+                'p50': float(np.percentile(ms, 50)),
+                'p90': float(np.percentile(ms, 90)),
+                'p99': float(np.percentile(ms, 99)),
+                'max': float(ms.max()),
+            }
+        return result
+
+def print_summary(title: str, summary: dict[str, dict[str, float]]) -> None:
+    print(f'\n{title}')
+    print(f'{"stage":<40}{"count":>8}{"mean":>10}{"p50":>10}{"p90":>10}{"p99":>10}{"max":>10}')
+    for stage, s in summary.items():
+        print(
+            f'{stage:<40}{s["count"]:>8}{s["mean"]:>10.2f}{s["p50"]:>10.2f}'
+            f'{s["p90"]:>10.2f}{s["p99"]:>10.2f}{s["max"]:>10.2f}'
+        )
+
+def bench_stages(frames: list[MatLike], repeat: int, skip: set[str]) -> dict[str, Any]:
+    """
+    逐帧调用各检测函数。
+
+    :param skip: 跳过的阶段名称。
+    """
+    from kaa.game_ui.drinks_overview import locate_all_drinks_in_3_drink_slots
+    from kaa.tasks.produce.acquisition_scene import classify_acquisitions
+    from kaa.tasks.produce.cards import skill_card_count, detect_recommended_card
+
+    timer = StageTimer()
+
+    def measure(stage: str, func: Callable, *args, **kwargs) -> Any:
+        if stage not in skip:
+            return timer.measure(stage, func, *args, **kwargs)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for img in frames:
+            frame_start = time.perf_counter()
+            # fast_acquisitions 中的识别部分
+            measure('fast_acquisitions', classify_acquisitions, img)
+            measure('locate_all_drinks_in_3_drink_slots', locate_all_drinks_in_3_drink_slots, img)
+            count = measure('skill_card_count', skill_card_count, img)
+            if count:
+                measure('detect_recommended_card', detect_recommended_card, count, lambda _, __: True, img=img)
+            timer.add('frame', time.perf_counter() - frame_start)
+    elapsed = time.perf_counter() - start
+    return {
+        'frames': len(frames) * repeat,
+        'seconds': elapsed,
+        'fps': len(frames) * repeat / elapsed,
+        'stages': timer.summary(),
+    }
+
+def bench_do_cards(frames: list[MatLike], is_exam: bool, repeat: int) -> dict[str, Any]:
+    """用回放设备驱动 `do_cards`，跳过所有等待。"""
+    from kotonebot.backend.context import inject_context
+    import kaa.tasks.produce.cards as cards
+
+    timer = StageTimer()
+    screenshots = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        device = ReplayDevice(frames)
+        inject_context(device=device)
+        with ExitStack() as stack:
+            stack.enter_context(patch.object(FlowController, 'sleep', lambda self, seconds: None))
+            stack.enter_context(patch.object(Interval, 'wait', lambda self: None))
+            # 等待画面稳定会不断截图，回放时视为已稳定，避免消耗回放帧
+            stack.enter_context(patch.object(cards, 'wait_until_stable', lambda **kwargs: True))
+            for name in ('locate_all_drinks_in_3_drink_slots', 'detect_hand_layout', 'detect_recommended_card'):
+                stack.enter_context(patch.object(cards, name, timer.wrap(name, getattr(cards, name))))
+            try:
+                timer.measure('do_cards', cards.do_cards, is_exam, lambda _, __: True, lambda: False)
+            except ReplayFinished:
+                pass
+        screenshots += device.replay.index
+    elapsed = time.perf_counter() - start
+    return {
+        'screenshots': screenshots,
+        'seconds': elapsed,
+        'fps': screenshots / elapsed,
+        'stages': timer.summary(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='离线回放截图，测试培育打牌相关检测的性能')
+    parser.add_argument('folder', help='截图文件夹（按文件名顺序回放）或录制目录')
+    parser.add_argument('--exam', action='store_true', help='以考试模式运行 do_cards（会处理饮料）')
+    parser.add_argument('--repeat', type=int, default=1, help='重复回放次数')
+    parser.add_argument('--json', help='把结果写入指定的 JSON 文件')
+    parser.add_argument('--skip-do-cards', action='store_true', help='只进行逐帧阶段测试')
+    parser.add_argument(
+        '--skip-stage', action='append', default=[],
+        help='逐帧阶段测试中跳过的阶段，可指定多次。例如缺少饮料资源时跳过 locate_all_drinks_in_3_drink_slots'
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s')
+    frames = load_frames(args.folder)
+    if not frames:
+        print(f'No screenshot found in {args.folder}.')
+        sys.exit(1)
+    print(f'Loaded {len(frames)} frames from {args.folder}.')
+
+    from kotonebot.backend.context import init_context, manual_context
+    from kaa.common import BaseConfig
+    # 使用默认配置，不读写用户的 config.json
+    config_path = os.path.join(tempfile.mkdtemp(), 'config.json')
+    init_context(config_path=config_path, config_type=BaseConfig, target_device=ReplayDevice(frames))
+    manual_context().begin()
+
+    result: dict[str, Any] = {'stages': bench_stages(frames, args.repeat, set(args.skip_stage))}
+    print_summary(f'Per-frame stages: {result["stages"]["fps"]:.1f} frames/s (ms)', result['stages']['stages'])
+    if not args.skip_do_cards:
+        result['do_cards'] = bench_do_cards(frames, args.exam, args.repeat)
+        print_summary(f'do_cards replay: {result["do_cards"]["fps"]:.1f} screenshots/s (ms)', result['do_cards']['stages'])
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+
+if __name__ == '__main__':
+    main()